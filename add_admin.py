@@ -4,7 +4,8 @@
 import asyncio
 import sys
 from dotenv import load_dotenv
-from app.database.session import AsyncSessionLocal, init_db
+from app.database.session import AsyncSessionLocal, close_db
+from app.database.migrations import upgrade_database
 from app.models.models import User
 from app.services.repositories import UserRepository
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,8 +15,8 @@ load_dotenv()
 async def add_admin_user():
     """اضافه کردن کاربر Admin جدید"""
     
-    # Initialize database
-    await init_db()
+    # Bring the schema up to date
+    await upgrade_database()
     
     async with AsyncSessionLocal() as session:
         user_repo = UserRepository(session)
@@ -51,5 +52,12 @@ async def add_admin_user():
 🚀 الان می‌تونی به بات رفتی و با /start شروع کنی!
         """)
 
+async def main():
+    try:
+        await add_admin_user()
+    finally:
+        # Pooled connections keep the process alive until closed
+        await close_db()
+
 if __name__ == "__main__":
-    asyncio.run(add_admin_user())
+    asyncio.run(main())
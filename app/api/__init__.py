@@ -1,5 +1,5 @@
 """API package for Pishro Investment System."""
 
-from . import users, investments, transactions
+from . import users, investments, transactions, valuations, exports
 
-__all__ = ["users", "investments", "transactions"]
+__all__ = ["users", "investments", "transactions", "valuations", "exports"]
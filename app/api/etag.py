@@ -0,0 +1,71 @@
+"""ETag / If-None-Match support for JSON GET responses.
+
+`ETagMiddleware` tags every complete (``Content-Length``) JSON response to
+a GET with a hash of its body and answers ``304 Not Modified`` without the
+body when the client already holds that version. Streamed responses pass
+through untouched.
+"""
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def etag_for(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value names ``etag`` (weak comparison)."""
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+class ETagMiddleware:
+    """Pure ASGI middleware adding ETags and 304 responses to JSON GETs."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Message = {}
+        body = []
+
+        async def send_with_etag(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (message["status"] == 200 and "content-length" in headers and "etag" not in headers
+                        and headers.get("content-type", "").startswith("application/json")):
+                    start = message  # Hold it until the body is complete
+                    return
+                await send(message)
+                return
+
+            if not start:
+                await send(message)
+                return
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            content = b"".join(body)
+            etag = etag_for(content)
+            headers = MutableHeaders(raw=list(start["headers"]))
+            headers["etag"] = etag
+            if if_none_match and etag_matches(if_none_match, etag):
+                del headers["content-length"]
+                del headers["content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": content})
+
+        await self.app(scope, receive, send_with_etag)
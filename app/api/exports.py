@@ -0,0 +1,94 @@
+"""Streaming export endpoints for the ledger (transactions and valuations).
+
+Rows are read through a server-side cursor and encoded batch by batch into
+the response, so an export of any size runs in constant memory. The stream
+opens its own session: it outlives the request handler.
+"""
+
+from datetime import date
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.database.session import AsyncSessionLocal
+from app.models.models import TransactionType
+from app.services.ledger_export import csv_chunks, ndjson_chunks
+from app.services.repositories import TransactionRepository, ValuationRepository
+
+router = APIRouter(prefix="/api/v1/export", tags=["export"])
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Session factory for export streams."""
+    return AsyncSessionLocal
+
+
+def _stream(session_factory: async_sessionmaker, repository_class, name: str,
+            export_format: ExportFormat, date_field: str, **filters) -> StreamingResponse:
+    fields = [column.key for column in repository_class.EXPORT_COLUMNS]
+    encode = ndjson_chunks if export_format == ExportFormat.NDJSON else csv_chunks
+
+    async def body():
+        async with session_factory() as session:
+            batches = repository_class(session).stream_for_export(batch_size=EXPORT_BATCH_SIZE, **filters)
+            async for chunk in encode(batches, fields, (date_field,)):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'},
+    )
+
+
+def _check_range(date_from: Optional[date], date_to: Optional[date]):
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from is after date_to")
+
+
+@router.get("/transactions")
+async def export_transactions(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    investment_id: Optional[int] = Query(None),
+    type: Optional[TransactionType] = Query(None),
+    date_from: Optional[date] = Query(None, description="First transaction date (Gregorian, inclusive)"),
+    date_to: Optional[date] = Query(None, description="Last transaction date (Gregorian, inclusive)"),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """Stream transactions in recording (ID) order as NDJSON or CSV."""
+    _check_range(date_from, date_to)
+    return _stream(
+        session_factory, TransactionRepository, "transactions", format, "transaction_date",
+        investment_id=investment_id, txn_type=type, date_from=date_from, date_to=date_to
+    )
+
+
+@router.get("/valuations")
+async def export_valuations(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    investment_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None, description="First valuation date (Gregorian, inclusive)"),
+    date_to: Optional[date] = Query(None, description="Last valuation date (Gregorian, inclusive)"),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """Stream valuations in recording (ID) order as NDJSON or CSV."""
+    _check_range(date_from, date_to)
+    return _stream(
+        session_factory, ValuationRepository, "valuations", format, "valuation_date",
+        investment_id=investment_id, date_from=date_from, date_to=date_to
+    )
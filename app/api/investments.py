@@ -1,21 +1,28 @@
 """Investment API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.routing import pin_to_primary
 from app.database.session import AsyncSessionLocal
+from app.models.models import ContractType
 from app.services.repositories import InvestmentRepository
+from app.services.portfolio_service import PortfolioService
+from app.api.serializers import INVESTMENT_ROWS
 from app.api.schemas import (
     InvestmentResponse, InvestmentCreate, InvestmentUpdate, 
-    APIResponse
+    InvestmentSummary, APIResponse
 )
 from typing import List
 
 router = APIRouter(prefix="/api/v1/investments", tags=["investments"])
 
 
-async def get_db():
-    """Get database session."""
+async def get_db(request: Request):
+    """Get database session (replica reads are off for writing requests)."""
     async with AsyncSessionLocal() as session:
+        if request.method not in ("GET", "HEAD"):
+            pin_to_primary(session)
         yield session
 
 
@@ -30,11 +37,12 @@ async def list_investments(
     repo = InvestmentRepository(db)
     
     if investor_id:
-        investments = await repo.get_by_investor(investor_id, skip=skip, limit=limit)
-    else:
-        investments = await repo.get_all(skip=skip, limit=limit)
+        # One investor has a handful of investments: page them here
+        investments = await repo.get_by_user(investor_id)
+        return investments[skip:skip + limit]
     
-    return investments
+    investments = await repo.get_all(skip=skip, limit=limit, columns=INVESTMENT_ROWS.columns)
+    return ORJSONResponse(INVESTMENT_ROWS(investments))
 
 
 @router.get("/{investment_id}", response_model=InvestmentResponse)
@@ -57,8 +65,16 @@ async def create_investment(
 ):
     """Create new investment."""
     repo = InvestmentRepository(db)
-    new_investment = await repo.create(investment)
-    return new_investment
+    new_investment = await repo.create(
+        user_id=investment.user_id,
+        contract_type=ContractType(investment.contract_type.value),
+        initial_amount=investment.initial_amount,
+        start_date=investment.start_date,
+        dividend_rate=investment.dividend_rate,
+        holding_period_months=investment.holding_period_months
+    )
+    await db.commit()
+    return ORJSONResponse(INVESTMENT_ROWS.one(new_investment))
 
 
 @router.put("/{investment_id}", response_model=InvestmentResponse)
@@ -92,26 +108,42 @@ async def delete_investment(
     return APIResponse(success=True, message="Investment deleted successfully")
 
 
-@router.get("/{investment_id}/details", response_model=dict)
-async def get_investment_details(
-    investment_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get detailed investment information."""
-    repo = InvestmentRepository(db)
-    investment = await repo.get_by_id(investment_id)
-    if not investment:
+async def _summary(investment_id: int, db: AsyncSession) -> dict:
+    """Portfolio summary with profit and ROI (404 if the investment does not exist)."""
+    summary = await PortfolioService(db).get_portfolio_summary(investment_id)
+    if not summary:
         raise HTTPException(status_code=404, detail="Investment not found")
     
-    # Calculate current value and profit
-    current_value = investment.current_value
-    profit = current_value - investment.initial_amount
-    roi = (profit / investment.initial_amount * 100) if investment.initial_amount > 0 else 0
+    # Calculate current value and profit from the balance snapshot
+    current_value = summary["current_value"]
+    profit = current_value - summary["initial_capital"]
+    roi = (profit / summary["initial_capital"] * 100) if summary["initial_capital"] > 0 else 0
     
     return {
-        **investment.__dict__,
-        "current_value": current_value,
+        "id": investment_id,
+        **summary,
         "profit": profit,
         "roi_percentage": roi,
-        "investor": investment.investor.name if investment.investor else None
     }
+
+
+@router.get("/{investment_id}/details", response_model=dict)
+async def get_investment_details(
+    investment_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get detailed investment information."""
+    return await _summary(investment_id, db)
+
+
+@router.get("/{investment_id}/summary", response_model=InvestmentSummary)
+async def get_investment_summary(
+    investment_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get ledger totals, current value and ROI in one query.
+    
+    Served from the balance snapshot (the ledger is aggregated in SQL for
+    investments that predate it), so no transaction rows are loaded.
+    """
+    return await _summary(investment_id, db)
@@ -1,10 +1,12 @@
 """Pydantic schemas for API responses and requests."""
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
+from app.utils.money import MoneyAmount
+
 
 # Enums
 class UserRoleEnum(str, Enum):
@@ -15,15 +17,14 @@ class UserRoleEnum(str, Enum):
 
 class InvestmentTypeEnum(str, Enum):
     FIXED_RATE = "fixed_rate"
-    PERCENTAGE = "percentage"
-    COMPOUND = "compound"
+    VARIABLE_HOLDING = "variable_holding"
 
 
 class TransactionTypeEnum(str, Enum):
     DEPOSIT = "deposit"
     WITHDRAWAL = "withdrawal"
-    PROFIT = "profit"
-    REFUND = "refund"
+    DIVIDEND = "dividend"
+    CANCELLATION = "cancellation"
 
 
 # Base Models
@@ -35,7 +36,7 @@ class UserBase(BaseModel):
 
 
 class UserCreate(UserBase):
-    pass
+    telegram_id: int
 
 
 class UserUpdate(BaseModel):
@@ -58,14 +59,19 @@ class UserResponse(UserBase):
 class InvestmentBase(BaseModel):
     user_id: int
     contract_type: str
-    initial_amount: float
+    initial_amount: MoneyAmount
     start_date: datetime
     dividend_rate: Optional[float] = None
     holding_period_months: Optional[int] = None
 
 
-class InvestmentCreate(InvestmentBase):
-    pass
+class InvestmentCreate(BaseModel):
+    user_id: int
+    contract_type: InvestmentTypeEnum
+    initial_amount: MoneyAmount = Field(..., gt=0)
+    start_date: date
+    dividend_rate: Optional[float] = None
+    holding_period_months: Optional[int] = None
 
 
 class InvestmentUpdate(BaseModel):
@@ -85,18 +91,47 @@ class InvestmentResponse(InvestmentBase):
         from_attributes = True
 
 
+class InvestmentSummary(BaseModel):
+    id: int
+    contract_type: str
+    status: str
+    initial_capital: MoneyAmount
+    current_deposits: MoneyAmount
+    current_withdrawals: MoneyAmount
+    total_transactions_profit: MoneyAmount
+    transaction_count: int
+    current_value: MoneyAmount
+    profit: MoneyAmount
+    roi_percentage: float
+    last_updated: date
+
+
 # Transaction Models
 class TransactionBase(BaseModel):
     investment_id: int
     type: str
-    amount: float
+    amount: MoneyAmount
     transaction_date: datetime
     description: Optional[str] = None
     recorded_by: int
 
 
-class TransactionCreate(TransactionBase):
-    pass
+class TransactionCreate(BaseModel):
+    investment_id: int
+    type: TransactionTypeEnum
+    amount: MoneyAmount
+    transaction_date: date
+    description: Optional[str] = None
+    recorded_by: int
+
+    @model_validator(mode="after")
+    def check_amount_sign(self):
+        # Ledger convention: withdrawals are negative, everything else positive
+        if self.type == TransactionTypeEnum.WITHDRAWAL and self.amount >= 0:
+            raise ValueError("withdrawal amount must be negative")
+        if self.type != TransactionTypeEnum.WITHDRAWAL and self.amount <= 0:
+            raise ValueError(f"{self.type.value} amount must be positive")
+        return self
 
 
 class TransactionResponse(TransactionBase):
@@ -107,10 +142,28 @@ class TransactionResponse(TransactionBase):
         from_attributes = True
 
 
+class TransactionPage(BaseModel):
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
+class BulkTransactionRow(TransactionCreate):
+    pass
+
+
+class BulkTransactionRequest(BaseModel):
+    transactions: List[BulkTransactionRow] = Field(..., min_length=1, max_length=50_000)
+
+
+class BulkTransactionResult(BaseModel):
+    count: int
+    ids: List[int]
+
+
 # Valuation Models
 class ValuationBase(BaseModel):
     investment_id: int
-    new_value: float
+    new_value: MoneyAmount
     valuation_date: datetime
     reason: Optional[str] = None
     updated_by: int
@@ -122,7 +175,7 @@ class ValuationCreate(ValuationBase):
 
 class ValuationResponse(ValuationBase):
     id: int
-    old_value: Optional[float] = None
+    old_value: Optional[MoneyAmount] = None
     profit_percentage: Optional[float] = None
     created_at: datetime
 
@@ -130,18 +183,34 @@ class ValuationResponse(ValuationBase):
         from_attributes = True
 
 
+class BulkValuationRequest(BaseModel):
+    percentage: float = Field(..., gt=-100, le=1000, description="Change applied to each current value")
+    valuation_date: date
+    updated_by: int
+    contract_type: Optional[str] = Field(None, description="Only revalue this contract type")
+    reason: Optional[str] = None
+
+
+class BulkValuationResult(BaseModel):
+    count: int
+    notified: int
+    old_total: MoneyAmount
+    new_total: MoneyAmount
+    missing_investment_ids: List[int] = []
+
+
 # Dashboard Models
 class DashboardStats(BaseModel):
     total_investments: int
-    total_capital: float
-    total_profit: float
+    total_capital: MoneyAmount
+    total_profit: MoneyAmount
     average_roi: float
 
 
 class UserStats(BaseModel):
     total_investments: int
-    total_invested: float
-    total_profit: float
+    total_invested: MoneyAmount
+    total_profit: MoneyAmount
     total_roi: float
     average_roi: float
 
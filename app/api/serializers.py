@@ -0,0 +1,66 @@
+"""Row serializers for list endpoints.
+
+List endpoints select only the columns of their response schema and return
+the rows as plain dicts through `ORJSONResponse`, skipping ORM objects and
+Pydantic validation: the rows were just read from the database, so there is
+nothing to validate, and orjson encodes ints, enums, dates and datetimes
+natively. The JSON is the same as the response schema would produce; the
+schemas remain the documented ``response_model``.
+"""
+
+from datetime import datetime, time
+from typing import Iterable, List
+
+from sqlalchemy import Row
+
+from app.models.models import User, Investment, Transaction, Valuation
+
+
+class RowSerializer:
+    """Columns of a response schema, and the mapping of their rows to dicts."""
+
+    def __init__(self, *columns, datetime_fields=()):
+        self.columns = columns
+        self.names = tuple(column.key for column in columns)
+        # Date columns the schema declares as datetimes (rendered at midnight)
+        self.datetime_fields = datetime_fields
+
+    def __call__(self, rows: Iterable[Row]) -> List[dict]:
+        names = self.names
+        records = [dict(zip(names, row)) for row in rows]
+        for name in self.datetime_fields:
+            for record in records:
+                if record[name] is not None:
+                    record[name] = datetime.combine(record[name], time())
+        return records
+
+    def one(self, obj) -> dict:
+        """The dict for one ORM object (e.g. one just created)."""
+        return self([tuple(getattr(obj, name) for name in self.names)])[0]
+
+
+USER_ROWS = RowSerializer(
+    User.id, User.telegram_id, User.name, User.phone_number, User.role, User.is_verified,
+    User.created_at, User.updated_at,
+)
+
+INVESTMENT_ROWS = RowSerializer(
+    Investment.id, Investment.user_id, Investment.contract_type, Investment.initial_amount,
+    Investment.start_date, Investment.dividend_rate, Investment.holding_period_months,
+    Investment.status, Investment.cancelled_date, Investment.created_at, Investment.updated_at,
+    datetime_fields=("start_date", "cancelled_date"),
+)
+
+TRANSACTION_ROWS = RowSerializer(
+    Transaction.id, Transaction.investment_id, Transaction.type, Transaction.amount,
+    Transaction.transaction_date, Transaction.description, Transaction.recorded_by,
+    Transaction.recorded_at,
+    datetime_fields=("transaction_date",),
+)
+
+VALUATION_ROWS = RowSerializer(
+    Valuation.id, Valuation.investment_id, Valuation.old_value, Valuation.new_value,
+    Valuation.profit_percentage, Valuation.valuation_date, Valuation.reason, Valuation.updated_by,
+    Valuation.created_at,
+    datetime_fields=("valuation_date",),
+)
@@ -1,39 +1,55 @@
 """Transaction API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.routing import pin_to_primary
 from app.database.session import AsyncSessionLocal
+from sqlalchemy import select
+from app.models.models import Investment, TransactionType, User
 from app.services.repositories import TransactionRepository
 from app.api.schemas import (
-    TransactionResponse, TransactionCreate, APIResponse
+    TransactionResponse, TransactionCreate, TransactionPage, APIResponse,
+    BulkTransactionRequest, BulkTransactionResult
 )
-from typing import List
+from app.api.serializers import TRANSACTION_ROWS
+from app.utils.pagination import encode_cursor, decode_cursor
+from typing import Optional
 
 router = APIRouter(prefix="/api/v1/transactions", tags=["transactions"])
 
 
-async def get_db():
-    """Get database session."""
+async def get_db(request: Request):
+    """Get database session (replica reads are off for writing requests)."""
     async with AsyncSessionLocal() as session:
+        if request.method not in ("GET", "HEAD"):
+            pin_to_primary(session)
         yield session
 
 
-@router.get("/", response_model=List[TransactionResponse])
+@router.get("/", response_model=TransactionPage)
 async def list_transactions(
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     investment_id: int = Query(None),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all transactions with optional filtering."""
+    """Get transactions newest-first with cursor (keyset) pagination."""
     repo = TransactionRepository(db)
     
-    if investment_id:
-        transactions = await repo.get_by_investment(investment_id, skip=skip, limit=limit)
-    else:
-        transactions = await repo.get_all(skip=skip, limit=limit)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    return transactions
+    transactions, next_position = await repo.get_page(
+        investment_id, limit=limit, after=after, columns=TRANSACTION_ROWS.columns
+    )
+    
+    return ORJSONResponse({
+        "items": TRANSACTION_ROWS(transactions),
+        "next_cursor": encode_cursor(*next_position) if next_position else None,
+    })
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
@@ -49,15 +65,49 @@ async def get_transaction(
     return transaction
 
 
+async def _check_references(db: AsyncSession, investment_ids: set, user_ids: set):
+    """Reject (400) investment or recording-user IDs that do not exist."""
+    for column, ids, label in ((Investment.id, investment_ids, "investment"), (User.id, user_ids, "user")):
+        known = set((await db.execute(select(column).where(column.in_(ids)))).scalars())
+        if known != ids:
+            raise HTTPException(status_code=400, detail=f"Unknown {label} IDs: {sorted(ids - known)}")
+
+
 @router.post("/", response_model=TransactionResponse)
 async def create_transaction(
     transaction: TransactionCreate,
     db: AsyncSession = Depends(get_db)
 ):
     """Create new transaction."""
+    await _check_references(db, {transaction.investment_id}, {transaction.recorded_by})
     repo = TransactionRepository(db)
-    new_transaction = await repo.create(transaction)
-    return new_transaction
+    new_transaction = await repo.create(
+        investment_id=transaction.investment_id,
+        txn_type=TransactionType(transaction.type.value),
+        amount=transaction.amount,
+        transaction_date=transaction.transaction_date,
+        recorded_by=transaction.recorded_by,
+        description=transaction.description
+    )
+    await db.commit()
+    return ORJSONResponse(TRANSACTION_ROWS.one(new_transaction))
+
+
+@router.post("/bulk", response_model=BulkTransactionResult)
+async def create_transactions_bulk(
+    request: BulkTransactionRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Record many transactions in one transaction (all or none)."""
+    rows = [transaction.model_dump() for transaction in request.transactions]
+    
+    await _check_references(
+        db, {row["investment_id"] for row in rows}, {row["recorded_by"] for row in rows}
+    )
+    
+    transaction_ids = await TransactionRepository(db).bulk_create(rows)
+    await db.commit()
+    return BulkTransactionResult(count=len(transaction_ids), ids=transaction_ids)
 
 
 @router.delete("/{transaction_id}")
@@ -1,34 +1,54 @@
 """User API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.routing import pin_to_primary
 from app.database.session import AsyncSessionLocal
+from app.models.models import UserRole
 from app.services.repositories import UserRepository
+from app.api.serializers import USER_ROWS
 from app.api.schemas import (
     UserResponse, UserCreate, UserUpdate, APIResponse, 
     UserStats, UserRoleEnum
 )
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
 
-async def get_db():
-    """Get database session."""
+async def get_db(request: Request):
+    """Get database session (replica reads are off for writing requests)."""
     async with AsyncSessionLocal() as session:
+        if request.method not in ("GET", "HEAD"):
+            pin_to_primary(session)
         yield session
 
 
+MAX_BATCH_IDS = 500
+
+
 @router.get("/", response_model=List[UserResponse])
 async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    ids: Optional[str] = Query(None, description="Comma-separated user IDs to fetch instead of a page"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all users with pagination."""
+    """Get all users with pagination, or the users listed in ``ids`` (in that order)."""
     repo = UserRepository(db)
-    users = await repo.get_all(skip=skip, limit=limit)
-    return users
+    
+    if ids is not None:
+        try:
+            user_ids = [int(user_id) for user_id in ids.split(",") if user_id.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+        if len(user_ids) > MAX_BATCH_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+        return ORJSONResponse(USER_ROWS(await repo.get_many(user_ids, columns=USER_ROWS.columns)))
+    
+    users = await repo.get_all(skip=skip, limit=limit, columns=USER_ROWS.columns)
+    return ORJSONResponse(USER_ROWS(users))
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -75,13 +95,16 @@ async def create_user(
     """Create new user."""
     repo = UserRepository(db)
     
-    # Check if phone already exists
-    existing = await repo.get_by_phone(user.phone)
-    if existing:
+    # Check if phone or Telegram ID already exists
+    if await repo.get_by_phone(user.phone_number):
         raise HTTPException(status_code=400, detail="Phone already registered")
+    if await repo.get_by_telegram_id(user.telegram_id):
+        raise HTTPException(status_code=400, detail="Telegram ID already registered")
     
-    new_user = await repo.create(user)
-    return new_user
+    new_user = await repo.create(user.telegram_id, user.phone_number, user.name, UserRole(user.role.value))
+    new_user.is_verified = user.is_verified
+    await db.commit()
+    return ORJSONResponse(USER_ROWS.one(new_user))
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -0,0 +1,81 @@
+"""Valuation API endpoints."""
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.routing import pin_to_primary
+from app.database.session import AsyncSessionLocal
+from app.models.models import ContractType
+from app.services.repositories import ValuationRepository
+from app.services.portfolio_service import PortfolioService
+from app.api.schemas import ValuationResponse, BulkValuationRequest, BulkValuationResult
+from app.api.serializers import VALUATION_ROWS
+from app.utils.formatters import parse_valuation_csv
+
+router = APIRouter(prefix="/api/v1/valuations", tags=["valuations"])
+
+
+async def get_db(request: Request):
+    """Get database session (replica reads are off for writing requests)."""
+    async with AsyncSessionLocal() as session:
+        if request.method not in ("GET", "HEAD"):
+            pin_to_primary(session)
+        yield session
+
+
+@router.get("/", response_model=List[ValuationResponse])
+async def list_valuations(
+    investment_id: int = Query(...),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get valuation history of an investment, newest first."""
+    valuations = await ValuationRepository(db).get_history_by_investment(
+        investment_id, limit, columns=VALUATION_ROWS.columns
+    )
+    return ORJSONResponse(VALUATION_ROWS(valuations))
+
+
+@router.post("/bulk", response_model=BulkValuationResult)
+async def bulk_revalue(
+    request: BulkValuationRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply a percentage change to every active investment (optionally one contract type)."""
+    try:
+        contract_type = ContractType(request.contract_type) if request.contract_type else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid contract type")
+    
+    result = await PortfolioService(db).bulk_update_valuations(
+        request.valuation_date, request.updated_by,
+        percentage=request.percentage, contract_type=contract_type, reason=request.reason
+    )
+    await db.commit()
+    return result
+
+
+@router.post("/bulk/csv", response_model=BulkValuationResult)
+async def bulk_revalue_csv(
+    request: Request,
+    valuation_date: date = Query(...),
+    updated_by: int = Query(...),
+    reason: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Record new values from a ``text/csv`` body of ``investment_id,new_value`` rows."""
+    try:
+        new_values = parse_valuation_csv((await request.body()).decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not new_values:
+        raise HTTPException(status_code=400, detail="CSV contains no rows")
+    
+    result = await PortfolioService(db).bulk_update_valuations(
+        valuation_date, updated_by, new_values=new_values, reason=reason
+    )
+    await db.commit()
+    return result
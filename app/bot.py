@@ -3,12 +3,22 @@ import logging
 from aiogram import Dispatcher, Bot, types, F
 from aiogram.enums.parse_mode import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand, BotCommandScopeDefault
 from app.config import settings
-from app.database.session import init_db, close_db, AsyncSessionLocal, Base
+from app.database.session import close_db, AsyncSessionLocal, Base
+from app.database.lazy_session import session_usage
+from app.database.migrations import check_schema_revision
 from app.utils.logger import logger, setup_logger
-from app.middleware import DatabaseSessionMiddleware, LoggingMiddleware, ErrorHandlingMiddleware
+from app.middleware import (
+    DatabaseSessionMiddleware, AuthMiddleware, LoggingMiddleware, ErrorHandlingMiddleware,
+    FSMWriteBufferMiddleware
+)
+from app.states.storage import create_fsm_storage, BufferedStorage, SQLStorage
+from app.services.update_queue import UpdateQueue
+from app.services.outbox_dispatcher import OutboxDispatcher
+from app.services.analytics_cache import report_cache
+from app.services.investor_index import investor_index
+from app.services.write_queue import write_queue
 from sqlalchemy.pool import StaticPool
 import sys
 from pathlib import Path
@@ -16,6 +26,23 @@ from pathlib import Path
 # Setup logging
 setup_logger("pishro_bot")
 
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _api_client():
+    """The shared `api_client`, if anything in this process imported it.
+    
+    The bot itself does not call the API, and httpx is not a bot dependency.
+    """
+    module = sys.modules.get("app.services.api_client")
+    return module.api_client if module is not None else None
+
+
+async def _close_api_client():
+    client = _api_client()
+    if client is not None:
+        await client.close()
+
 
 class PishroBot:
     """Main Telegram bot application."""
@@ -23,13 +50,21 @@ class PishroBot:
     def __init__(self):
         default_bot_props = DefaultBotProperties(parse_mode=ParseMode.HTML)
         self.bot = Bot(token=settings.BOT_TOKEN, default=default_bot_props)
-        self.storage = MemoryStorage()
+        self.storage = create_fsm_storage()
         self.dp = Dispatcher(storage=self.storage)
+        self.update_queue: UpdateQueue | None = None
+        self.outbox_dispatcher: OutboxDispatcher | None = None
         self._setup_middleware()
         self._setup_handlers()
     
     def _setup_middleware(self):
         """Register middleware."""
+        if isinstance(self.storage, BufferedStorage):
+            # Wrap aiogram's FSM middleware so its initial state read is buffered too
+            self.dp.update.outer_middleware.unregister(self.dp.fsm)
+            self.dp.update.outer_middleware(FSMWriteBufferMiddleware(self.storage))
+            self.dp.update.outer_middleware(self.dp.fsm)
+        
         # Order matters: outer middleware runs first
         self.dp.message.middleware(ErrorHandlingMiddleware())
         self.dp.callback_query.middleware(ErrorHandlingMiddleware())
@@ -37,6 +72,9 @@ class PishroBot:
         self.dp.message.middleware(DatabaseSessionMiddleware())
         self.dp.callback_query.middleware(DatabaseSessionMiddleware())
         
+        self.dp.message.middleware(AuthMiddleware())
+        self.dp.callback_query.middleware(AuthMiddleware())
+        
         self.dp.message.middleware(LoggingMiddleware())
         self.dp.callback_query.middleware(LoggingMiddleware())
     
@@ -82,18 +120,62 @@ class PishroBot:
         )
         logger.info("Bot commands configured")
     
+    def start_outbox_dispatcher(self):
+        """Start delivering queued notifications (if OUTBOX_ENABLED)."""
+        if settings.OUTBOX_ENABLED and self.outbox_dispatcher is None:
+            self.outbox_dispatcher = OutboxDispatcher(
+                AsyncSessionLocal, self.bot,
+                global_rate=settings.OUTBOX_GLOBAL_RATE,
+                per_chat_rate=settings.OUTBOX_PER_CHAT_RATE,
+                batch_size=settings.OUTBOX_BATCH_SIZE,
+                poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+                max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+            )
+            self.outbox_dispatcher.start()
+    
+    async def stop_outbox_dispatcher(self):
+        """Stop the dispatcher, handing unsent messages back to the outbox."""
+        if self.outbox_dispatcher is not None:
+            await self.outbox_dispatcher.stop()
+            self.outbox_dispatcher = None
+    
+    def metrics(self) -> dict:
+        """Update queue, session usage, API client (if loaded), investor index, outbox and write queue metrics."""
+        metrics = self.update_queue.metrics() if self.update_queue is not None else {}
+        metrics["db_sessions"] = session_usage.stats()
+        client = _api_client()
+        if client is not None:
+            metrics["api_client"] = client.stats()
+        if investor_index.ready:
+            metrics["investor_index"] = investor_index.stats()
+        if self.outbox_dispatcher is not None:
+            metrics["outbox"] = self.outbox_dispatcher.metrics()
+        if write_queue.running:
+            metrics["write_queue"] = write_queue.metrics()
+        return metrics
+    
     async def start_polling(self):
         """Start bot in polling mode."""
         logger.info("Starting bot in polling mode...")
         
-        # Initialize database
+        # Verify the schema revision (migrations run separately: migrate.py upgrade)
         try:
-            await init_db()
-            logger.info("Database initialized")
+            revision = await check_schema_revision()
+            logger.info(f"Database schema at revision {revision}")
         except Exception as e:
-            logger.error(f"Failed to initialize database: {e}")
+            logger.error(f"Database not ready: {e}")
             raise
         
+        if isinstance(self.storage, SQLStorage):
+            self.storage.start_purge_task(settings.FSM_PURGE_INTERVAL_SECONDS)
+        
+        if settings.WRITE_QUEUE_ENABLED:
+            write_queue.start()
+        self.start_outbox_dispatcher()
+        report_cache.start_refresh_task()
+        if settings.INVESTOR_INDEX_ENABLED:
+            investor_index.start_refresh_task()
+        
         # Set up commands
         await self.setup_default_commands()
         logger.info("Bot ready to receive updates!")
@@ -107,57 +189,128 @@ class PishroBot:
                 skip_updates=False
             )
         finally:
+            await self.stop_outbox_dispatcher()
+            await write_queue.stop()
+            await report_cache.close()
+            await investor_index.close()
+            await _close_api_client()
             await close_db()
             await self.bot.session.close()
     
-    async def start_webhook(self, path: str = "/webhook", host: str = "localhost", port: int = 8080):
-        """Start bot in webhook mode."""
-        from aiohttp import web
-        
-        logger.info(f"Starting bot in webhook mode on {host}:{port}")
-        
-        # Initialize database
+    async def startup_webhook(self, webhook_url: str):
+        """Prepare webhook mode: database, commands, webhook registration and workers."""
+        # Verify the schema revision (migrations run separately: migrate.py upgrade)
         try:
-            await init_db()
-            logger.info("Database initialized")
+            revision = await check_schema_revision()
+            logger.info(f"Database schema at revision {revision}")
         except Exception as e:
-            logger.error(f"Failed to initialize database: {e}")
+            logger.error(f"Database not ready: {e}")
             raise
         
+        if isinstance(self.storage, SQLStorage):
+            self.storage.start_purge_task(settings.FSM_PURGE_INTERVAL_SECONDS)
+        
         # Set up commands
         await self.setup_default_commands()
         
         # Set webhook URL
-        webhook_url = settings.WEBHOOK_URL or f"http://{host}:{port}{path}"
         try:
-            await self.bot.set_webhook_info(
+            await self.bot.set_webhook(
                 url=webhook_url,
-                allowed_updates=self.dp.resolve_used_update_types()
+                allowed_updates=self.dp.resolve_used_update_types(),
+                secret_token=settings.WEBHOOK_SECRET,
+                max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
             )
             logger.info(f"Webhook set to {webhook_url}")
         except Exception as e:
             logger.error(f"Failed to set webhook: {e}")
         
+        self.update_queue = UpdateQueue(
+            self.dp, self.bot,
+            workers=settings.WEBHOOK_WORKERS,
+            max_size=settings.WEBHOOK_QUEUE_SIZE,
+            enqueue_timeout=settings.WEBHOOK_ENQUEUE_TIMEOUT_SECONDS,
+        )
+        self.update_queue.start()
+        if settings.WRITE_QUEUE_ENABLED:
+            write_queue.start()
+        self.start_outbox_dispatcher()
+        report_cache.start_refresh_task()
+        if settings.INVESTOR_INDEX_ENABLED:
+            investor_index.start_refresh_task()
+        await self.dp.emit_startup(bot=self.bot)
+    
+    async def shutdown_webhook(self):
+        """Drain the update queue and release resources."""
+        if self.update_queue is not None:
+            await self.update_queue.stop()
+            self.update_queue = None
+        await self.stop_outbox_dispatcher()
+        await write_queue.stop()
+        await report_cache.close()
+        await investor_index.close()
+        await self.dp.emit_shutdown(bot=self.bot)
+        await _close_api_client()
+        await close_db()
+        await self.bot.session.close()
+    
+    async def enqueue_webhook_update(self, payload: dict, secret_token: str | None) -> int:
+        """Validate and enqueue one webhook update.
+        
+        Returns:
+            HTTP status for Telegram: 200 when queued, 401 on a bad secret,
+            400 on an invalid payload, 503 when the bot is not ready or the
+            queue is full (Telegram retries later)
+        """
+        if settings.WEBHOOK_SECRET and secret_token != settings.WEBHOOK_SECRET:
+            return 401
+        if self.update_queue is None:
+            return 503
+        
+        try:
+            update = types.Update.model_validate(payload, context={"bot": self.bot})
+        except Exception as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return 400
+        
+        return 200 if await self.update_queue.put(update) else 503
+    
+    async def start_webhook(self, path: str = "/webhook", host: str = "localhost", port: int = 8080):
+        """Start bot in webhook mode."""
+        from aiohttp import web
+        
+        logger.info(f"Starting bot in webhook mode on {host}:{port}")
+        
+        webhook_url = settings.WEBHOOK_URL or f"http://{host}:{port}{path}"
+        await self.startup_webhook(webhook_url)
+        
         # Create web app
         app = web.Application()
         
-        # Webhook handler
+        # Webhook handler: acknowledge as soon as the update is queued
         async def webhook_handler(request: web.Request):
             try:
-                update = types.Update(**await request.json())
-                await self.dp.feed_update(self.bot, update)
-                return web.Response()
-            except Exception as e:
-                logger.error(f"Webhook error: {e}")
-                return web.Response(status=500)
+                payload = await request.json()
+            except Exception:
+                return web.Response(status=400)
+            status = await self.enqueue_webhook_update(
+                payload, request.headers.get(SECRET_TOKEN_HEADER)
+            )
+            return web.Response(status=status)
         
-        app.router.post(path, webhook_handler)
+        app.router.add_post(path, webhook_handler)
         
         # Health check
         async def health_check(request: web.Request):
             return web.json_response({"status": "ok"})
         
-        app.router.get("/health", health_check)
+        app.router.add_get("/health", health_check)
+        
+        # Queue, session usage, investor index, outbox and write queue metrics
+        async def metrics(request: web.Request):
+            return web.json_response(self.metrics())
+        
+        app.router.add_get("/metrics", metrics)
         
         # Run web server
         runner = web.AppRunner(app)
@@ -170,21 +323,24 @@ class PishroBot:
         try:
             # Keep running
             await asyncio.Event().wait()
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             logger.info("Shutting down...")
         finally:
             await runner.cleanup()
-            await close_db()
-            await self.bot.session.close()
-
+            await self.shutdown_webhook()
 
 async def main():
     """Main entry point."""
     bot = PishroBot()
     
-    # Choose mode based on environment
-    # For now, use polling (easier for development)
-    await bot.start_polling()
+    if settings.BOT_MODE == "webhook":
+        await bot.start_webhook(
+            path=settings.WEBHOOK_PATH,
+            host=settings.WEBHOOK_HOST,
+            port=settings.WEBHOOK_PORT
+        )
+    else:
+        await bot.start_polling()
 
 
 if __name__ == "__main__":
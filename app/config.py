@@ -7,7 +7,18 @@ class Settings(BaseSettings):
     
     # Telegram Bot
     BOT_TOKEN: str = Field(..., description="Telegram Bot Token")
+    BOT_MODE: str = Field("polling", description="How the bot receives updates: polling or webhook")
     WEBHOOK_URL: str | None = Field(None, description="Webhook URL for Telegram")
+    WEBHOOK_HOST: str = Field("0.0.0.0", description="Webhook server bind host")
+    WEBHOOK_PORT: int = Field(8080, description="Webhook server port")
+    WEBHOOK_PATH: str = Field("/webhook/telegram", description="Webhook endpoint path")
+    WEBHOOK_SECRET: str | None = Field(None, description="Secret token Telegram sends with each webhook request")
+    WEBHOOK_MAX_CONNECTIONS: int = Field(40, description="Maximum concurrent webhook connections from Telegram")
+    WEBHOOK_WORKERS: int = Field(8, description="Update queue workers (each owns a shard of chats)")
+    WEBHOOK_QUEUE_SIZE: int = Field(1000, description="Maximum queued updates across all workers")
+    WEBHOOK_ENQUEUE_TIMEOUT_SECONDS: float = Field(
+        2.0, description="Seconds to wait for queue space before answering 503"
+    )
     
     # Database
     DATABASE_URL: str = Field(
@@ -15,6 +26,59 @@ class Settings(BaseSettings):
         description="PostgreSQL connection URL for async operations"
     )
     DATABASE_ECHO: bool = Field(False, description="Echo SQL queries")
+    DATABASE_PROFILE: str = Field(
+        "auto", description="Engine profile: auto (by URL backend), sqlite, postgresql or default"
+    )
+    DATABASE_POOL_SIZE: int = Field(10, description="Pooled connections kept open")
+    DATABASE_MAX_OVERFLOW: int = Field(10, description="Extra PostgreSQL connections allowed under load")
+    DATABASE_POOL_TIMEOUT_SECONDS: float = Field(30.0, description="Seconds to wait for a free pooled connection")
+    DATABASE_POOL_RECYCLE_SECONDS: int = Field(1800, description="Reconnect PostgreSQL connections older than this")
+    DATABASE_POOL_PRE_PING: bool = Field(False, description="Ping PostgreSQL connections on every checkout")
+    DATABASE_STATEMENT_CACHE_SIZE: int = Field(1000, description="Compiled SQL statements cached per engine")
+    DATABASE_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+        256, description="asyncpg server-side prepared statements per connection (0 behind PgBouncer)"
+    )
+    SQLITE_JOURNAL_MODE: str = Field("WAL", description="SQLite journal_mode for file databases")
+    SQLITE_SYNCHRONOUS: str = Field("NORMAL", description="SQLite synchronous level")
+    SQLITE_MMAP_SIZE: int = Field(268_435_456, description="Bytes of the SQLite file to memory-map")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(5000, description="Milliseconds a SQLite writer waits for the lock")
+    DATABASE_REPLICA_URLS: str = Field("", description="Comma-separated read replica URLs (empty: primary only)")
+    DATABASE_REPLICA_PIN_SECONDS: float = Field(
+        5.0, description="Seconds a user's reads stay on the primary after they write (replica lag bound)"
+    )
+    
+    # Write queue (serialized, group-committed handler writes; meant for SQLite)
+    WRITE_QUEUE_ENABLED: bool = Field(False, description="Route handler writes through one writer task")
+    WRITE_QUEUE_MAX_BATCH: int = Field(64, description="Write units committed per transaction at most")
+    WRITE_QUEUE_SIZE: int = Field(1000, description="Queued write units before callers wait")
+    
+    # Authenticated-user cache
+    USER_CACHE_TTL_SECONDS: float = Field(60.0, description="Seconds a cached unknown or unverified user stays valid")
+    USER_CACHE_GRANT_TTL_SECONDS: float = Field(5.0, description="Seconds a cached verified user stays valid")
+    USER_CACHE_MAX_SIZE: int = Field(10_000, description="Maximum number of cached Telegram users")
+    
+    # Investor search autocomplete index
+    INVESTOR_INDEX_ENABLED: bool = Field(True, description="Serve investor searches from an in-process index")
+    INVESTOR_INDEX_REFRESH_SECONDS: float = Field(
+        300.0, description="Seconds between full reloads of the investor index"
+    )
+    
+    # FSM storage
+    FSM_STORAGE: str = Field("sql", description="FSM storage backend: memory, sql or redis")
+    FSM_REDIS_URL: str = Field("redis://localhost:6379/0", description="Redis URL when FSM_STORAGE=redis")
+    FSM_STATE_TTL_SECONDS: float = Field(86400.0, description="Seconds before an abandoned FSM flow expires")
+    FSM_PURGE_INTERVAL_SECONDS: float = Field(3600.0, description="Interval between purges of expired SQL FSM states")
+    
+    # Admin analytics
+    ANALYTICS_CACHE_SECONDS: float = Field(60.0, description="Seconds an admin analytics report stays fresh")
+    
+    # Notification outbox
+    OUTBOX_ENABLED: bool = Field(True, description="Run the outbox dispatcher inside the bot process")
+    OUTBOX_GLOBAL_RATE: float = Field(30.0, description="Maximum messages per second across all chats")
+    OUTBOX_PER_CHAT_RATE: float = Field(1.0, description="Maximum messages per second to a single chat")
+    OUTBOX_BATCH_SIZE: int = Field(100, description="Messages claimed from the outbox per poll")
+    OUTBOX_POLL_INTERVAL_SECONDS: float = Field(1.0, description="Seconds between outbox polls when idle")
+    OUTBOX_MAX_ATTEMPTS: int = Field(8, description="Delivery attempts before a message is marked failed")
     
     # Admin/Accountant Telegram IDs
     ADMIN_TELEGRAM_IDS: list[int] = Field(default_factory=list, description="List of admin Telegram IDs")
@@ -24,6 +88,20 @@ class Settings(BaseSettings):
     API_HOST: str = Field("0.0.0.0", description="API host")
     API_PORT: int = Field(8000, description="API port")
     API_URL: str = Field("http://localhost:8000", description="API base URL for Bot to use")
+    API_TIMEOUT_SECONDS: float = Field(10.0, description="Default timeout of the bot's API calls")
+    API_CONNECT_TIMEOUT_SECONDS: float = Field(5.0, description="Timeout for opening a connection to the API")
+    API_SLOW_TIMEOUT_SECONDS: float = Field(
+        30.0, description="Timeout of report-style API calls (stats, details, lists)"
+    )
+    API_MAX_CONNECTIONS: int = Field(20, description="Connections the bot's API client may open")
+    API_MAX_KEEPALIVE_CONNECTIONS: int = Field(10, description="Idle connections kept open for reuse")
+    API_KEEPALIVE_EXPIRY_SECONDS: float = Field(30.0, description="Seconds an idle API connection is kept")
+    API_RETRIES: int = Field(2, description="Retries of idempotent API calls on connection errors and 502-504")
+    API_RETRY_BACKOFF_SECONDS: float = Field(0.2, description="Base delay before the first API retry (jittered, doubling)")
+    API_CACHE_TTL_SECONDS: float = Field(
+        0.0, description="Seconds a cached API GET is served without revalidation (0: always revalidate)"
+    )
+    API_CACHE_MAX_ENTRIES: int = Field(1000, description="API GET responses kept for ETag revalidation")
     
     # Timezone
     TZ: str = Field("UTC", description="Timezone")
@@ -0,0 +1,123 @@
+"""Backend-aware engine configuration.
+
+``DATABASE_PROFILE`` selects how `create_engine` sets up the pool and each
+connection; ``auto`` (the default) picks the profile from the URL's backend.
+
+- ``sqlite``: aiosqlite would otherwise open a new connection (and thread)
+  for every checkout. The profile keeps a small pool of long-lived
+  connections, each configured once with WAL (readers never block the
+  writer), ``synchronous=NORMAL`` (durable at checkpoints, no fsync per
+  commit), a memory map and ``busy_timeout``. The busy timeout turns
+  concurrent writers into a queue on SQLite's single write lock instead of
+  "database is locked" errors. No pre-ping: a local file cannot drop a
+  connection.
+- ``postgresql``: a sized LIFO pool that recycles connections instead of
+  pinging on every checkout, a larger compiled-statement cache and
+  asyncpg's server-side prepared statement cache (set its size to 0 behind
+  PgBouncer in transaction mode).
+- ``default``: SQLAlchemy's defaults, for other backends and comparisons.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app.config import Settings, settings as default_settings
+
+PROFILES = ("auto", "sqlite", "postgresql", "default")
+
+
+def resolve_profile(url: str, profile: str = "auto") -> str:
+    """Concrete profile for ``url`` (``auto`` resolves by backend).
+
+    Raises:
+        ValueError: For an unknown profile name
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE {profile!r}; expected one of {PROFILES}")
+    if profile != "auto":
+        return profile
+    backend = make_url(url).get_backend_name()
+    return backend if backend in ("sqlite", "postgresql") else "default"
+
+
+def is_sqlite_memory(url: str) -> bool:
+    database = make_url(url).database
+    return database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def engine_options(url: str, profile: str, config: Settings = default_settings) -> Dict[str, Any]:
+    """Keyword arguments for `create_async_engine` under ``profile``."""
+    options: Dict[str, Any] = {"echo": config.DATABASE_ECHO}
+
+    if profile == "sqlite":
+        if is_sqlite_memory(url):
+            # One shared connection, or every checkout would see an empty database
+            options.update(poolclass=StaticPool)
+        else:
+            options.update(
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=config.DATABASE_POOL_SIZE,
+                max_overflow=0,
+                pool_timeout=config.DATABASE_POOL_TIMEOUT_SECONDS,
+                pool_pre_ping=False,
+            )
+
+    elif profile == "postgresql":
+        options.update(
+            pool_size=config.DATABASE_POOL_SIZE,
+            max_overflow=config.DATABASE_MAX_OVERFLOW,
+            pool_timeout=config.DATABASE_POOL_TIMEOUT_SECONDS,
+            pool_recycle=config.DATABASE_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=config.DATABASE_POOL_PRE_PING,
+            pool_use_lifo=True,
+            query_cache_size=config.DATABASE_STATEMENT_CACHE_SIZE,
+        )
+        if make_url(url).get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "prepared_statement_cache_size": config.DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": config.DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+                "server_settings": {
+                    "application_name": "pishro_bot",
+                    # JIT compilation only slows down short OLTP queries
+                    "jit": "off",
+                },
+            }
+
+    return options
+
+
+def install_sqlite_pragmas(engine: AsyncEngine, config: Settings = default_settings):
+    """Configure every new SQLite connection once, when the pool opens it."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {int(config.SQLITE_MMAP_SIZE)}",
+    ]
+    if not is_sqlite_memory(str(engine.url)):
+        pragmas.insert(0, f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_engine(url: str = None, profile: str = None,
+                  config: Settings = default_settings, **overrides) -> AsyncEngine:
+    """Create the async engine for ``url`` under a profile (both default to settings).
+
+    ``overrides`` are passed to `create_async_engine` after the profile's options.
+    """
+    url = url or config.DATABASE_URL
+    profile = resolve_profile(url, profile or config.DATABASE_PROFILE)
+
+    engine = create_async_engine(url, **{**engine_options(url, profile, config), **overrides})
+    if profile == "sqlite":
+        install_sqlite_pragmas(engine, config)
+    return engine
@@ -0,0 +1,90 @@
+"""Per-update sessions that are only created when a handler uses them.
+
+Many updates never touch the database: menu navigation, help pages, date
+picker redraws, and cached `AuthMiddleware` lookups. `LazySession` stands in
+for the update's `AsyncSession` and creates the real session on first
+attribute access. An update that never uses it costs no session
+construction or teardown and no pool checkout.
+
+`session_usage` counts, per update, whether a connection was acquired (a
+transaction began on the session) and whether the session was created at all.
+"""
+
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+CONNECTED_KEY = "connection_acquired"
+
+
+class LazySession:
+    """Stand-in for an `AsyncSession`, created by ``session_factory`` on first use.
+
+    Attribute access is forwarded to the real session. ``rollback`` and
+    ``close`` do nothing when the session was never created.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, **session_kwargs):
+        self._session_factory = session_factory
+        self._session_kwargs = session_kwargs
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def created(self) -> bool:
+        return self._session is not None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the session acquired a connection (began a transaction)."""
+        return self._session is not None and self._session.sync_session.info.get(CONNECTED_KEY, False)
+
+    def _get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_factory(**self._session_kwargs)
+        return self._session
+
+    def __getattr__(self, name: str):
+        return getattr(self._get(), name)
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class SessionUsage:
+    """How many updates needed a session / a connection."""
+
+    def __init__(self):
+        self.updates = 0
+        self.sessions_created = 0
+        self.connections_acquired = 0
+
+    def record(self, session: LazySession):
+        """Count one finished update that was given ``session``."""
+        self.updates += 1
+        self.sessions_created += session.created
+        self.connections_acquired += session.connected
+
+    def stats(self) -> dict:
+        """Updates with and without a connection since startup."""
+        return {
+            "updates": self.updates,
+            "with_connection": self.connections_acquired,
+            "without_connection": self.updates - self.connections_acquired,
+            "sessions_created": self.sessions_created,
+            "connection_ratio": self.connections_acquired / self.updates if self.updates else 0.0,
+        }
+
+
+session_usage = SessionUsage()
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_connected(session: Session, transaction, connection):
+    session.info[CONNECTED_KEY] = True
@@ -0,0 +1,85 @@
+"""Schema migrations (Alembic) and the startup revision check.
+
+The schema is owned by the revisions in ``migrations/versions``; nothing
+creates tables at startup any more. Deployments run ``python migrate.py
+upgrade`` before starting the bot or API, and startup only compares the
+database's ``alembic_version`` with the head revision (one primary-key read).
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.session import engine as default_engine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent.parent / "alembic.ini"
+
+
+class SchemaRevisionError(RuntimeError):
+    """The database is not at the revision this code expects."""
+
+
+def alembic_config(url: str = None) -> Config:
+    """Alembic config for this project (URL defaults to ``settings.DATABASE_URL``)."""
+    config = Config(str(ALEMBIC_INI))
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def head_revision() -> str:
+    """Latest revision in ``migrations/versions``."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(engine: AsyncEngine = default_engine) -> Optional[str]:
+    """Revision stored in the database, None if it has never been migrated."""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except DBAPIError:
+            return None
+        return result.scalar()
+
+
+async def check_schema_revision(engine: AsyncEngine = default_engine) -> str:
+    """Fail fast unless the database is at the head revision.
+
+    Raises:
+        SchemaRevisionError: If the database is behind, ahead or unversioned
+    """
+    head = head_revision()
+    current = await current_revision(engine)
+    if current != head:
+        raise SchemaRevisionError(
+            f"Database schema is at revision {current or 'none'}, expected {head}. "
+            f"Run `python migrate.py upgrade` first."
+        )
+    return current
+
+
+async def run_command(name: str, *args, engine: AsyncEngine = default_engine, **kwargs):
+    """Run an Alembic command (``upgrade``, ``downgrade``, ``stamp`` ...) on ``engine``.
+
+    The command runs on one of the engine's connections, in one transaction.
+    """
+    config = alembic_config()
+    config.attributes["configure_logger"] = False
+
+    def run(sync_connection):
+        config.attributes["connection"] = sync_connection
+        getattr(command, name)(config, *args, **kwargs)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(run)
+
+
+async def upgrade_database(revision: str = "head", engine: AsyncEngine = default_engine):
+    """Migrate the database up to ``revision``."""
+    await run_command("upgrade", revision, engine=engine)
@@ -0,0 +1,96 @@
+"""Primary / read-replica routing for ORM sessions.
+
+`RoutingSession` sends a query to a replica only when it is marked as a
+replica read (``execution_options=REPLICA_READ``) and the session is not
+pinned to the primary. Everything else (writes, flushes, unmarked reads)
+goes to the primary. Without replicas every query goes to the primary.
+
+Read-your-writes:
+
+- a session is pinned to the primary as soon as it flushes or executes DML,
+  or when `pin_to_primary` is called before a read-modify-write
+- the session's actor (the Telegram user of the update, see `set_actor`)
+  stays pinned for ``pin_seconds`` after a write, so their next updates do
+  not read a replica that has not caught up yet
+"""
+
+import random
+import time
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+REPLICA_READ = {"replica": True}
+
+PINNED_KEY = "pinned_to_primary"
+ACTOR_KEY = "actor"
+
+# Actor -> time until which their sessions read from the primary
+_recent_writers: Dict[int, float] = {}
+_RECENT_WRITERS_PRUNE_SIZE = 10_000
+
+
+class RoutingSession(Session):
+    """Session that can serve marked reads from read replicas."""
+
+    def __init__(self, *args, replicas: Sequence[Engine] = (), pin_seconds: float = 5.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self.pin_seconds = pin_seconds
+
+    @property
+    def pinned(self) -> bool:
+        """Whether reads must go to the primary (this session or its actor wrote)."""
+        if self.info.get(PINNED_KEY):
+            return True
+        actor = self.info.get(ACTOR_KEY)
+        return actor is not None and _recent_writers.get(actor, 0.0) > time.monotonic()
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw):
+        if clause is not None and clause.is_dml:
+            _mark_written(self)
+        elif replica and self.replicas and not self.pinned:
+            return random.choice(self.replicas)
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def _mark_written(session: Session):
+    session.info[PINNED_KEY] = True
+    actor = session.info.get(ACTOR_KEY)
+    if actor is not None and getattr(session, "replicas", None):
+        now = time.monotonic()
+        if len(_recent_writers) >= _RECENT_WRITERS_PRUNE_SIZE:
+            for expired in [key for key, until in _recent_writers.items() if until <= now]:
+                del _recent_writers[expired]
+        _recent_writers[actor] = now + session.pin_seconds
+
+
+def _sync_session(session) -> Session:
+    return getattr(session, "sync_session", session)
+
+
+def set_actor(session, actor_id: Optional[int]):
+    """Attribute ``session``'s writes to ``actor_id`` (e.g. the Telegram user ID)."""
+    _sync_session(session).info[ACTOR_KEY] = actor_id
+
+
+def pin_to_primary(session):
+    """Send the rest of ``session`` to the primary, as if it had written.
+
+    Call before reading rows that are about to be modified.
+    """
+    _mark_written(_sync_session(session))
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _route_replica_reads(orm_execute_state: ORMExecuteState):
+    """Hand the ``replica`` execution option to `RoutingSession.get_bind`."""
+    if orm_execute_state.is_select and orm_execute_state.execution_options.get("replica"):
+        orm_execute_state.bind_arguments["replica"] = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session: Session, flush_context):
+    _mark_written(session)
@@ -1,24 +1,28 @@
 from sqlalchemy.ext.asyncio import (
-    create_async_engine,
     async_sessionmaker,
     AsyncSession,
 )
 from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.database.engine import create_engine
+from app.database.routing import RoutingSession
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO,
-    pool_size=20,
-    max_overflow=0,
-    pool_pre_ping=True,
-)
+# Create async engine (pool and connection setup per DATABASE_PROFILE)
+engine = create_engine()
+
+# Read replicas (optional); only reads marked REPLICA_READ use them
+replica_engines = [
+    create_engine(url.strip())
+    for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=[replica.sync_engine for replica in replica_engines],
+    pin_seconds=settings.DATABASE_REPLICA_PIN_SECONDS,
     expire_on_commit=False,
 )
 
@@ -32,12 +36,8 @@ async def get_db_session() -> AsyncSession:
         yield session
 
 
-async def init_db():
-    """Initialize the database (create all tables)."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-
 async def close_db():
-    """Close the database engine."""
+    """Close the database engines."""
     await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
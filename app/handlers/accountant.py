@@ -4,6 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import UserRole, TransactionType
 from app.services.repositories import UserRepository, InvestmentRepository
 from app.services.portfolio_service import PortfolioService
+from app.services.investor_index import investor_index
+from app.services.user_cache import CachedUser
+from app.services.write_queue import write_queue
 from app.states.forms import TransactionFSM, SearchFSM
 from app.utils.logger import logger, log_user_action
 from app.utils.formatters import (
@@ -16,17 +19,15 @@ from app.keyboards.inline import (
     get_jalali_date_picker
 )
 from datetime import date, datetime
+from typing import Optional
 import jdatetime
 
 
 router = Router()
 
 
-async def require_accountant(user_id: int, session: AsyncSession) -> bool:
+def require_accountant(user: Optional[CachedUser]) -> bool:
     """Check if user is accountant or admin."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(user_id)
-    
     if not user or not user.is_verified:
         return False
     
@@ -36,9 +37,9 @@ async def require_accountant(user_id: int, session: AsyncSession) -> bool:
 @router.callback_query(F.data == "record_transaction")
 async def record_transaction_start(callback: types.CallbackQuery, 
                                    state: FSMContext,
-                                   session: AsyncSession):
+                                   user: Optional[CachedUser]):
     """Start transaction recording flow."""
-    if not await require_accountant(callback.from_user.id, session):
+    if not require_accountant(user):
         await callback.answer("🚫 دسترسی رد شد", show_alert=True)
         return
     
@@ -64,17 +65,8 @@ async def process_investor_search(message: types.Message,
         await message.answer("❌ لطفا نام یا شماره تماس حداقل 2 کاراکتری وارد کنید.")
         return
     
-    user_repo = UserRepository(session)
-    
-    # Search for investors
-    results = await user_repo.search_by_name_or_phone(query)
-    
-    # Filter only investors
-    investors = [
-        (u.id, u.name, u.phone_number)
-        for u in results
-        if u.role == UserRole.INVESTOR
-    ]
+    # Served from memory; the session is only used if the index misses
+    investors = await investor_index.search(session, query)
     
     if not investors:
         await message.answer(
@@ -113,13 +105,12 @@ async def select_investor(callback: types.CallbackQuery,
     
     # Get investment overview
     investment_repo = InvestmentRepository(session)
-    investments = await investment_repo.get_by_user(investor_id)
+    investment = await investment_repo.get_first_by_user(investor_id)
     
-    if not investments:
+    if not investment:
         await callback.answer("❌ این کاربر هیچ سرمایه‌گذاری ندارد", show_alert=True)
         return
     
-    investment = investments[0]
     portfolio_service = PortfolioService(session)
     summary = await portfolio_service.get_portfolio_summary(investment.id)
     
@@ -196,7 +187,7 @@ async def process_amount(message: types.Message,
     
     # Create date picker
     today = datetime.now().date()
-    jalali_today = jdatetime.date.fromgregorian(today)
+    jalali_today = jdatetime.date.fromgregorian(date=today)
     
     await message.answer(
         "📅 <b>تاریخ تراکنش را انتخاب کنید:</b>",
@@ -332,25 +323,25 @@ async def show_confirmation(message_or_update, state: FSMContext):
 @router.callback_query(F.data == "confirm_transaction", TransactionFSM.waiting_confirmation)
 async def save_transaction(callback: types.CallbackQuery,
                           state: FSMContext,
-                          session: AsyncSession):
+                          session: AsyncSession,
+                          user: Optional[CachedUser]):
     """Save transaction to database."""
     data = await state.get_data()
     
-    portfolio_service = PortfolioService(session)
-    
     try:
         txn_type = TransactionType(data["transaction_type"])
         
-        transaction = await portfolio_service.record_transaction(
-            investment_id=data["selected_investment_id"],
-            txn_type=txn_type,
-            amount=data["amount"],
-            transaction_date=data["transaction_date"],
-            recorded_by=callback.from_user.id,
-            description=data.get("description")
-        )
+        async def record(write_session: AsyncSession):
+            return await PortfolioService(write_session).record_transaction(
+                investment_id=data["selected_investment_id"],
+                txn_type=txn_type,
+                amount=data["amount"],
+                transaction_date=data["transaction_date"],
+                recorded_by=user.id,
+                description=data.get("description")
+            )
         
-        await session.commit()
+        transaction = await write_queue.run(session, record)
         
         await callback.message.edit_text(
             f"✅ <b>تراکنش ثبت شدبته‌ای</b>\n\n"
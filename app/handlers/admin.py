@@ -1,31 +1,43 @@
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.models import UserRole
+from app.models.models import UserRole, ContractType
 from app.services.repositories import UserRepository, InvestmentRepository
 from app.services.portfolio_service import PortfolioService
-from app.states.forms import ValuationFSM, SearchFSM
+from app.services.analytics_cache import report_cache
+from app.services.investor_index import investor_index
+from app.services.user_cache import CachedUser
+from app.services.write_queue import write_queue
+from app.states.forms import ValuationFSM, BulkValuationFSM, SearchFSM
 from app.utils.logger import logger, log_user_action
 from app.utils.formatters import (
-    format_currency, format_jalali_date, parse_currency_input
+    format_currency, format_jalali_date, parse_currency_input, parse_valuation_csv
 )
 from app.keyboards.inline import (
     get_admin_main_menu, get_investor_list_search,
     get_valuation_update_mode_menu, get_back_menu, get_jalali_date_picker,
-    get_admin_user_management_menu, get_role_selection_menu
+    get_admin_user_management_menu, get_role_selection_menu,
+    get_bulk_valuation_mode_menu, get_contract_type_filter_menu, get_confirm_cancel_menu
 )
 from datetime import date, datetime
+from typing import Optional
 import jdatetime
 
 
 router = Router()
 
+# Largest CSV accepted for bulk valuation uploads
+MAX_CSV_BYTES = 5 * 1024 * 1024
 
-async def require_admin(user_id: int, session: AsyncSession) -> bool:
+CONTRACT_TYPE_LABELS = {
+    None: "همه قراردادهای فعال",
+    ContractType.VARIABLE_HOLDING.value: "نگهداری متغیر",
+    ContractType.FIXED_RATE.value: "سود ثابت",
+}
+
+
+def require_admin(user: Optional[CachedUser]) -> bool:
     """Check if user is admin."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(user_id)
-    
     if not user or not user.is_verified:
         return False
     
@@ -35,9 +47,9 @@ async def require_admin(user_id: int, session: AsyncSession) -> bool:
 @router.callback_query(F.data == "admin_update_valuation")
 async def admin_update_valuation_start(callback: types.CallbackQuery,
                                        state: FSMContext,
-                                       session: AsyncSession):
+                                       user: Optional[CachedUser]):
     """Start portfolio valuation update flow."""
-    if not await require_admin(callback.from_user.id, session):
+    if not require_admin(user):
         await callback.answer("🚫 فقط ادمین‌ها می‌تونند این کار رو انجام دهند", show_alert=True)
         return
     
@@ -63,15 +75,8 @@ async def process_valuation_investor_search(message: types.Message,
         await message.answer("❌ لطفا نام یا شماره تماس حداقل 2 کاراکتری وارد کنید.")
         return
     
-    user_repo = UserRepository(session)
-    results = await user_repo.search_by_name_or_phone(query)
-    
-    # Filter only investors
-    investors = [
-        (u.id, u.name, u.phone_number)
-        for u in results
-        if u.role == UserRole.INVESTOR
-    ]
+    # Served from memory; the session is only used if the index misses
+    investors = await investor_index.search(session, query)
     
     if not investors:
         await message.answer(
@@ -108,13 +113,12 @@ async def select_investor_for_valuation(callback: types.CallbackQuery,
     
     # Get investment
     investment_repo = InvestmentRepository(session)
-    investments = await investment_repo.get_by_user(investor_id)
+    investment = await investment_repo.get_first_by_user(investor_id)
     
-    if not investments:
+    if not investment:
         await callback.answer("❌ این کاربر هیچ سرمایه‌گذاری ندارد", show_alert=True)
         return
     
-    investment = investments[0]
     portfolio_service = PortfolioService(session)
     summary = await portfolio_service.get_portfolio_summary(investment.id)
     
@@ -308,24 +312,24 @@ async def show_valuation_confirmation(message_or_update, state: FSMContext):
 @router.callback_query(F.data == "confirm_valuation", ValuationFSM.waiting_confirmation)
 async def save_valuation(callback: types.CallbackQuery,
                         state: FSMContext,
-                        session: AsyncSession):
+                        session: AsyncSession,
+                        user: Optional[CachedUser]):
     """Save valuation to database."""
     data = await state.get_data()
     
-    portfolio_service = PortfolioService(session)
-    
     try:
         today = date.today()
         
-        valuation = await portfolio_service.update_valuation(
-            investment_id=data["selected_investment_id"],
-            new_value=data["new_value"],
-            valuation_date=today,
-            updated_by=callback.from_user.id,
-            reason=data.get("reason")
-        )
+        async def update(write_session: AsyncSession):
+            return await PortfolioService(write_session).update_valuation(
+                investment_id=data["selected_investment_id"],
+                new_value=data["new_value"],
+                valuation_date=today,
+                updated_by=user.id,
+                reason=data.get("reason")
+            )
         
-        await session.commit()
+        valuation = await write_queue.run(session, update)
         
         await callback.message.edit_text(
             f"✅ <b>دارایی بروزرسانی شد</b>\n\n"
@@ -361,13 +365,246 @@ async def save_valuation(callback: types.CallbackQuery,
     await callback.answer()
 
 
+# ============== Bulk Valuation ==============
+
+@router.callback_query(F.data == "admin_bulk_valuation")
+async def admin_bulk_valuation_start(callback: types.CallbackQuery,
+                                     state: FSMContext,
+                                     user: Optional[CachedUser]):
+    """Start bulk valuation flow."""
+    if not require_admin(user):
+        await callback.answer("🚫 فقط ادمین‌ها می‌تونند این کار رو انجام دهند", show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        "🧮 <b>بروزرسانی گروهی دارایی</b>\n\n"
+        "روش بروزرسانی را انتخاب کنید:",
+        parse_mode="HTML",
+        reply_markup=get_bulk_valuation_mode_menu()
+    )
+    
+    await state.set_state(BulkValuationFSM.waiting_mode)
+    await callback.answer()
+
+
+@router.callback_query(BulkValuationFSM.waiting_mode, F.data == "bulk_valuation_percentage")
+async def bulk_valuation_percentage_mode(callback: types.CallbackQuery,
+                                         state: FSMContext):
+    """Percentage mode: choose which contracts to revalue."""
+    await callback.message.edit_text(
+        "📋 <b>کدام قراردادها بروزرسانی شوند؟</b>",
+        parse_mode="HTML",
+        reply_markup=get_contract_type_filter_menu()
+    )
+    
+    await state.update_data(update_mode="percentage")
+    await state.set_state(BulkValuationFSM.waiting_contract_type)
+    await callback.answer()
+
+
+@router.callback_query(BulkValuationFSM.waiting_contract_type, F.data.startswith("bulk_contract_"))
+async def bulk_valuation_contract_type(callback: types.CallbackQuery,
+                                       state: FSMContext):
+    """Contract type selected; ask for the percentage."""
+    contract_type = callback.data[len("bulk_contract_"):]
+    contract_type = None if contract_type == "all" else contract_type
+    
+    await callback.message.edit_text(
+        f"📊 <b>درصد تغییر را وارد کنید</b>\n\n"
+        f"قراردادها: {CONTRACT_TYPE_LABELS[contract_type]}\n"
+        f"مثال: 3.2 برای افزایش 3.2% یا -1.5 برای کاهش",
+        parse_mode="HTML",
+        reply_markup=get_back_menu("cancel_action")
+    )
+    
+    await state.update_data(contract_type=contract_type)
+    await state.set_state(BulkValuationFSM.waiting_percentage_input)
+    await callback.answer()
+
+
+@router.message(BulkValuationFSM.waiting_percentage_input)
+async def process_bulk_percentage(message: types.Message,
+                                  state: FSMContext,
+                                  session: AsyncSession):
+    """Process bulk percentage input."""
+    try:
+        percentage = float((message.text or "").strip().replace("%", ""))
+    except ValueError:
+        await message.answer("❌ درصد نامعتبر است. لطفا عدد اعشاری وارد کنید (مثال: 3.2)")
+        return
+    
+    if percentage <= -100 or percentage > 1000:
+        await message.answer("❌ درصد بیرون محدوده است (بیشتر از -100، حداکثر 1000)")
+        return
+    
+    data = await state.get_data()
+    contract_type = data.get("contract_type")
+    count = await InvestmentRepository(session).count_active(
+        ContractType(contract_type) if contract_type else None
+    )
+    if count == 0:
+        await message.answer("❌ هیچ قرارداد فعالی برای بروزرسانی وجود ندارد.")
+        await state.clear()
+        return
+    
+    await state.update_data(percentage=percentage, investment_count=count)
+    await message.answer(
+        f"📋 <b>بررسی بروزرسانی گروهی</b>\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"<b>قراردادها:</b> {CONTRACT_TYPE_LABELS[contract_type]}\n"
+        f"<b>تعداد:</b> {count:,}\n"
+        f"<b>تغییر:</b> {percentage:+.2f}%\n"
+        f"<b>تاریخ:</b> {format_jalali_date(date.today())}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"آیا با این بروزرسانی موافق هستید؟",
+        parse_mode="HTML",
+        reply_markup=get_confirm_cancel_menu("confirm_bulk_valuation", "cancel_action")
+    )
+    await state.set_state(BulkValuationFSM.waiting_confirmation)
+
+
+@router.callback_query(BulkValuationFSM.waiting_mode, F.data == "bulk_valuation_csv")
+async def bulk_valuation_csv_mode(callback: types.CallbackQuery,
+                                  state: FSMContext):
+    """CSV mode: ask for the file."""
+    await callback.message.edit_text(
+        "📄 <b>فایل CSV را ارسال کنید</b>\n\n"
+        "هر سطر: <code>investment_id,new_value</code>\n"
+        "سطر عنوان اختیاری است.",
+        parse_mode="HTML",
+        reply_markup=get_back_menu("cancel_action")
+    )
+    
+    await state.update_data(update_mode="csv")
+    await state.set_state(BulkValuationFSM.waiting_csv_upload)
+    await callback.answer()
+
+
+async def download_valuation_csv(message: types.Message, file_id: str):
+    """Download and parse an uploaded valuation CSV (raises ValueError if invalid)."""
+    buffer = await message.bot.download(file_id)
+    try:
+        return parse_valuation_csv(buffer.read().decode("utf-8"))
+    except UnicodeDecodeError:
+        raise ValueError("File is not UTF-8 text")
+
+
+@router.message(BulkValuationFSM.waiting_csv_upload, F.document)
+async def process_bulk_csv(message: types.Message,
+                           state: FSMContext):
+    """Validate the uploaded CSV and show a confirmation."""
+    document = message.document
+    if document.file_size and document.file_size > MAX_CSV_BYTES:
+        await message.answer("❌ حجم فایل بیش از حد مجاز (5 مگابایت) است.")
+        return
+    
+    try:
+        new_values = await download_valuation_csv(message, document.file_id)
+    except ValueError as e:
+        await message.answer(f"❌ فایل نامعتبر است:\n<code>{e}</code>", parse_mode="HTML")
+        return
+    
+    if not new_values:
+        await message.answer("❌ فایل هیچ سطری ندارد.")
+        return
+    
+    # Only the file ID is kept in FSM storage; the file is re-read on confirmation
+    await state.update_data(csv_file_id=document.file_id, investment_count=len(new_values))
+    await message.answer(
+        f"📋 <b>بررسی بروزرسانی گروهی</b>\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"<b>فایل:</b> {document.file_name or 'CSV'}\n"
+        f"<b>تعداد سطرها:</b> {len(new_values):,}\n"
+        f"<b>جمع ارزش‌های جدید:</b> {format_currency(sum(new_values.values()))}\n"
+        f"<b>تاریخ:</b> {format_jalali_date(date.today())}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"آیا با این بروزرسانی موافق هستید؟",
+        parse_mode="HTML",
+        reply_markup=get_confirm_cancel_menu("confirm_bulk_valuation", "cancel_action")
+    )
+    await state.set_state(BulkValuationFSM.waiting_confirmation)
+
+
+@router.message(BulkValuationFSM.waiting_csv_upload)
+async def process_bulk_csv_missing(message: types.Message):
+    """Anything but a document while waiting for the CSV."""
+    await message.answer("❌ لطفا فایل CSV را به صورت سند (Document) ارسال کنید.")
+
+
+@router.callback_query(F.data == "confirm_bulk_valuation", BulkValuationFSM.waiting_confirmation)
+async def save_bulk_valuation(callback: types.CallbackQuery,
+                              state: FSMContext,
+                              session: AsyncSession,
+                              user: Optional[CachedUser]):
+    """Apply the bulk valuation in one transaction."""
+    data = await state.get_data()
+    
+    try:
+        if data["update_mode"] == "percentage":
+            contract_type = data.get("contract_type")
+            options = {
+                "percentage": data["percentage"],
+                "contract_type": ContractType(contract_type) if contract_type else None,
+            }
+        else:
+            # Download before queueing, so the writer never waits on Telegram
+            options = {"new_values": await download_valuation_csv(callback.message, data["csv_file_id"])}
+        
+        async def apply(write_session: AsyncSession):
+            return await PortfolioService(write_session).bulk_update_valuations(
+                date.today(), user.id, **options
+            )
+        
+        result = await write_queue.run(session, apply)
+        
+        result_text = (
+            f"✅ <b>بروزرسانی گروهی انجام شد</b>\n\n"
+            f"تعداد: {result['count']:,}\n"
+            f"ارزش قبلی کل: {format_currency(result['old_total'])}\n"
+            f"ارزش جدید کل: {format_currency(result['new_total'])}\n"
+            f"اعلان‌های در صف ارسال: {result['notified']:,}"
+        )
+        if result["missing_investment_ids"]:
+            missing = ", ".join(str(i) for i in result["missing_investment_ids"][:20])
+            result_text += f"\n\n⚠️ شناسه‌های ناموجود ({len(result['missing_investment_ids'])}): {missing}"
+        
+        await callback.message.edit_text(
+            result_text,
+            parse_mode="HTML",
+            reply_markup=get_back_menu("back_to_menu")
+        )
+        
+        log_user_action(
+            callback.from_user.id,
+            "bulk_valuation_updated",
+            {
+                "mode": data["update_mode"],
+                "count": result["count"],
+                "percentage": data.get("percentage"),
+                "contract_type": data.get("contract_type"),
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Failed to save bulk valuation: {e}")
+        await session.rollback()
+        await callback.message.edit_text(
+            "❌ خطا در بروزرسانی گروهی دارایی.\n\n"
+            "هیچ تغییری ثبت نشد. لطفا بعدا دوباره تلاش کنید.",
+            reply_markup=get_back_menu("back_to_menu")
+        )
+    
+    await state.clear()
+    await callback.answer()
+
+
 # ============== User Management ==============
 
 @router.callback_query(F.data == "admin_manage_users")
 async def admin_manage_users(callback: types.CallbackQuery,
-                            session: AsyncSession):
+                            user: Optional[CachedUser]):
     """Admin user management menu."""
-    if not await require_admin(callback.from_user.id, session):
+    if not require_admin(user):
         await callback.answer("🚫 دسترسی رد شد", show_alert=True)
         return
     
@@ -428,27 +665,43 @@ async def admin_list_users(callback: types.CallbackQuery,
 
 @router.callback_query(F.data == "admin_reports")
 async def admin_reports(callback: types.CallbackQuery,
-                       session: AsyncSession):
-    """Admin reports dashboard."""
-    if not await require_admin(callback.from_user.id, session):
+                       user: Optional[CachedUser]):
+    """Admin reports dashboard (served from the analytics report cache)."""
+    if not require_admin(user):
         await callback.answer("🚫 دسترسی رد شد", show_alert=True)
         return
     
-    user_repo = UserRepository(session)
-    
-    # Get counts
-    investors = await user_repo.list_by_role(UserRole.INVESTOR)
-    total_investors = len(investors)
-    verified_investors = len([u for u in investors if u.is_verified])
+    report = await report_cache.get()
+    users = report["users"]
     
     reports_text = (
         f"📈 <b>گزارشات سیستم</b>\n"
         f"━━━━━━━━━━━━━━━━━━━━━━\n"
-        f"👥 کل سرمایه‌گذاران: {total_investors}\n"
-        f"✅ تایید‌شده: {verified_investors}\n"
-        f"❌ تایید نشده: {total_investors - verified_investors}\n"
-        f"━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        f"<i>گزارش‌های بیشتر به‌زودی اضافه می‌شوند...</i>"
+        f"👥 کل سرمایه‌گذاران: {users['investors']:,}\n"
+        f"✅ تایید‌شده: {users['verified_investors']:,}\n"
+        f"❌ تایید نشده: {users['unverified_investors']:,}\n"
+        f"💼 حسابداران: {users['accountants']:,} | 👨‍💼 ادمین‌ها: {users['admins']:,}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"<b>دارایی تحت مدیریت (قراردادهای فعال):</b>\n"
+    )
+    for contract_type, aum in report["aum_by_contract_type"].items():
+        reports_text += (
+            f"• {CONTRACT_TYPE_LABELS.get(contract_type.value, contract_type.value)} "
+            f"({aum['investment_count']:,}): {format_currency(aum['current_value'])}\n"
+        )
+    reports_text += (
+        f"💰 سرمایه واردشده: {format_currency(report['total_invested_capital'])}\n"
+        f"📊 ارزش کل: {format_currency(report['total_portfolio_value'])}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"<b>خالص جریان وجوه ماهانه:</b>\n"
+    )
+    for month in report["monthly_flows"]:
+        reports_text += f"• {month['label']}: {format_currency(month['net'])}\n"
+    reports_text += (
+        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"🧾 تراکنش‌های ۳۰ روز اخیر: {report['transactions_30d']:,}\n"
+        f"🔥 سرمایه‌گذاران فعال ۷ روز اخیر: {report['active_investors_7d']:,}\n\n"
+        f"<i>بروزرسانی: {report['generated_at'].strftime('%H:%M')}</i>"
     )
     
     await callback.message.edit_text(
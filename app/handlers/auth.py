@@ -4,6 +4,8 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import User, UserRole
 from app.services.repositories import UserRepository
+from app.services.user_cache import CachedUser
+from app.services.write_queue import write_queue
 from app.utils.logger import logger, log_user_action, AuthenticationError
 from app.utils.formatters import format_phone_number, validate_phone_number_format
 from app.keyboards.inline import get_main_menu
@@ -13,6 +15,7 @@ from app.keyboards.advanced import (
 )
 from app.states.forms import AuthFSM
 from datetime import date
+from typing import Optional
 import re
 
 
@@ -46,15 +49,12 @@ async def authenticate_user(user: User) -> bool:
 
 
 @router.message(F.command("start"))
-async def cmd_start(message: types.Message, state: FSMContext, session: AsyncSession):
+async def cmd_start(message: types.Message, state: FSMContext, user: Optional[CachedUser]):
     """Handle /start command - entry point for bot."""
     telegram_id = message.from_user.id
-    user_repo = UserRepository(session)
     first_name = message.from_user.first_name or "کاربر"
     
     # Check if user exists and is verified
-    user = await user_repo.get_by_telegram_id(telegram_id)
-    
     if user and user.is_verified:
         # User already verified, show personalized menu
         welcome_message = f"""
@@ -188,9 +188,10 @@ async def receive_contact_initial(message: types.Message, state: FSMContext, ses
         return
     
     # Link telegram_id to existing phone registration
-    existing_user.telegram_id = telegram_id
-    existing_user.is_verified = True
-    await session.commit()
+    await write_queue.run(
+        session,
+        lambda write_session: UserRepository(write_session).link_telegram_account(existing_user.id, telegram_id)
+    )
     
     # Show success
     welcome_message = f"""
@@ -291,12 +292,11 @@ async def receive_contact_initial(message: types.Message, state: FSMContext, ses
     # Verify the user
     user = existing_user
     if not user.is_verified:
-        # Update Telegram ID if needed
-        user.telegram_id = telegram_id
-        
-        # Verify user
-        await user_repo.verify_user(user.id)
-        await session.commit()
+        # Link the Telegram ID and verify the user
+        await write_queue.run(
+            session,
+            lambda write_session: UserRepository(write_session).link_telegram_account(user.id, telegram_id)
+        )
         
         success_msg = (
             f"✅ خوش آمدید {user.name}!\n\n"
@@ -359,11 +359,12 @@ async def process_phone_verify(message: types.Message, state: FSMContext, sessio
         await message.answer("❌ این شماره در سیستم ثبت نشده است.")
         return
     
-    if user.telegram_id != message.from_user.id:
-        user.telegram_id = message.from_user.id
-    
-    await user_repo.verify_user(user.id)
-    await session.commit()
+    await write_queue.run(
+        session,
+        lambda write_session: UserRepository(write_session).link_telegram_account(
+            user.id, message.from_user.id
+        )
+    )
     
     await message.answer(f"✅ شما با نام {user.name} تایید شدید.")
     await message.answer(
@@ -2,22 +2,22 @@ from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import UserRole
-from app.services.repositories import UserRepository, InvestmentRepository
+from app.services.repositories import InvestmentRepository
 from app.services.portfolio_service import PortfolioService
+from app.services.user_cache import CachedUser
 from app.utils.logger import logger, log_user_action
-from app.utils.formatters import format_currency, format_jalali_date
+from app.utils.formatters import format_currency, format_jalali_date, format_jalali_dates
 from app.keyboards.inline import get_investor_main_menu, get_pagination_menu, get_back_menu
+from app.keyboards.advanced import get_pagination_keyboard
 from datetime import date
+from typing import Optional
 
 
 router = Router()
 
 
-async def require_investor(message: types.Message, session: AsyncSession) -> bool:
+async def require_investor(message: types.Message, user: Optional[CachedUser]) -> bool:
     """Check if user is investor."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(message.from_user.id)
-    
     if not user or not user.is_verified:
         await message.answer("🚫 شما دسترسی ندارید")
         return False
@@ -30,11 +30,9 @@ async def require_investor(message: types.Message, session: AsyncSession) -> boo
 
 
 @router.callback_query(F.data == "investor_portfolio_status")
-async def investor_portfolio_status(callback: types.CallbackQuery, session: AsyncSession):
+async def investor_portfolio_status(callback: types.CallbackQuery, session: AsyncSession,
+                                    user: Optional[CachedUser]):
     """Display investor's portfolio status."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(callback.from_user.id)
-    
     if not user or not user.is_verified:
         await callback.answer("🚫 شما دسترسی ندارید", show_alert=True)
         return
@@ -45,18 +43,15 @@ async def investor_portfolio_status(callback: types.CallbackQuery, session: Asyn
     
     # Get investments for user
     investment_repo = InvestmentRepository(session)
-    investments = await investment_repo.get_by_user(user.id)
+    investment = await investment_repo.get_first_by_user(user.id)
     
-    if not investments:
+    if not investment:
         await callback.message.edit_text(
             "❌ هیچ سرمایه‌گذاری برای شما ثبت نشده است."
         )
         await callback.answer()
         return
     
-    # For now, show first/main investment (in future: support multiple)
-    investment = investments[0]
-    
     portfolio_service = PortfolioService(session)
     summary = await portfolio_service.get_portfolio_summary(investment.id)
     
@@ -96,14 +91,15 @@ async def investor_portfolio_status(callback: types.CallbackQuery, session: Asyn
     log_user_action(user.id, "view_portfolio_status", {"investment_id": investment.id})
 
 
+HISTORY_PAGE_SIZE = 10
+
+
 @router.callback_query(F.data == "investor_transaction_history")
 async def investor_transaction_history(callback: types.CallbackQuery, 
                                        state: FSMContext,
-                                       session: AsyncSession):
+                                       session: AsyncSession,
+                                       user: Optional[CachedUser]):
     """Display investor's transaction history with pagination."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(callback.from_user.id)
-    
     if not user or not user.is_verified:
         await callback.answer("🚫 شما دسترسی ندارید", show_alert=True)
         return
@@ -114,19 +110,63 @@ async def investor_transaction_history(callback: types.CallbackQuery,
     
     # Get first investment (main account)
     investment_repo = InvestmentRepository(session)
-    investments = await investment_repo.get_by_user(user.id)
+    investment = await investment_repo.get_first_by_user(user.id)
     
-    if not investments:
+    if not investment:
         await callback.message.edit_text("❌ هیچ سرمایه‌گذاری برای شما ثبت نشده است.")
         await callback.answer()
         return
     
-    investment = investments[0]
+    # history_cursors[i] is the cursor that loads page i + 1
+    await state.update_data(investment_id=investment.id, history_cursors=[None])
+    await show_transaction_history_page(callback, state, session, page=1)
+    
+    log_user_action(user.id, "view_transaction_history", {"investment_id": investment.id})
+
+
+@router.callback_query(F.data.startswith("txn_history_"))
+async def investor_transaction_history_page(callback: types.CallbackQuery,
+                                            state: FSMContext,
+                                            session: AsyncSession,
+                                            user: Optional[CachedUser]):
+    """Move to the next/previous page of transaction history."""
+    if not user or not user.is_verified:
+        await callback.answer("🚫 شما دسترسی ندارید", show_alert=True)
+        return
+    
+    if user.role not in [UserRole.INVESTOR, UserRole.ADMIN]:
+        await callback.answer("🚫 دسترسی رد شد", show_alert=True)
+        return
+    
+    page = int(callback.data.split("_")[2])
+    data = await state.get_data()
+    
+    if "investment_id" not in data or page > len(data.get("history_cursors", [])):
+        await callback.answer("❌ لطفا تاریخچه را دوباره باز کنید", show_alert=True)
+        return
+    
+    # Re-check ownership: the investment ID comes from stored FSM data, not this request
+    investment = await InvestmentRepository(session).get_by_id(data["investment_id"])
+    if not investment or investment.user_id != user.id:
+        await callback.answer("🚫 دسترسی رد شد", show_alert=True)
+        return
+    
+    await show_transaction_history_page(callback, state, session, page=page)
+
+
+async def show_transaction_history_page(callback: types.CallbackQuery,
+                                        state: FSMContext,
+                                        session: AsyncSession,
+                                        page: int):
+    """Render one keyset-paginated page of the investor's transaction history."""
+    data = await state.get_data()
+    investment_id = data["investment_id"]
+    cursors = data["history_cursors"]
     
     # Get transaction history
     portfolio_service = PortfolioService(session)
-    transactions, total_count = await portfolio_service.get_transaction_history(
-        investment.id, limit=10, offset=0
+    transactions, next_cursor, total_count = await portfolio_service.get_transaction_history(
+        investment_id, limit=HISTORY_PAGE_SIZE, cursor=cursors[page - 1]
     )
     
     if not transactions:
@@ -148,9 +188,9 @@ async def investor_transaction_history(callback: types.CallbackQuery,
         "cancellation": "🔴"
     }
     
-    for txn in transactions:
+    date_displays = format_jalali_dates(txn.transaction_date for txn in transactions)
+    for txn, date_display in zip(transactions, date_displays):
         emoji = txn_type_emoji.get(txn.type.value, "•")
-        date_display = format_jalali_date(txn.transaction_date)
         amount_display = format_currency(txn.amount)
         
         txn_lines.append(
@@ -160,25 +200,28 @@ async def investor_transaction_history(callback: types.CallbackQuery,
     
     message_text = "\n".join(txn_lines)
     
-    # Save state for pagination
-    await state.update_data(investment_id=investment.id, current_page=1, total_transactions=total_count)
+    # Remember where the next page starts
+    cursors = cursors[:page]
+    if next_cursor:
+        cursors.append(next_cursor)
+    await state.update_data(history_cursors=cursors, current_page=page, total_transactions=total_count)
+    
+    # Trust the cursor over the (snapshot) count for whether a next page exists
+    total_pages = max(page, (total_count + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+    total_pages = max(total_pages, page + 1) if next_cursor else page
     
     await callback.message.edit_text(
         message_text,
         parse_mode="HTML",
-        reply_markup=get_back_menu("investor_transaction_history")
+        reply_markup=get_pagination_keyboard(page, total_pages, prefix="txn_history")
     )
     
     await callback.answer()
-    log_user_action(user.id, "view_transaction_history", {"investment_id": investment.id})
 
 
 @router.callback_query(F.data == "back_to_menu")
-async def back_to_menu(callback: types.CallbackQuery, session: AsyncSession):
+async def back_to_menu(callback: types.CallbackQuery, user: Optional[CachedUser]):
     """Return to main menu."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(callback.from_user.id)
-    
     if not user:
         await callback.answer("❌ خطا در یافتن کاربر", show_alert=True)
         return
@@ -8,6 +8,7 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import User
 from app.services.repositories import UserRepository
+from app.services.user_cache import CachedUser
 from app.utils.logger import logger, log_user_action
 from app.keyboards.advanced import (
     get_admin_start_menu, get_investor_start_menu, get_accountant_menu,
@@ -15,6 +16,7 @@ from app.keyboards.advanced import (
 )
 from app.keyboards.inline import get_main_menu
 from app.handlers.auth import get_role_name
+from typing import Optional
 
 router = Router()
 
@@ -22,11 +24,8 @@ router = Router()
 # ==================== Main Menu Navigation ====================
 
 @router.callback_query(F.data == "back_to_main")
-async def back_to_main(query: types.CallbackQuery, session: AsyncSession):
+async def back_to_main(query: types.CallbackQuery, user: Optional[CachedUser]):
     """Go back to main menu."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(query.from_user.id)
-    
     if not user or not user.is_verified:
         await query.answer("❌ خطا در دسترسی", show_alert=True)
         return
@@ -85,11 +84,8 @@ async def notification_settings(query: types.CallbackQuery):
 
 
 @router.callback_query(F.data == "security_settings")
-async def security_settings(query: types.CallbackQuery, session: AsyncSession):
+async def security_settings(query: types.CallbackQuery, user: Optional[CachedUser]):
     """Security settings."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(query.from_user.id)
-    
     await query.message.edit_text(
         f"""
 🔐 <b>تنظیمات امنیتی</b>
@@ -142,11 +138,8 @@ async def privacy_settings(query: types.CallbackQuery):
 # ==================== Profile ====================
 
 @router.callback_query(F.data == "view_profile")
-async def view_profile(query: types.CallbackQuery, session: AsyncSession):
+async def view_profile(query: types.CallbackQuery, user: Optional[CachedUser]):
     """View user profile."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(query.from_user.id)
-    
     if not user:
         await query.answer("❌ خطا در دریافت اطلاعات", show_alert=True)
         return
@@ -359,11 +352,8 @@ async def confirm_logout(query: types.CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "confirm_no")
-async def cancel_logout(query: types.CallbackQuery, session: AsyncSession):
+async def cancel_logout(query: types.CallbackQuery, user: Optional[CachedUser]):
     """Cancel logout."""
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_telegram_id(query.from_user.id)
-    
     if user and user.role.value == "admin":
         keyboard = get_admin_start_menu()
     elif user and user.role.value == "accountant":
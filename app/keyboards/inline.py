@@ -36,6 +36,7 @@ def get_admin_main_menu() -> InlineKeyboardMarkup:
         inline_keyboard=[
             [InlineKeyboardButton(text="💰 وضعیت سرمایه من", callback_data="investor_portfolio_status")],
             [InlineKeyboardButton(text="📊 بروزرسانی درآمد و دارایی", callback_data="admin_update_valuation")],
+            [InlineKeyboardButton(text="🧮 بروزرسانی گروهی دارایی", callback_data="admin_bulk_valuation")],
             [InlineKeyboardButton(text="👥 مدیریت کاربران", callback_data="admin_manage_users")],
             [InlineKeyboardButton(text="📈 گزارشات", callback_data="admin_reports")],
             [InlineKeyboardButton(text="⚙️ تنظیمات سیستم", callback_data="admin_settings")],
@@ -220,6 +221,31 @@ def get_valuation_update_mode_menu() -> InlineKeyboardMarkup:
     return kb
 
 
+def get_bulk_valuation_mode_menu() -> InlineKeyboardMarkup:
+    """Menu for choosing how to revalue many investments."""
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="📊 درصد تغییر برای همه", callback_data="bulk_valuation_percentage")],
+            [InlineKeyboardButton(text="📄 آپلود فایل CSV", callback_data="bulk_valuation_csv")],
+            [InlineKeyboardButton(text="❌ لغو", callback_data="cancel_action")],
+        ]
+    )
+    return kb
+
+
+def get_contract_type_filter_menu() -> InlineKeyboardMarkup:
+    """Contract type filter for bulk valuation."""
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="📋 همه قراردادهای فعال", callback_data="bulk_contract_all")],
+            [InlineKeyboardButton(text="📈 نگهداری متغیر", callback_data="bulk_contract_variable_holding")],
+            [InlineKeyboardButton(text="💵 سود ثابت", callback_data="bulk_contract_fixed_rate")],
+            [InlineKeyboardButton(text="❌ لغو", callback_data="cancel_action")],
+        ]
+    )
+    return kb
+
+
 # ============== Date Picker ==============
 
 def get_jalali_date_picker(year: int, month: int, day: int):
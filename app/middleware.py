@@ -2,26 +2,97 @@
 
 from aiogram import BaseMiddleware
 from aiogram.types import Update, Message, CallbackQuery
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.database.lazy_session import LazySession, session_usage
+from app.database.routing import ACTOR_KEY
 from app.database.session import AsyncSessionLocal
+from app.services.repositories import UserRepository
+from app.services.user_cache import PRIVILEGED_ROLES, CachedUser, user_cache
+from app.states.storage import BufferedStorage
 from app.utils.logger import logger
 
 
 class DatabaseSessionMiddleware(BaseMiddleware):
-    """Inject database session into handler context."""
+    """Inject a lazily created database session into handler context.
+    
+    The session (and its connection) is only created when a handler or
+    `AuthMiddleware` first uses it, so pure UI updates never touch the pool;
+    see `session_usage`. The session's writes are attributed to the sender,
+    so their next updates read from the primary while replicas catch up.
+    """
+    
+    def __init__(self, session_factory: async_sessionmaker = AsyncSessionLocal):
+        self.session_factory = session_factory
     
     async def __call__(self, handler, event: Update, data: dict):
         """Add database session to handler data."""
-        async with AsyncSessionLocal() as session:
-            data["session"] = session
-            try:
-                return await handler(event, data)
-            except Exception as e:
-                logger.error(f"Error in handler: {e}", exc_info=True)
-                await session.rollback()
-                raise
-            finally:
-                await session.close()
+        from_user = data.get("event_from_user")
+        session = LazySession(self.session_factory, info={ACTOR_KEY: from_user.id} if from_user else {})
+        data["session"] = session
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            logger.error(f"Error in handler: {e}", exc_info=True)
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+            session_usage.record(session)
+
+
+class FSMWriteBufferMiddleware(BaseMiddleware):
+    """Coalesce FSM storage reads and writes for the whole update.
+    
+    Register as an update outer middleware wrapping aiogram's FSM middleware,
+    so the initial state lookup is buffered too.
+    """
+    
+    def __init__(self, storage: BufferedStorage):
+        self.storage = storage
+    
+    async def __call__(self, handler, event: Update, data: dict):
+        """Flush buffered FSM writes once the update is handled."""
+        async with self.storage.buffer():
+            return await handler(event, data)
+
+
+class AuthMiddleware(BaseMiddleware):
+    """Resolve the sender's `User` once per update into ``data["user"]``.
+    
+    Must run inside `DatabaseSessionMiddleware`. Lookups go through the
+    process-wide `user_cache`; ``data["user"]`` is a `CachedUser` or ``None``
+    for senders that are not registered. Cached `PRIVILEGED_ROLES` users have
+    their role and verification re-checked against the database first, since
+    another process may have changed them.
+    """
+    
+    def __init__(self, report_every: int = 1000):
+        self.report_every = report_every
+    
+    async def __call__(self, handler, event: Update, data: dict):
+        """Add the authenticated user to handler data."""
+        from_user = data.get("event_from_user")
+        user = None
+        
+        if from_user:
+            user_cache.updates += 1
+            found, user = user_cache.get(from_user.id)
+            if found and user is not None and user.role in PRIVILEGED_ROLES:
+                user_cache.revalidations += 1
+                access = await UserRepository(data["session"]).get_access(user.id)
+                if access != (user.role, user.is_verified):
+                    user_cache.revoked += 1
+                    found = False
+            if not found:
+                db_user = await UserRepository(data["session"]).get_by_telegram_id(from_user.id)
+                user = CachedUser.from_model(db_user) if db_user else None
+                user_cache.set(from_user.id, user)
+            
+            if user_cache.updates % self.report_every == 0:
+                logger.info(f"User cache stats: {user_cache.stats()}")
+        
+        data["user"] = user
+        return await handler(event, data)
 
 
 class LoggingMiddleware(BaseMiddleware):
@@ -2,11 +2,13 @@ from datetime import datetime
 from typing import Optional
 from enum import Enum
 from sqlalchemy import (
-    Column, Integer, String, Float, DateTime, Boolean, 
-    ForeignKey, Enum as SQLEnum, Text, Date, Index
+    Column, Integer, BigInteger, String, Float, DateTime, Boolean, 
+    ForeignKey, Enum as SQLEnum, Text, Date, Index, delete, event, insert, inspect
 )
 from sqlalchemy.orm import relationship
 from app.database.session import Base
+from app.utils.money import Money
+from app.utils.persian import MAX_TERM_LENGTH, search_terms
 
 
 class UserRole(str, Enum):
@@ -37,6 +39,14 @@ class InvestmentStatus(str, Enum):
     SUSPENDED = "suspended"
 
 
+class OutboxStatus(str, Enum):
+    """Delivery status of an outbound Telegram message."""
+    PENDING = "pending"
+    SENDING = "sending"  # Claimed by a dispatcher until next_attempt_at
+    SENT = "sent"
+    FAILED = "failed"
+
+
 class User(Base):
     """User model for investors, accountants, and admins."""
     __tablename__ = "users"
@@ -71,6 +81,51 @@ class User(Base):
     )
 
 
+class UserSearchTerm(Base):
+    """One normalized word of a user's name (see `app.utils.persian`).
+    
+    Maintained by the `User` mapper events below, so investor search is an
+    indexed prefix range over `term` instead of a scan of `users.name`.
+    Core ``insert(User)`` / ``update(User)`` statements bypass the events.
+    """
+    __tablename__ = "user_search_terms"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Binary collation on PostgreSQL so prefix ranges follow code point order
+    term = Column(
+        String(MAX_TERM_LENGTH).with_variant(String(MAX_TERM_LENGTH, collation="C"), "postgresql"),
+        primary_key=True,
+    )
+
+    __table_args__ = (
+        Index("idx_search_term", "term", "user_id"),
+    )
+
+
+def search_term_rows(user_id: int, name: str) -> list:
+    """`user_search_terms` rows for a user called ``name``."""
+    return [{"user_id": user_id, "term": term} for term in search_terms(name)]
+
+
+@event.listens_for(User, "after_insert")
+def _index_new_user(mapper, connection, user: User):
+    rows = search_term_rows(user.id, user.name)
+    if rows:
+        connection.execute(insert(UserSearchTerm), rows)
+
+
+@event.listens_for(User, "after_update")
+def _reindex_renamed_user(mapper, connection, user: User):
+    if inspect(user).attrs.name.history.has_changes():
+        _unindex_user(mapper, connection, user)
+        _index_new_user(mapper, connection, user)
+
+
+@event.listens_for(User, "after_delete")
+def _unindex_user(mapper, connection, user: User):
+    connection.execute(delete(UserSearchTerm).where(UserSearchTerm.user_id == user.id))
+
+
 class Investment(Base):
     """Investment contract model."""
     __tablename__ = "investments"
@@ -78,7 +133,7 @@ class Investment(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     contract_type = Column(SQLEnum(ContractType), nullable=False)
-    initial_amount = Column(Float, nullable=False)  # Initial capital in Toman
+    initial_amount = Column(Money, nullable=False)  # Initial capital in Toman
     start_date = Column(Date, nullable=False)
     dividend_rate = Column(Float, nullable=True)  # 0.08 for 8% monthly (fixed_rate only)
     holding_period_months = Column(Integer, nullable=True)  # For variable_holding
@@ -105,7 +160,7 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True, index=True)
     investment_id = Column(Integer, ForeignKey("investments.id", ondelete="CASCADE"), nullable=False)
     type = Column(SQLEnum(TransactionType), nullable=False)
-    amount = Column(Float, nullable=False)  # Can be negative for withdrawals
+    amount = Column(Money, nullable=False)  # Toman; negative for withdrawals
     transaction_date = Column(Date, nullable=False)  # Gregorian date stored; display as Jalali
     description = Column(Text, nullable=True)
     recorded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -119,6 +174,8 @@ class Transaction(Base):
         Index("idx_investment_id", "investment_id"),
         Index("idx_transaction_date", "transaction_date"),
         Index("idx_type", "type"),
+        # Keyset pagination of an investment's history: (transaction_date, id) DESC
+        Index("idx_transaction_investment_date_id", "investment_id", "transaction_date", "id"),
     )
 
 
@@ -128,8 +185,8 @@ class Valuation(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     investment_id = Column(Integer, ForeignKey("investments.id", ondelete="CASCADE"), nullable=False)
-    old_value = Column(Float, nullable=True)  # Previous portfolio value in Toman
-    new_value = Column(Float, nullable=False)  # New portfolio value in Toman
+    old_value = Column(Money, nullable=True)  # Previous portfolio value in Toman
+    new_value = Column(Money, nullable=False)  # New portfolio value in Toman
     profit_percentage = Column(Float, nullable=True)  # If set via percentage
     valuation_date = Column(Date, nullable=False)
     reason = Column(Text, nullable=True)  # Optional description
@@ -144,3 +201,85 @@ class Valuation(Base):
         Index("idx_valuation_investment_id", "investment_id"),
         Index("idx_valuation_date", "valuation_date"),
     )
+
+
+class InvestmentBalance(Base):
+    """Running ledger totals per investment, maintained alongside every ledger write.
+    
+    Derived data: `BalanceRepository.rebuild` can always recompute it from
+    `transactions` and `valuations`.
+    """
+    __tablename__ = "investment_balances"
+
+    investment_id = Column(
+        Integer, ForeignKey("investments.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_deposits = Column(Money, default=0, nullable=False)
+    total_withdrawals = Column(Money, default=0, nullable=False)  # Stored as a positive sum
+    total_dividends = Column(Money, default=0, nullable=False)
+    transaction_count = Column(Integer, default=0, nullable=False)
+    last_transaction_date = Column(Date, nullable=True)
+    latest_valuation_id = Column(
+        Integer, ForeignKey("valuations.id", ondelete="SET NULL"), nullable=True
+    )
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class InvestmentDailyBalance(Base):
+    """Cumulative ledger balance per investment and per date with activity.
+    
+    `cumulative_amount` is the sum of all transaction amounts up to and
+    including `balance_date`, so an as-of balance is one indexed range lookup.
+    """
+    __tablename__ = "investment_daily_balances"
+
+    investment_id = Column(
+        Integer, ForeignKey("investments.id", ondelete="CASCADE"), primary_key=True
+    )
+    balance_date = Column(Date, primary_key=True)
+    net_amount = Column(Money, default=0, nullable=False)  # Sum of amounts on this date
+    cumulative_amount = Column(Money, default=0, nullable=False)
+
+
+class FSMRecord(Base):
+    """Persisted aiogram FSM state and data for one storage key.
+    
+    Written by `SQLStorage`; rows past `expires_at` are abandoned flows and
+    are ignored on read and purged periodically.
+    """
+    __tablename__ = "fsm_states"
+
+    key = Column(String(255), primary_key=True)  # bot:chat:user:thread:destiny
+    state = Column(String(255), nullable=True)
+    data = Column(Text, nullable=False, default="{}")  # JSON, see app.states.storage
+    expires_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_fsm_state_expires_at", "expires_at"),
+    )
+
+
+class OutboundMessage(Base):
+    """Telegram message waiting in (or delivered from) the notification outbox.
+    
+    Rows are added in the same transaction as the ledger change they announce
+    and delivered afterwards by `OutboxDispatcher`.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(BigInteger, nullable=False)
+    text = Column(Text, nullable=False)
+    parse_mode = Column(String(16), nullable=True)
+    dedup_key = Column(String(255), unique=True, nullable=True)  # e.g. "txn:42"
+    status = Column(SQLEnum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -0,0 +1,125 @@
+"""Time-bucketed cache of the admin analytics report.
+
+The report (`AnalyticsService.build_report`) is computed at most once per
+``ANALYTICS_CACHE_SECONDS`` bucket. While the bot runs, a background task
+recomputes it at the start of every bucket, so the reports screen always
+reads from memory. A stale report is still served while its replacement is
+computed; callers only wait when no report exists yet.
+
+Figures can therefore lag writes by up to one bucket. `ReportCache.invalidate`
+also discards a computation already in progress, since it may have read the
+data from before the change.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.services.portfolio_service import AnalyticsService
+from app.utils.logger import logger
+
+
+def _log_failure(task: asyncio.Task):
+    """Done callback of background refreshes, which nobody awaits."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Failed to refresh analytics report: {task.exception()}", exc_info=task.exception())
+
+
+class ReportCache:
+    """Single-flight, time-bucketed cache of one analytics report."""
+
+    def __init__(self, session_factory: async_sessionmaker, bucket_seconds: float):
+        self.session_factory = session_factory
+        self.bucket_seconds = bucket_seconds
+        self._report: Optional[Dict] = None
+        self._report_bucket: Optional[int] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Bumped by `invalidate`; computations started before it are not stored
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.last_refresh_ms = 0.0
+
+    def _bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds)
+
+    async def get(self) -> Dict:
+        """The current report; stale ones are returned while a refresh runs."""
+        if self._report is not None:
+            self.hits += 1
+            if self._report_bucket != self._bucket() and self._inflight is None:
+                self._start_compute().add_done_callback(_log_failure)
+            return self._report
+
+        self.misses += 1
+        return await self.refresh()
+
+    async def refresh(self) -> Dict:
+        """Recompute the report now (joining a computation already in progress)."""
+        if self._inflight is None:
+            self._start_compute()
+        return await asyncio.shield(self._inflight)
+
+    def _start_compute(self) -> asyncio.Task:
+        self._inflight = asyncio.create_task(self._compute(self._generation))
+        return self._inflight
+
+    async def _compute(self, generation: int) -> Dict:
+        try:
+            started = time.perf_counter()
+            bucket = self._bucket()
+            async with self.session_factory() as session:
+                report = await AnalyticsService(session).build_report()
+            if generation == self._generation:
+                self._report, self._report_bucket = report, bucket
+            self.refreshes += 1
+            self.last_refresh_ms = (time.perf_counter() - started) * 1000
+            return report
+        finally:
+            if self._inflight is asyncio.current_task():
+                self._inflight = None
+
+    def invalidate(self):
+        """Drop the cached report and any computation in progress (the next `get` recomputes)."""
+        self._generation += 1
+        self._report = None
+        self._report_bucket = None
+        self._inflight = None
+
+    def start_refresh_task(self):
+        """Recompute at the start of every bucket until `close`."""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh analytics report: {e}")
+            next_bucket = (self._bucket() + 1) * self.bucket_seconds
+            await asyncio.sleep(max(0.0, next_bucket - time.time()))
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def stats(self) -> dict:
+        """Cache hits/misses and the cost of the last refresh."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
+
+
+report_cache = ReportCache(AsyncSessionLocal, settings.ANALYTICS_CACHE_SECONDS)
@@ -1,45 +1,240 @@
-"""HTTP Client for API communication from Bot."""
+"""HTTP Client for API communication from Bot.
 
-import httpx
+One `httpx.AsyncClient` is shared by every call, so connections to the API
+are pooled and kept alive instead of being opened (TCP, and TLS for https)
+per request. The client is created on first use and closed by `close`
+when the bot shuts down.
+
+Idempotent calls (GET, PUT, DELETE) are retried on connection errors,
+timeouts and 502/503/504 responses, with jittered exponential backoff. POST
+is only retried when the connection could not be opened (nothing was sent).
+
+GETs are coalesced and cached:
+
+- identical GETs (same path and query) made while one is in flight share
+  its response instead of sending their own
+- responses carrying an ETag are kept (up to ``API_CACHE_MAX_ENTRIES``):
+  for ``API_CACHE_TTL_SECONDS`` they are served without asking the API,
+  afterwards the API is asked ``If-None-Match`` and a 304 reuses them
+- the client's own POST/PUT/DELETE calls drop the cached responses of the
+  resources they may change (`INVALIDATES`); writes made elsewhere are
+  only seen once the TTL expires (0, the default, always revalidates)
+"""
+
+import asyncio
 import json
-from typing import Optional, Dict, Any, List
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+import httpx
+from typing import Optional, Dict, Any, List, Tuple
 from app.config import settings
 
 # API base URL
-API_BASE_URL = getattr(settings, 'API_URL', 'http://localhost:8000')
+API_BASE_URL = settings.API_URL
+
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+SUPPORTED_METHODS = IDEMPOTENT_METHODS | {"POST"}
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# Resource written -> resources whose cached responses it may change
+INVALIDATES = {
+    "/api/v1/users": ("/api/v1/users",),
+    "/api/v1/investments": ("/api/v1/investments", "/api/v1/users"),
+    "/api/v1/transactions": ("/api/v1/transactions", "/api/v1/investments", "/api/v1/users"),
+    "/api/v1/valuations": ("/api/v1/valuations", "/api/v1/investments", "/api/v1/users"),
+}
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    etag: str
+    fresh_until: float
+
+
+def _resource(endpoint: str) -> str:
+    """``/api/v1/users/7/stats`` -> ``/api/v1/users``."""
+    return "/".join(endpoint.split("/")[:4])
 
 
 class APIClient:
     """HTTP client for API endpoints."""
     
-    def __init__(self, base_url: str = API_BASE_URL):
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = settings.API_TIMEOUT_SECONDS,
+                 slow_timeout: float = settings.API_SLOW_TIMEOUT_SECONDS,
+                 retries: int = settings.API_RETRIES,
+                 retry_backoff: float = settings.API_RETRY_BACKOFF_SECONDS,
+                 cache_ttl: float = settings.API_CACHE_TTL_SECONDS,
+                 cache_max_entries: int = settings.API_CACHE_MAX_ENTRIES):
         self.base_url = base_url
-        self.timeout = 10.0
+        self.timeout = timeout
+        self.slow_timeout = slow_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        # Bumped by every invalidation, so GETs in flight across one are not cached
+        self._generation = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+        self.invalidations = 0
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client (created on first use)."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=settings.API_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.API_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.API_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.API_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the pooled connections (call on shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (0-based)."""
+        return random.uniform(0, self.retry_backoff * 2 ** attempt)
     
     async def request(
         self,
         method: str,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Make HTTP request to API."""
-        url = f"{self.base_url}{endpoint}"
+        """Make HTTP request to API.
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            if method.upper() == "GET":
-                response = await client.get(url, params=params)
-            elif method.upper() == "POST":
-                response = await client.post(url, json=data)
-            elif method.upper() == "PUT":
-                response = await client.put(url, json=data)
-            elif method.upper() == "DELETE":
-                response = await client.delete(url)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-            
+        Args:
+            method: GET, POST, PUT or DELETE
+            endpoint: Path below the base URL
+            data: JSON body (POST and PUT)
+            params: Query parameters
+            timeout: Overrides the client's default timeout for this call
+        """
+        method = method.upper()
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported method: {method}")
+        
+        if method == "GET":
+            return json.loads(await self._get(endpoint, params, timeout))
+        
+        try:
+            response = await self._send(method, endpoint, data=data, params=params, timeout=timeout)
             response.raise_for_status()
             return response.json()
+        finally:
+            # Even a failed write may have been applied
+            self.invalidate(*INVALIDATES.get(_resource(endpoint), ("",)))
+    
+    async def _send(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None,
+                    params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                    headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """Send one request, retrying as described in the module docstring."""
+        kwargs = {"params": params, "headers": headers}
+        if method in ("POST", "PUT"):
+            kwargs["json"] = data
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=settings.API_CONNECT_TIMEOUT_SECONDS)
+        
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = await self.client.request(method, endpoint, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if last_attempt:
+                    raise
+            except httpx.TransportError:
+                # The request may have reached the API: only repeat idempotent calls
+                if last_attempt or method not in IDEMPOTENT_METHODS:
+                    raise
+            else:
+                if (response.status_code not in RETRY_STATUS_CODES or last_attempt
+                        or method not in IDEMPOTENT_METHODS):
+                    return response
+            await asyncio.sleep(self._retry_delay(attempt))
+    
+    async def _get(self, endpoint: str, params: Optional[Dict[str, Any]],
+                   timeout: Optional[float]) -> bytes:
+        """Body of a GET: cached, shared with an identical GET in flight, or fetched."""
+        key = (endpoint, tuple(sorted((name, str(value)) for name, value in (params or {}).items())))
+        cached = self._cache.get(key)
+        if cached is not None and cached.fresh_until > time.monotonic():
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return cached.content
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(self._fetch(key, endpoint, params, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(key, None))
+        # A cancelled caller must not cancel the fetch other callers share
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, key: CacheKey, endpoint: str, params: Optional[Dict[str, Any]],
+                     timeout: Optional[float]) -> bytes:
+        generation = self._generation
+        cached = self._cache.get(key)
+        headers = {"If-None-Match": cached.etag} if cached is not None else None
+        response = await self._send("GET", endpoint, params=params, timeout=timeout, headers=headers)
+        
+        if response.status_code == 304 and cached is not None:
+            self.revalidated += 1
+            content = cached.content
+        else:
+            response.raise_for_status()
+            self.misses += 1
+            content = response.content
+        
+        etag = response.headers.get("etag") or (cached.etag if response.status_code == 304 else None)
+        if etag and generation == self._generation:
+            self._cache[key] = CachedResponse(content, etag, time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return content
+    
+    def invalidate(self, *prefixes: str):
+        """Drop cached responses whose path starts with any of ``prefixes`` (all by default)."""
+        prefixes = prefixes or ("",)
+        self._generation += 1
+        self.invalidations += 1
+        for key in [key for key in self._cache if key[0].startswith(prefixes)]:
+            del self._cache[key]
+    
+    def stats(self) -> dict:
+        """Cache and coalescing counters."""
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+        }
     
     # USER ENDPOINTS
     async def get_user(self, user_id: int) -> Dict[str, Any]:
@@ -54,11 +249,12 @@ class APIClient:
         """Get user by phone number."""
         return await self.request("GET", f"/api/v1/users/phone/{phone}")
     
-    async def create_user(self, name: str, phone: str, role: str) -> Dict[str, Any]:
+    async def create_user(self, telegram_id: int, name: str, phone: str, role: str) -> Dict[str, Any]:
         """Create new user."""
-        return await self.request("POST", "/api/v1/users", data={
+        return await self.request("POST", "/api/v1/users/", data={
+            "telegram_id": telegram_id,
             "name": name,
-            "phone": phone,
+            "phone_number": phone,
             "role": role
         })
     
@@ -68,11 +264,19 @@ class APIClient:
     
     async def get_user_stats(self, user_id: int) -> Dict[str, Any]:
         """Get user statistics."""
-        return await self.request("GET", f"/api/v1/users/{user_id}/stats")
+        return await self.request("GET", f"/api/v1/users/{user_id}/stats", timeout=self.slow_timeout)
     
     async def list_users(self, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
         """List all users."""
-        return await self.request("GET", "/api/v1/users", params={"skip": skip, "limit": limit})
+        return await self.request(
+            "GET", "/api/v1/users/", params={"skip": skip, "limit": limit}, timeout=self.slow_timeout
+        )
+    
+    async def get_users(self, user_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get many users in one call (unknown IDs are skipped)."""
+        return await self.request(
+            "GET", "/api/v1/users/", params={"ids": ",".join(map(str, user_ids))}, timeout=self.slow_timeout
+        )
     
     # INVESTMENT ENDPOINTS
     async def get_investment(self, investment_id: int) -> Dict[str, Any]:
@@ -82,63 +286,87 @@ class APIClient:
     async def create_investment(
         self,
         investor_id: int,
-        investment_type: str,
-        initial_amount: float,
-        rate: Optional[float] = None,
-        description: Optional[str] = None
+        contract_type: str,
+        initial_amount: int,
+        start_date: date,
+        dividend_rate: Optional[float] = None,
+        holding_period_months: Optional[int] = None
     ) -> Dict[str, Any]:
         """Create new investment."""
-        return await self.request("POST", "/api/v1/investments", data={
-            "investor_id": investor_id,
-            "investment_type": investment_type,
+        return await self.request("POST", "/api/v1/investments/", data={
+            "user_id": investor_id,
+            "contract_type": contract_type,
             "initial_amount": initial_amount,
-            "rate": rate,
-            "description": description
+            "start_date": start_date.isoformat(),
+            "dividend_rate": dividend_rate,
+            "holding_period_months": holding_period_months
         })
     
     async def get_user_investments(self, investor_id: int) -> List[Dict[str, Any]]:
         """Get user's investments."""
         return await self.request(
             "GET",
-            "/api/v1/investments",
+            "/api/v1/investments/",
             params={"investor_id": investor_id}
         )
     
     async def get_investment_details(self, investment_id: int) -> Dict[str, Any]:
         """Get detailed investment info."""
-        return await self.request("GET", f"/api/v1/investments/{investment_id}/details")
+        return await self.request(
+            "GET", f"/api/v1/investments/{investment_id}/details", timeout=self.slow_timeout
+        )
+    
+    async def get_investment_summary(self, investment_id: int) -> Dict[str, Any]:
+        """Get ledger totals, current value and ROI of an investment."""
+        return await self.request("GET", f"/api/v1/investments/{investment_id}/summary")
     
     async def list_investments(self, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
         """List all investments."""
-        return await self.request("GET", "/api/v1/investments", params={"skip": skip, "limit": limit})
+        return await self.request(
+            "GET", "/api/v1/investments/", params={"skip": skip, "limit": limit}, timeout=self.slow_timeout
+        )
     
     # TRANSACTION ENDPOINTS
     async def create_transaction(
         self,
         investment_id: int,
         transaction_type: str,
-        amount: float,
+        amount: int,
+        transaction_date: date,
+        recorded_by: int,
         description: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Create new transaction."""
-        return await self.request("POST", "/api/v1/transactions", data={
+        """Create new transaction (withdrawal amounts are negative)."""
+        return await self.request("POST", "/api/v1/transactions/", data={
             "investment_id": investment_id,
-            "transaction_type": transaction_type,
+            "type": transaction_type,
             "amount": amount,
+            "transaction_date": transaction_date.isoformat(),
+            "recorded_by": recorded_by,
             "description": description
         })
     
-    async def get_investment_transactions(self, investment_id: int) -> List[Dict[str, Any]]:
-        """Get investment's transactions."""
+    async def create_transactions_bulk(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Record many transactions at once ({"count", "ids"}); all or none are stored."""
         return await self.request(
-            "GET",
-            "/api/v1/transactions",
-            params={"investment_id": investment_id}
+            "POST", "/api/v1/transactions/bulk", data={"transactions": transactions}, timeout=self.slow_timeout
         )
     
-    async def list_transactions(self, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
-        """List all transactions."""
-        return await self.request("GET", "/api/v1/transactions", params={"skip": skip, "limit": limit})
+    async def get_investment_transactions(self, investment_id: int, limit: int = 10,
+                                          cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of an investment's transactions ({"items", "next_cursor"})."""
+        params = {"investment_id": investment_id, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        return await self.request("GET", "/api/v1/transactions/", params=params)
+    
+    async def list_transactions(self, limit: int = 10,
+                                cursor: Optional[str] = None) -> Dict[str, Any]:
+        """List one page of all transactions ({"items", "next_cursor"})."""
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        return await self.request("GET", "/api/v1/transactions/", params=params)
 
 
 # Global client instance
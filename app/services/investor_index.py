@@ -0,0 +1,255 @@
+"""In-process autocomplete index of investors for the search flows.
+
+Accountants and admins search investors by typing partial names or phone
+numbers, one message per attempt. `InvestorIndex` answers those searches
+from memory: sorted lists of normalized name words (the same words as
+`user_search_terms`) and phone numbers, searched with `bisect`. Results match
+`UserRepository.search_by_name_or_phone` (same matching and order).
+
+The index is loaded when the bot starts and rebuilt every
+``INVESTOR_INDEX_REFRESH_SECONDS``. In between, users created, renamed,
+re-roled or deleted through this process's sessions are applied when their
+transaction commits. A search the index cannot answer (nothing found, or
+the index is not loaded) falls back to the database, so investors added by
+other processes (e.g. the API) are still found before the next rebuild.
+"""
+
+import asyncio
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.routing import REPLICA_READ
+from app.database.session import AsyncSessionLocal
+from app.models.models import User, UserRole
+from app.services.repositories import UserRepository
+from app.utils.logger import logger
+from app.utils.metrics import LATENCY_WINDOW, percentile
+from app.utils.persian import phone_prefix, query_terms, search_terms
+
+PENDING_KEY = "investor_index_changes"
+
+# (user ID, name, phone number), as shown in the search results keyboard
+InvestorRow = Tuple[int, str, str]
+
+
+class _SortedPairs:
+    """(key, user ID) pairs sorted by key then ID, in two parallel arrays."""
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.keys: List[str] = [key for key, _ in pairs]
+        self.ids = array("q", (user_id for _, user_id in pairs))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _position(self, key: str, user_id: int) -> int:
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return bisect_left(self.ids, user_id, lo, hi)
+
+    def add(self, key: str, user_id: int):
+        index = self._position(key, user_id)
+        self.keys.insert(index, key)
+        self.ids.insert(index, user_id)
+
+    def discard(self, key: str, user_id: int):
+        index = self._position(key, user_id)
+        if index < len(self.keys) and self.keys[index] == key and self.ids[index] == user_id:
+            del self.keys[index]
+            del self.ids[index]
+
+    def starting_with(self, prefix: str):
+        """User IDs of the keys starting with ``prefix``, in order."""
+        index = bisect_left(self.keys, prefix)
+        while index < len(self.keys) and self.keys[index].startswith(prefix):
+            yield self.ids[index]
+            index += 1
+
+
+class InvestorIndex:
+    """Sorted, bisect-searched index of investor name words and phones."""
+
+    def __init__(self, session_factory: async_sessionmaker, refresh_seconds: float):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        # User ID -> (name, phone, name words)
+        self._investors: Dict[int, Tuple[str, str, Tuple[str, ...]]] = {}
+        self._terms = _SortedPairs()
+        self._phones = _SortedPairs()
+        self._ready = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.fallbacks = 0
+        self.rebuilds = 0
+        self.last_rebuild_ms = 0.0
+        self._lookup_ms = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def __len__(self) -> int:
+        return len(self._investors)
+
+    @staticmethod
+    def _words(name: str) -> Tuple[str, ...]:
+        # Interned: common first and last names are stored once
+        return tuple(sys.intern(term) for term in search_terms(name))
+
+    def load(self, investors: List[InvestorRow]):
+        """Replace the index with ``investors``."""
+        entries = {user_id: (name, phone, self._words(name)) for user_id, name, phone in investors}
+        self._terms = _SortedPairs(
+            (term, user_id) for user_id, (_, _, words) in entries.items() for term in words
+        )
+        self._phones = _SortedPairs((phone, user_id) for user_id, (_, phone, _) in entries.items())
+        self._investors = entries
+        self._ready = True
+
+    async def rebuild(self):
+        """Reload every investor from the database."""
+        started = time.perf_counter()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(User.id, User.name, User.phone_number).where(User.role == UserRole.INVESTOR),
+                execution_options=REPLICA_READ,
+            )
+            investors = result.all()
+        self.load(investors)
+        self.rebuilds += 1
+        self.last_rebuild_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Investor index loaded: {len(self)} investors in {self.last_rebuild_ms:.0f} ms")
+
+    def add(self, user_id: int, name: str, phone: str):
+        """Index (or re-index) one investor."""
+        self.remove(user_id)
+        words = self._words(name)
+        self._investors[user_id] = (name, phone, words)
+        for term in words:
+            self._terms.add(term, user_id)
+        self._phones.add(phone, user_id)
+
+    def remove(self, user_id: int):
+        """Drop one user from the index (no-op if absent)."""
+        entry = self._investors.pop(user_id, None)
+        if entry is None:
+            return
+        _, phone, words = entry
+        for term in words:
+            self._terms.discard(term, user_id)
+        self._phones.discard(phone, user_id)
+
+    def lookup(self, query: str, limit: int = 20) -> List[InvestorRow]:
+        """Investors matching ``query``, as `search_by_name_or_phone` would find them."""
+        started = time.perf_counter()
+        phone = phone_prefix(query)
+        if phone:
+            matches = self._scan(self._phones, phone, limit, ())
+        else:
+            words = sorted(set(query_terms(query)), key=len, reverse=True)
+            matches = self._scan(self._terms, words[0], limit, words[1:]) if words else []
+        self._lookup_ms.append((time.perf_counter() - started) * 1000)
+        return [(user_id, *self._investors[user_id][:2]) for user_id in matches]
+
+    def _scan(self, pairs: _SortedPairs, prefix: str, limit: int, other_words) -> List[int]:
+        """IDs of the first ``limit`` investors with a key starting with ``prefix``.
+
+        Each must also have a name word starting with every one of ``other_words``.
+        """
+        matches = {}
+        for user_id in pairs.starting_with(prefix):
+            if user_id not in matches and all(
+                any(term.startswith(word) for term in self._investors[user_id][2])
+                for word in other_words
+            ):
+                matches[user_id] = None
+                if len(matches) == limit:
+                    break
+        return list(matches)
+
+    async def search(self, session: AsyncSession, query: str, limit: int = 20) -> List[InvestorRow]:
+        """Investors matching ``query``: from the index, else from the database."""
+        if self._ready:
+            results = self.lookup(query, limit)
+            if results:
+                self.hits += 1
+                return results
+
+        self.fallbacks += 1
+        users = await UserRepository(session).search_by_name_or_phone(
+            query, role=UserRole.INVESTOR, limit=limit
+        )
+        return [(user.id, user.name, user.phone_number) for user in users]
+
+    def start_refresh_task(self):
+        """Load the index now and rebuild it periodically until `close`."""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Failed to rebuild investor index: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def stats(self) -> dict:
+        """Index size, hit/fallback counts and recent lookup latency."""
+        return {
+            "investors": len(self),
+            "name_words": len(self._terms),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_ms": self.last_rebuild_ms,
+            "lookup_ms_p99": percentile(self._lookup_ms, 0.99),
+        }
+
+
+investor_index = InvestorIndex(AsyncSessionLocal, settings.INVESTOR_INDEX_REFRESH_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _queue_investor_changes(session: Session, flush_context):
+    """Remember the users this flush created, changed or deleted."""
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for user in (*session.new, *session.dirty):
+        if isinstance(user, User):
+            pending[user.id] = (user.name, user.phone_number, user.role)
+    for user in session.deleted:
+        if isinstance(user, User):
+            pending[user.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_investor_changes(session: Session):
+    changes = session.info.pop(PENDING_KEY, {})
+    if not investor_index.ready:
+        return  # The next rebuild loads them
+    for user_id, user in changes.items():
+        if user is not None and user[2] == UserRole.INVESTOR:
+            investor_index.add(user_id, user[0], user[1])
+        else:
+            investor_index.remove(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_investor_changes(session: Session):
+    session.info.pop(PENDING_KEY, None)
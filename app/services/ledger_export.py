@@ -0,0 +1,91 @@
+"""Streamed NDJSON and CSV encoding of ledger exports.
+
+The encoders take the batches of column rows yielded by
+`TransactionRepository.stream_for_export` and
+`ValuationRepository.stream_for_export` and produce one encoded chunk per
+batch, so an export of any size is held in memory one batch at a time.
+
+Every date column listed in ``date_fields`` is followed by a Jalali twin,
+``<name>_jalali``, formatted ``1403/01/15``. Enums are written as their
+values, datetimes in ISO 8601.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, List, Sequence
+
+from sqlalchemy import Row
+
+from app.utils.jalali import to_jalali_many
+
+# Lets Excel open the Persian text of a CSV export as UTF-8
+CSV_BOM = "\ufeff"
+
+
+def jalali_string(year: int, month: int, day: int) -> str:
+    return f"{year:04d}/{month:02d}/{day:02d}"
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def export_fields(fields: Sequence[str], date_fields: Sequence[str]) -> List[str]:
+    """Output column names: ``fields`` with the Jalali twin after each date field."""
+    names = []
+    for name in fields:
+        names.append(name)
+        if name in date_fields:
+            names.append(f"{name}_jalali")
+    return names
+
+
+def _records(rows: List[Row], fields: Sequence[str], date_fields: Sequence[str]) -> List[list]:
+    """Values of ``rows`` in `export_fields` order (Jalali dates converted per batch)."""
+    jalali = {
+        name: [jalali_string(*ymd) for ymd in to_jalali_many(getattr(row, name) for row in rows)]
+        for name in date_fields
+    }
+    records = []
+    for index, row in enumerate(rows):
+        record = []
+        for name in fields:
+            record.append(_plain(getattr(row, name)))
+            if name in jalali:
+                record.append(jalali[name][index])
+        records.append(record)
+    return records
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[Row]], fields: Sequence[str],
+                        date_fields: Sequence[str]) -> AsyncIterator[bytes]:
+    """One JSON object per line, one chunk per batch."""
+    names = export_fields(fields, date_fields)
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(names, record)), ensure_ascii=False) + "\n"
+            for record in _records(rows, fields, date_fields)
+        ).encode()
+
+
+async def csv_chunks(batches: AsyncIterator[List[Row]], fields: Sequence[str],
+                     date_fields: Sequence[str]) -> AsyncIterator[bytes]:
+    """A header line, then one CSV chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write(CSV_BOM)
+    writer.writerow(export_fields(fields, date_fields))
+    yield buffer.getvalue().encode()
+
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_records(rows, fields, date_fields))
+        yield buffer.getvalue().encode()
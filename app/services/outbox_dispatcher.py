@@ -0,0 +1,330 @@
+"""Delivery of queued notifications from the ``notification_outbox`` table.
+
+`OutboxDispatcher` leases due rows in batches and hands them to one sender
+task per chat, so a chat's messages go out in order while different chats
+are sent concurrently. Two kinds of token bucket throttle sending: a global
+one (Telegram allows about 30 messages per second per bot) and one per chat
+(about one message per second).
+
+Failures are handled by type:
+
+- 429 ``retry_after``: the chat's bucket pauses and the message is retried in
+  place (short waits) or rescheduled in the outbox (long waits)
+- 5xx and network errors: rescheduled with exponential backoff and jitter
+- other API errors (blocked bot, bad request): marked failed
+- any other exception: logged and rescheduled with backoff like a 5xx, so a
+  bug never stops a chat's queue
+
+Delivery is at least once. Results are written back in batches, so a message
+sent just before a crash is sent again after its lease expires.
+"""
+
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+)
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.models import OutboundMessage
+from app.services.repositories import OutboxRepository
+from app.utils.logger import logger
+from app.utils.metrics import LATENCY_WINDOW, percentile
+
+# Longest 429 wait handled in place before the message goes back to the outbox
+MAX_INLINE_RETRY_AFTER = 30.0
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for ``seconds`` (e.g. after a 429), then restart empty."""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+    def restart(self):
+        """Empty the bucket as of now, so spacing counts from the actual send."""
+        self.tokens = 0
+        self.updated = max(time.monotonic(), self.paused_until)
+
+    @property
+    def idle(self) -> bool:
+        """Full and not paused, so it can be dropped and recreated later."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class OutboxDispatcher:
+    """Rate-limited, retrying sender for the notification outbox."""
+
+    def __init__(self, session_factory: async_sessionmaker, bot: Bot,
+                 global_rate: float = 30.0, per_chat_rate: float = 1.0,
+                 batch_size: int = 100, poll_interval: float = 1.0,
+                 max_attempts: int = 8, lease_seconds: float = 300.0,
+                 backoff_base: float = 2.0, backoff_max: float = 900.0):
+        self.session_factory = session_factory
+        self.bot = bot
+        self.per_chat_rate = per_chat_rate
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # No burst allowance: evenly spaced sends never exceed the rate in any 1 s window
+        self.global_bucket = TokenBucket(global_rate, capacity=1)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._chat_queues: Dict[int, Deque[OutboundMessage]] = defaultdict(deque)
+        self._chat_tasks: Dict[int, asyncio.Task] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+        # Outcomes waiting to be written back: (message_id, attempts, next_attempt_at, error)
+        self._sent: List[int] = []
+        self._retries: List[Tuple[int, int, datetime, str]] = []
+        self._failures: List[Tuple[int, int, str]] = []
+        self._in_flight = 0
+
+        self.started_at: Optional[float] = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._latency_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def start(self):
+        """Start polling the outbox."""
+        if self._poller is None:
+            self.started_at = time.monotonic()
+            self._poller = asyncio.create_task(self._poll_loop(), name="outbox-dispatcher")
+            logger.info("Outbox dispatcher started")
+
+    async def stop(self):
+        """Stop sending, record finished deliveries and release unsent leases."""
+        if self._poller is None:
+            return
+        self._poller.cancel()
+        for task in self._chat_tasks.values():
+            task.cancel()
+        await asyncio.gather(self._poller, *self._chat_tasks.values(), return_exceptions=True)
+        self._poller = None
+        self._chat_tasks.clear()
+
+        now = datetime.utcnow()
+        for queue in self._chat_queues.values():
+            self._retries.extend((message.id, message.attempts, now, None) for message in queue)
+            self._in_flight -= len(queue)
+        self._chat_queues.clear()
+        await self.flush()
+
+    def notify(self):
+        """Poll now instead of waiting for the next interval."""
+        self._wakeup.set()
+
+    async def _poll_loop(self):
+        while True:
+            claimed = 0
+            try:
+                await self.flush()
+                claimed = await self.dispatch_due()
+            except Exception as e:
+                logger.error(f"Outbox dispatcher poll failed: {e}", exc_info=True)
+
+            if claimed == 0 or self._in_flight >= self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def dispatch_due(self) -> int:
+        """Lease due messages into the per-chat senders; returns how many were leased."""
+        capacity = self.batch_size - self._in_flight
+        if capacity <= 0:
+            return 0
+
+        async with self.session_factory() as session:
+            messages = await OutboxRepository(session).claim_due(capacity, self.lease_seconds)
+            await session.commit()
+
+        for message in messages:
+            self._in_flight += 1
+            self._chat_queues[message.chat_id].append(message)
+            if message.chat_id not in self._chat_tasks:
+                self._chat_tasks[message.chat_id] = asyncio.create_task(
+                    self._chat_sender(message.chat_id)
+                )
+        self._prune_buckets()
+        return len(messages)
+
+    async def flush(self):
+        """Write finished deliveries back to the outbox in one transaction.
+
+        If the write fails the outcomes are kept for the next flush, so sent
+        messages are not sent again when their leases expire.
+        """
+        if not (self._sent or self._retries or self._failures):
+            return
+        sent, self._sent = self._sent, []
+        retries, self._retries = self._retries, []
+        failures, self._failures = self._failures, []
+
+        try:
+            async with self.session_factory() as session:
+                repo = OutboxRepository(session)
+                await repo.mark_sent(sent)
+                for message_id, attempts, next_attempt_at, error in retries:
+                    await repo.mark_retry(message_id, attempts, next_attempt_at, error)
+                for message_id, attempts, error in failures:
+                    await repo.mark_failed(message_id, attempts, error)
+                await session.commit()
+        except BaseException:
+            self._sent[:0] = sent
+            self._retries[:0] = retries
+            self._failures[:0] = failures
+            raise
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+        return bucket
+
+    def _prune_buckets(self):
+        for chat_id in [
+            chat_id for chat_id, bucket in self._chat_buckets.items()
+            if chat_id not in self._chat_tasks and bucket.idle
+        ]:
+            del self._chat_buckets[chat_id]
+
+    async def _chat_sender(self, chat_id: int):
+        queue = self._chat_queues[chat_id]
+        try:
+            while queue:
+                try:
+                    await self._deliver(queue[0])
+                finally:
+                    queue.popleft()
+                    self._in_flight -= 1
+        finally:
+            if not queue:
+                self._chat_queues.pop(chat_id, None)
+            self._chat_tasks.pop(chat_id, None)
+
+    async def _deliver(self, message: OutboundMessage):
+        """Send one message, retrying short 429 waits in place.
+
+        Records exactly one outcome for the message, whatever goes wrong.
+        """
+        bucket = self._chat_bucket(message.chat_id)
+        attempts = message.attempts
+        try:
+            while True:
+                await bucket.acquire()
+                await self.global_bucket.acquire()
+                # Time spent waiting for the global bucket must not shorten the chat's gap
+                bucket.restart()
+                attempts += 1
+                try:
+                    await self.bot.send_message(
+                        message.chat_id, message.text, parse_mode=message.parse_mode
+                    )
+                except TelegramRetryAfter as e:
+                    self.rate_limited += 1
+                    bucket.pause(e.retry_after)
+                    if e.retry_after <= MAX_INLINE_RETRY_AFTER and attempts < self.max_attempts:
+                        continue
+                    self._reschedule(message, attempts, e.retry_after, f"429: retry after {e.retry_after}s")
+                except (TelegramServerError, TelegramNetworkError) as e:
+                    self._reschedule(message, attempts, self._backoff(attempts), str(e))
+                except TelegramAPIError as e:
+                    self._fail(message, attempts, str(e))
+                else:
+                    self._latency_ms.append(
+                        (datetime.utcnow() - message.created_at).total_seconds() * 1000
+                    )
+                    self._sent.append(message.id)
+                    self.sent += 1
+                return
+        except asyncio.CancelledError:
+            # Stopping: release the lease now instead of when it expires
+            self._retries.append((message.id, message.attempts, datetime.utcnow(), None))
+            raise
+        except Exception as e:
+            logger.error(f"Outbox message {message.id} to chat {message.chat_id} raised: {e}", exc_info=True)
+            attempts = max(attempts, message.attempts + 1)
+            self._reschedule(message, attempts, self._backoff(attempts), f"{type(e).__name__}: {e}")
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter before retry number ``attempts``."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _reschedule(self, message: OutboundMessage, attempts: int, delay: float, error: str):
+        if attempts >= self.max_attempts:
+            self._fail(message, attempts, error)
+            return
+        self.retried += 1
+        next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        self._retries.append((message.id, attempts, next_attempt_at, error))
+
+    def _fail(self, message: OutboundMessage, attempts: int, error: str):
+        self.failed += 1
+        self._failures.append((message.id, attempts, error))
+        logger.warning(f"Outbox message {message.id} to chat {message.chat_id} failed: {error}")
+
+    def metrics(self) -> dict:
+        """Delivery counters, throughput and end-to-end latency (queued → sent)."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        latency_ms = list(self._latency_ms)
+        return {
+            "in_flight": self._in_flight,
+            "active_chats": len(self._chat_tasks),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "throughput_per_s": self.sent / elapsed if elapsed else 0.0,
+            "delivery_latency_ms": {
+                "p50": percentile(latency_ms, 0.5),
+                "p95": percentile(latency_ms, 0.95),
+                "max": max(latency_ms, default=0.0),
+            },
+        }
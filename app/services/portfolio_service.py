@@ -1,10 +1,20 @@
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
-from app.models.models import Investment, Transaction, Valuation, InvestmentStatus, TransactionType
+from app.models.models import (
+    User, Investment, Transaction, Valuation, InvestmentStatus, TransactionType, ContractType,
+    UserRole
+)
 from app.services.repositories import (
-    InvestmentRepository, TransactionRepository, ValuationRepository
+    InvestmentRepository, TransactionRepository, ValuationRepository, BalanceRepository,
+    OutboxRepository, AnalyticsRepository
+)
+from app.utils.formatters import (
+    calculate_portfolio_balance, calculate_profit_percentage, format_currency, format_jalali_date,
+    JALALI_MONTH_NAMES
 )
-from app.utils.formatters import calculate_portfolio_balance, calculate_profit_percentage
+from app.utils import jalali
+from app.utils.pagination import encode_cursor, decode_cursor
 from typing import Dict, Tuple, Optional, List
 
 
@@ -15,6 +25,8 @@ class PortfolioService:
         self.investment_repo = InvestmentRepository(session)
         self.transaction_repo = TransactionRepository(session)
         self.valuation_repo = ValuationRepository(session)
+        self.balance_repo = BalanceRepository(session)
+        self.notification_service = NotificationService(session)
     
     async def get_portfolio_summary(self, investment_id: int) -> Dict:
         """Get complete portfolio summary for an investment.
@@ -25,73 +37,68 @@ class PortfolioService:
                 - current_deposits: Sum of all deposits
                 - current_withdrawals: Sum of all withdrawals
                 - total_transactions_profit: Sum of all dividends
+                - transaction_count: Number of ledger rows
                 - current_value: Latest portfolio value
                 - profit_percentage: Calculated profit %
                 - last_updated: Date of last update
                 - contract_type: Investment contract type
         """
-        investment = await self.investment_repo.get_by_id(investment_id)
-        if not investment:
+        row = await self.balance_repo.get_snapshot_row(investment_id)
+        if not row:
             return {}
         
-        # Get all transactions
-        transactions = await self.transaction_repo.get_by_investment(investment_id)
-        
-        # Calculate sums by transaction type
-        deposits = sum(t.amount for t in transactions if t.type == TransactionType.DEPOSIT)
-        withdrawals = sum(abs(t.amount) for t in transactions if t.type == TransactionType.WITHDRAWAL)
-        profits = sum(t.amount for t in transactions if t.type == TransactionType.DIVIDEND)
+        if not row.has_snapshot:
+            # Investment predates the balance snapshot: aggregate the ledger
+            row = await self.investment_repo.get_summary_row(investment_id)
         
-        # Get latest valuation
-        latest_valuation = await self.valuation_repo.get_latest_by_investment(investment_id)
+        deposits = row.deposits
+        withdrawals = row.withdrawals
+        profits = row.dividends
         
         # Calculate current value
-        if latest_valuation:
-            current_value = latest_valuation.new_value
-            last_updated = latest_valuation.valuation_date
+        if row.latest_value is not None:
+            current_value = row.latest_value
+            last_updated = row.latest_valuation_date
         else:
             # Default calculation: initial + deposits - withdrawals + profits
-            current_value = investment.initial_amount + deposits - withdrawals + profits
+            current_value = row.initial_amount + deposits - withdrawals + profits
             # Use latest transaction date or start date
-            if transactions:
-                last_updated = max(t.transaction_date for t in transactions)
-            else:
-                last_updated = investment.start_date
+            last_updated = row.last_transaction_date or row.start_date
         
         return {
-            "initial_capital": investment.initial_amount,
+            "initial_capital": row.initial_amount,
             "current_deposits": deposits,
             "current_withdrawals": withdrawals,
             "total_transactions_profit": profits,
+            "transaction_count": row.transaction_count,
             "current_value": current_value,
             "profit_percentage": calculate_profit_percentage(
-                investment.initial_amount, current_value
+                row.initial_amount, current_value
             ),
             "last_updated": last_updated,
-            "contract_type": investment.contract_type,
-            "status": investment.status,
+            "contract_type": row.contract_type,
+            "status": row.status,
         }
     
-    async def calculate_balance_for_date(self, investment_id: int, as_of_date: date) -> float:
+    async def calculate_balance_for_date(self, investment_id: int, as_of_date: date) -> int:
         """Calculate portfolio balance as of a specific date."""
-        investment = await self.investment_repo.get_by_id(investment_id)
-        if not investment:
-            return 0
-        
-        # Get all transactions up to date
-        transactions = await self.transaction_repo.get_by_investment(investment_id)
-        relevant_txns = [t for t in transactions if t.transaction_date <= as_of_date]
-        
-        # Sum amounts
-        total_amount = investment.initial_amount + sum(t.amount for t in relevant_txns)
+        balances = await self.balance_repo.get_balances_as_of(investment_id, [as_of_date])
+        return balances.get(as_of_date, 0)
+    
+    async def calculate_balances_for_dates(self, investment_id: int,
+                                           dates: List[date]) -> Dict[date, int]:
+        """Calculate portfolio balances for many dates at once (e.g. month-end series).
         
-        return total_amount
+        Returns:
+            Dict mapping each date to its balance (empty if investment not found)
+        """
+        return await self.balance_repo.get_balances_as_of(investment_id, dates)
     
     async def record_transaction(self, investment_id: int, txn_type: TransactionType,
                                 amount: float, transaction_date: date,
                                 recorded_by: int, description: str = None) -> Transaction:
-        """Record a financial transaction."""
-        return await self.transaction_repo.create(
+        """Record a financial transaction and queue the investor's notification."""
+        transaction = await self.transaction_repo.create(
             investment_id=investment_id,
             txn_type=txn_type,
             amount=amount,
@@ -99,18 +106,22 @@ class PortfolioService:
             recorded_by=recorded_by,
             description=description
         )
+        await self.notification_service.notify_transaction_recorded(transaction)
+        return transaction
     
     async def update_valuation(self, investment_id: int, new_value: float,
                               valuation_date: date, updated_by: int,
                               reason: str = None) -> Valuation:
-        """Update portfolio valuation (admin only)."""
-        investment = await self.investment_repo.get_by_id(investment_id)
-        if not investment:
+        """Update portfolio valuation (admin only) and queue the investor's notification."""
+        row = await self.balance_repo.get_snapshot_row(investment_id)
+        if not row:
             return None
         
+        if not row.has_snapshot:
+            row = await self.investment_repo.get_summary_row(investment_id)
+        
         # Get current/old value
-        old_valuation = await self.valuation_repo.get_latest_by_investment(investment_id)
-        old_value = old_valuation.new_value if old_valuation else investment.initial_amount
+        old_value = row.latest_value if row.latest_value is not None else row.initial_amount
         
         # Create new valuation record
         valuation = await self.valuation_repo.create(
@@ -121,19 +132,81 @@ class PortfolioService:
             old_value=old_value,
             reason=reason
         )
+        await self.notification_service.notify_valuation_updated(valuation)
         
         return valuation
     
-    async def get_transaction_history(self, investment_id: int, 
-                                     limit: int = 20, offset: int = 0) -> Tuple[List[Transaction], int]:
-        """Get paginated transaction history."""
-        all_transactions = await self.transaction_repo.get_by_investment(investment_id)
-        total_count = len(all_transactions)
+    async def bulk_update_valuations(self, valuation_date: date, updated_by: int,
+                                     percentage: float = None,
+                                     new_values: Dict[int, float] = None,
+                                     contract_type: ContractType = None,
+                                     reason: str = None) -> Dict:
+        """Revalue many investments in the caller's transaction (admin only).
         
-        # Apply pagination
-        paginated = all_transactions[offset:offset + limit]
+        Pass either ``percentage`` (applied to every active investment,
+        optionally of one ``contract_type``) or ``new_values`` (investment ID →
+        new value, e.g. from `parse_valuation_csv`). Investor notifications are
+        queued in the outbox in the same transaction.
         
-        return paginated, total_count
+        Returns:
+            Dict with count, notified, old_total, new_total and the
+            missing_investment_ids of ``new_values`` that do not exist
+        
+        Raises:
+            ValueError: If neither or both of percentage/new_values are given
+        """
+        if (percentage is None) == (new_values is None):
+            raise ValueError("Pass exactly one of percentage or new_values")
+        
+        if percentage is not None:
+            rows = await self.valuation_repo.bulk_create_by_percentage(
+                percentage, valuation_date, updated_by, contract_type=contract_type, reason=reason
+            )
+            missing = []
+        else:
+            rows = await self.valuation_repo.bulk_create_from_values(
+                new_values, valuation_date, updated_by, reason=reason
+            )
+            found = {row.investment_id for row in rows}
+            missing = sorted(investment_id for investment_id in new_values if investment_id not in found)
+        
+        notified = await self.notification_service.notify_valuations_bulk(rows, valuation_date)
+        return {
+            "count": len(rows),
+            "notified": notified,
+            "old_total": sum(row.old_value or 0 for row in rows),
+            "new_total": sum(row.new_value for row in rows),
+            "missing_investment_ids": missing,
+        }
+    
+    async def get_transaction_history(self, investment_id: int, limit: int = 20,
+                                     cursor: str = None) -> Tuple[List[Transaction], Optional[str], int]:
+        """Get one keyset-paginated page of transaction history.
+        
+        Args:
+            investment_id: Investment ID
+            limit: Page size
+            cursor: Opaque cursor from the previous page (None for the first page)
+        
+        Returns:
+            Tuple of (transactions, next page cursor or None, total count)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor) if cursor else None
+        transactions, next_position = await self.transaction_repo.get_page(
+            investment_id, limit=limit, after=after
+        )
+        next_cursor = encode_cursor(*next_position) if next_position else None
+        
+        balance = await self.balance_repo.get_by_investment(investment_id)
+        if balance is not None:
+            total_count = balance.transaction_count
+        else:
+            total_count = await self.transaction_repo.count_by_investment(investment_id)
+        
+        return transactions, next_cursor, total_count
     
     async def get_valuation_history(self, investment_id: int, limit: int = 20) -> List[Valuation]:
         """Get valuation change history."""
@@ -141,59 +214,204 @@ class PortfolioService:
 
 
 class NotificationService:
-    """Service for sending notifications to investors."""
+    """Queues Telegram notifications to investors in the notification outbox.
     
-    # In a real implementation, this would queue messages to Telegram
-    # For now, we just define the interface
+    Messages are written in the caller's session, so they commit (or roll
+    back) together with the ledger change; `OutboxDispatcher` delivers them.
+    Dedup keys make re-queuing the same event a no-op.
+    """
     
-    @staticmethod
-    async def notify_transaction_recorded(user_id: int, investment_summary: Dict, 
-                                         transaction_type: TransactionType,
-                                         amount: float) -> bool:
+    TRANSACTION_LABELS = {
+        TransactionType.DEPOSIT: "💰 واریز",
+        TransactionType.WITHDRAWAL: "💸 برداشت",
+        TransactionType.DIVIDEND: "🎁 سود پرداختی",
+    }
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.outbox_repo = OutboxRepository(session)
+    
+    async def _investor_chat_id(self, investment_id: int) -> Optional[int]:
+        """Telegram chat of the investment's owner, if they are verified."""
+        stmt = select(User.telegram_id).join(Investment, Investment.user_id == User.id).where(
+            Investment.id == investment_id,
+            User.is_verified.is_(True)
+        )
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+    
+    async def notify_transaction_recorded(self, transaction: Transaction) -> bool:
         """Queue notification for recorded transaction."""
-        # TODO: Implement Telegram notification sending
-        # This would be called after transaction is saved
-        return True
+        chat_id = await self._investor_chat_id(transaction.investment_id)
+        if chat_id is None:
+            return False
+        
+        label = self.TRANSACTION_LABELS.get(transaction.type, transaction.type.value)
+        text = (
+            f"🧾 <b>تراکنش جدید در حساب شما ثبت شد</b>\n\n"
+            f"{label}: {format_currency(abs(transaction.amount))}\n"
+            f"📅 تاریخ: {format_jalali_date(transaction.transaction_date)}"
+        )
+        return await self.outbox_repo.enqueue(chat_id, text, dedup_key=f"txn:{transaction.id}")
     
     @staticmethod
-    async def notify_valuation_updated(user_id: int, old_value: float, 
-                                      new_value: float, change_percentage: float) -> bool:
+    def _valuation_text(new_value: float, old_value: Optional[float], valuation_date: date) -> str:
+        text = (
+            f"📊 <b>ارزش پورتفولیوی شما بروزرسانی شد</b>\n\n"
+            f"ارزش جدید: {format_currency(new_value)}\n"
+            f"📅 تاریخ: {format_jalali_date(valuation_date)}"
+        )
+        if old_value:
+            change = calculate_profit_percentage(old_value, new_value)
+            text += f"\nتغییر: {change:+.2f}%"
+        return text
+    
+    async def notify_valuation_updated(self, valuation: Valuation) -> bool:
         """Queue notification for portfolio valuation update."""
-        # TODO: Implement Telegram notification sending
-        return True
+        chat_id = await self._investor_chat_id(valuation.investment_id)
+        if chat_id is None:
+            return False
+        
+        text = self._valuation_text(valuation.new_value, valuation.old_value, valuation.valuation_date)
+        return await self.outbox_repo.enqueue(
+            chat_id, text, dedup_key=f"valuation:{valuation.id}"
+        )
     
-    @staticmethod
-    async def notify_error(user_id: int, error_message: str) -> bool:
+    async def notify_valuations_bulk(self, rows: List, valuation_date: date) -> int:
+        """Queue notifications for a bulk revaluation in one executemany.
+        
+        Args:
+            rows: Rows from `ValuationRepository.bulk_create_*` (id, old_value,
+                new_value, chat_id)
+            valuation_date: Date shared by the whole batch
+        
+        Returns:
+            Number of notifications queued
+        """
+        return await self.outbox_repo.enqueue_many([
+            {
+                "chat_id": row.chat_id,
+                "text": self._valuation_text(row.new_value, row.old_value, valuation_date),
+                "dedup_key": f"valuation:{row.id}",
+            }
+            for row in rows
+            if row.chat_id is not None
+        ])
+    
+    async def notify_error(self, chat_id: int, error_message: str) -> bool:
         """Queue notification for error."""
-        # TODO: Implement error notification
-        return True
+        return await self.outbox_repo.enqueue(chat_id, f"❌ {error_message}", parse_mode=None)
 
 
 class AnalyticsService:
-    """Service for analytics and reporting."""
+    """Service for analytics and reporting, built on SQL aggregates."""
     
     def __init__(self, session: AsyncSession):
-        self.investment_repo = InvestmentRepository(session)
-        self.transaction_repo = TransactionRepository(session)
-        self.valuation_repo = ValuationRepository(session)
-        self.portfolio_service = PortfolioService(session)
+        self.analytics_repo = AnalyticsRepository(session)
+    
+    async def get_user_counts(self) -> Dict[str, int]:
+        """Investor (verified/unverified), accountant and admin counts."""
+        counts = await self.analytics_repo.count_users()
+        
+        def total(role: UserRole, verified: bool = None) -> int:
+            return sum(
+                count for (row_role, row_verified), count in counts.items()
+                if row_role == role and (verified is None or row_verified == verified)
+            )
+        
+        return {
+            "investors": total(UserRole.INVESTOR),
+            "verified_investors": total(UserRole.INVESTOR, True),
+            "unverified_investors": total(UserRole.INVESTOR, False),
+            "accountants": total(UserRole.ACCOUNTANT),
+            "admins": total(UserRole.ADMIN),
+        }
     
-    async def get_total_invested_capital(self) -> float:
+    async def get_aum_by_contract_type(self) -> Dict[ContractType, Dict]:
+        """Assets under management per contract type (active investments only).
+        
+        Returns:
+            Dict mapping contract type to investment_count, invested_capital
+            and current_value
+        """
+        return {
+            row.contract_type: {
+                "investment_count": row.investment_count,
+                "invested_capital": row.invested_capital,
+                "current_value": row.current_value,
+            }
+            for row in await self.analytics_repo.aum_by_contract_type()
+        }
+    
+    async def get_total_invested_capital(self) -> int:
         """Get total capital across all active investments."""
-        # TODO: Implement aggregate query
-        return 0
+        aum = await self.get_aum_by_contract_type()
+        return sum(item["invested_capital"] for item in aum.values())
     
-    async def get_total_portfolio_value(self) -> float:
-        """Get total portfolio value across all investments."""
-        # TODO: Implement aggregate query
-        return 0
+    async def get_total_portfolio_value(self) -> int:
+        """Get total portfolio value across all active investments."""
+        aum = await self.get_aum_by_contract_type()
+        return sum(item["current_value"] for item in aum.values())
+    
+    async def get_monthly_flows(self, months: int = 6, today: date = None) -> List[Dict]:
+        """Deposits, withdrawals, dividends and net flow per Jalali month.
+        
+        The database groups by day and type; days are rolled up into Jalali
+        months here, since SQL has no Jalali calendar.
+        
+        Returns:
+            One dict per month, oldest first: year, month, label, deposits,
+            withdrawals, dividends, net
+        """
+        today = today or date.today()
+        year, month, _ = jalali.to_jalali(today)
+        month -= months - 1
+        while month < 1:
+            year, month = year - 1, month + 12
+        since = jalali.to_gregorian(year, month, 1)
+        
+        buckets = {}
+        for _ in range(months):
+            buckets[(year, month)] = {
+                "year": year, "month": month, "label": f"{JALALI_MONTH_NAMES[month]} {year}",
+                "deposits": 0, "withdrawals": 0, "dividends": 0, "net": 0,
+            }
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        
+        rows = await self.analytics_repo.daily_flows(since)
+        jalali_dates = jalali.to_jalali_many(row.transaction_date for row in rows)
+        for row, (jalali_year, jalali_month, _) in zip(rows, jalali_dates):
+            bucket = buckets.get((jalali_year, jalali_month))
+            if bucket is None:
+                continue
+            if row.type == TransactionType.DEPOSIT:
+                bucket["deposits"] += row.total
+            elif row.type == TransactionType.WITHDRAWAL:
+                bucket["withdrawals"] += abs(row.total)
+            elif row.type == TransactionType.DIVIDEND:
+                bucket["dividends"] += row.total
+            bucket["net"] += row.total
+        return list(buckets.values())
     
     async def get_transaction_count(self, days: int = 30) -> int:
         """Get transaction count in last N days."""
-        # TODO: Implement time-based query
-        return 0
+        return await self.analytics_repo.count_transactions_since(date.today() - timedelta(days=days))
     
     async def get_daily_active_users(self, days: int = 7) -> int:
-        """Get number of active users in last N days."""
-        # TODO: Implement user activity tracking
-        return 0
+        """Get number of investors with ledger activity in last N days."""
+        return await self.analytics_repo.count_active_investors_since(
+            date.today() - timedelta(days=days)
+        )
+    
+    async def build_report(self) -> Dict:
+        """Everything the admin reports screen shows, in one dict."""
+        aum = await self.get_aum_by_contract_type()
+        return {
+            "generated_at": datetime.now(),
+            "users": await self.get_user_counts(),
+            "aum_by_contract_type": aum,
+            "total_invested_capital": sum(item["invested_capital"] for item in aum.values()),
+            "total_portfolio_value": sum(item["current_value"] for item in aum.values()),
+            "monthly_flows": await self.get_monthly_flows(),
+            "transactions_30d": await self.get_transaction_count(30),
+            "active_investors_7d": await self.get_daily_active_users(7),
+        }
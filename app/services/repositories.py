@@ -1,12 +1,134 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, desc, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy import (
+    select, update, delete, insert, and_, or_, desc, func, case, literal, union_all, exists, tuple_,
+    bindparam, cast, type_coerce, Row, Date, DateTime, Float, Integer, Numeric, Text
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased, joinedload, selectinload
 from app.models.models import (
-    User, Investment, Transaction, Valuation,
-    UserRole, ContractType, TransactionType, InvestmentStatus
+    User, UserSearchTerm, Investment, Transaction, Valuation, InvestmentBalance, InvestmentDailyBalance,
+    OutboundMessage, UserRole, ContractType, TransactionType, InvestmentStatus, OutboxStatus
 )
-from typing import Optional, List, Tuple
-from datetime import date
+from app.database.routing import REPLICA_READ, pin_to_primary
+from app.utils.money import Money, to_money
+from app.utils.persian import phone_prefix, query_terms
+from typing import AsyncIterator, Optional, List, Tuple, Dict
+from datetime import date, datetime, timedelta
+
+
+def ledger_totals_subquery(investment_id: int = None):
+    """Per-investment deposit/withdrawal/dividend sums, count and last date."""
+    stmt = select(
+        Transaction.investment_id,
+        func.coalesce(func.sum(case(
+            (Transaction.type == TransactionType.DEPOSIT, Transaction.amount), else_=0
+        )), 0).label("deposits"),
+        func.coalesce(func.sum(case(
+            (Transaction.type == TransactionType.WITHDRAWAL, func.abs(Transaction.amount, type_=Money)),
+            else_=0
+        )), 0).label("withdrawals"),
+        func.coalesce(func.sum(case(
+            (Transaction.type == TransactionType.DIVIDEND, Transaction.amount), else_=0
+        )), 0).label("dividends"),
+        func.count(Transaction.id).label("transaction_count"),
+        func.max(Transaction.transaction_date).label("last_transaction_date"),
+    ).group_by(Transaction.investment_id)
+    
+    if investment_id is not None:
+        stmt = stmt.where(Transaction.investment_id == investment_id)
+    return stmt.subquery()
+
+
+def latest_valuation_subquery(investment_id: int = None):
+    """Valuations ranked newest-first per investment (rank 1 is the latest)."""
+    stmt = select(
+        Valuation.id,
+        Valuation.investment_id,
+        Valuation.new_value,
+        Valuation.valuation_date,
+        func.row_number().over(
+            partition_by=Valuation.investment_id,
+            order_by=(Valuation.valuation_date.desc(), Valuation.id.desc())
+        ).label("rank"),
+    )
+    
+    if investment_id is not None:
+        stmt = stmt.where(Valuation.investment_id == investment_id)
+    return stmt.subquery()
+
+
+def ledger_summary_query(investment_id: int = None):
+    """Select investment header + ledger totals + latest valuation, one row per investment."""
+    txn_totals = ledger_totals_subquery(investment_id)
+    ranked_valuations = latest_valuation_subquery(investment_id)
+    
+    stmt = select(
+        Investment.id,
+        Investment.initial_amount,
+        Investment.start_date,
+        Investment.contract_type,
+        Investment.status,
+        func.coalesce(txn_totals.c.deposits, 0).label("deposits"),
+        func.coalesce(txn_totals.c.withdrawals, 0).label("withdrawals"),
+        func.coalesce(txn_totals.c.dividends, 0).label("dividends"),
+        func.coalesce(txn_totals.c.transaction_count, 0).label("transaction_count"),
+        txn_totals.c.last_transaction_date,
+        ranked_valuations.c.id.label("latest_valuation_id"),
+        ranked_valuations.c.new_value.label("latest_value"),
+        ranked_valuations.c.valuation_date.label("latest_valuation_date"),
+    ).outerjoin(
+        txn_totals, txn_totals.c.investment_id == Investment.id
+    ).outerjoin(
+        ranked_valuations,
+        and_(
+            ranked_valuations.c.investment_id == Investment.id,
+            ranked_valuations.c.rank == 1
+        )
+    )
+    
+    if investment_id is not None:
+        stmt = stmt.where(Investment.id == investment_id)
+    return stmt
+
+
+def daily_ledger_query(investment_id: int = None):
+    """Per-investment, per-date net amounts with a running cumulative sum."""
+    net_amount = func.sum(Transaction.amount)
+    stmt = select(
+        Transaction.investment_id,
+        Transaction.transaction_date.label("balance_date"),
+        net_amount.label("net_amount"),
+        func.sum(net_amount).over(
+            partition_by=Transaction.investment_id,
+            order_by=Transaction.transaction_date
+        ).label("cumulative_amount"),
+    ).group_by(Transaction.investment_id, Transaction.transaction_date)
+    
+    if investment_id is not None:
+        stmt = stmt.where(Transaction.investment_id == investment_id)
+    return stmt
+
+
+def current_value_query():
+    """Investment ID with its current value (latest snapshot valuation, else initial capital)."""
+    return select(
+        Investment.id.label("investment_id"),
+        func.coalesce(Valuation.new_value, Investment.initial_amount).label("current_value"),
+    ).select_from(Investment).outerjoin(
+        InvestmentBalance, InvestmentBalance.investment_id == Investment.id
+    ).outerjoin(
+        Valuation, Valuation.id == InvestmentBalance.latest_valuation_id
+    )
+
+
+async def stream_partitions(session: AsyncSession, stmt, batch_size: int) -> AsyncIterator[List[Row]]:
+    """Yield the rows of ``stmt`` in lists of ``batch_size``, fetched from a server-side cursor.
+    
+    Meant for column selects: ORM entities would pile up in the identity map.
+    """
+    result = await session.stream(stmt, execution_options={**REPLICA_READ, "yield_per": batch_size})
+    async for partition in result.partitions():
+        yield partition
 
 
 class UserRepository:
@@ -18,18 +140,24 @@ class UserRepository:
     async def get_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         """Get user by Telegram ID."""
         stmt = select(User).where(User.telegram_id == telegram_id)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().first()
     
+    async def get_access(self, user_id: int) -> Optional[Tuple[UserRole, bool]]:
+        """Current ``(role, is_verified)`` of a user, read from the primary."""
+        stmt = select(User.role, User.is_verified).where(User.id == user_id)
+        row = (await self.session.execute(stmt)).first()
+        return tuple(row) if row else None
+    
     async def get_by_phone(self, phone_number: str) -> Optional[User]:
         """Get user by phone number."""
         stmt = select(User).where(User.phone_number == phone_number)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().first()
     
     async def get_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return await self.session.get(User, user_id)
+        return await self.session.get(User, user_id, execution_options=REPLICA_READ)
     
     async def create(self, telegram_id: int, phone_number: str, name: str, 
                     role: UserRole = UserRole.INVESTOR) -> User:
@@ -47,8 +175,20 @@ class UserRepository:
     
     async def verify_user(self, user_id: int) -> User:
         """Mark user as verified."""
+        pin_to_primary(self.session)
+        user = await self.get_by_id(user_id)
+        if user:
+            user.is_verified = True
+            user.verified_at = func.now()
+            await self.session.flush()
+        return user
+    
+    async def link_telegram_account(self, user_id: int, telegram_id: int) -> User:
+        """Attach a Telegram account to a pre-registered user and verify them."""
+        pin_to_primary(self.session)
         user = await self.get_by_id(user_id)
         if user:
+            user.telegram_id = telegram_id
             user.is_verified = True
             user.verified_at = func.now()
             await self.session.flush()
@@ -56,6 +196,7 @@ class UserRepository:
     
     async def update_role(self, user_id: int, role: UserRole) -> User:
         """Update user role."""
+        pin_to_primary(self.session)
         user = await self.get_by_id(user_id)
         if user:
             user.role = role
@@ -65,26 +206,75 @@ class UserRepository:
     async def list_by_role(self, role: UserRole) -> List[User]:
         """Get all users with specific role."""
         stmt = select(User).where(User.role == role).order_by(User.name)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().all()
     
-    async def get_all(self, skip: int = 0, limit: int = 10) -> List[User]:
-        """Get all users with pagination."""
-        stmt = select(User).order_by(User.created_at.desc()).offset(skip).limit(limit)
+    async def get_all(self, skip: int = 0, limit: int = 10, columns: tuple = None) -> List[User]:
+        """Get all users with pagination (rows of ``columns`` instead of users if given)."""
+        stmt = select(*columns) if columns else select(User)
+        stmt = stmt.order_by(User.created_at.desc()).offset(skip).limit(limit)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return result.all() if columns else result.scalars().all()
     
-    async def search_by_name_or_phone(self, query: str) -> List[User]:
-        """Search users by name or phone number."""
-        search_term = f"%{query}%"
-        stmt = select(User).where(
-            or_(
-                User.name.ilike(search_term),
-                User.phone_number.ilike(search_term)
-            )
-        ).order_by(User.name).limit(20)
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
+    async def get_many(self, user_ids: List[int], columns: tuple = None) -> List[User]:
+        """Get users by ID in one query, in the order of ``user_ids`` (unknown IDs are skipped).
+        
+        With ``columns`` (which must include `User.id`), rows of those columns
+        are returned instead of users.
+        """
+        stmt = (select(*columns) if columns else select(User)).where(User.id.in_(user_ids))
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
+        users = {user.id: user for user in (result if columns else result.scalars())}
+        return [users[user_id] for user_id in dict.fromkeys(user_ids) if user_id in users]
+    
+    @staticmethod
+    def _prefix_range(column, prefix: str):
+        """``column`` starts with ``prefix``, as a range the column's index can serve."""
+        return and_(column >= prefix, column < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+    
+    async def search_by_name_or_phone(self, query: str, role: Optional[UserRole] = None,
+                                      limit: int = 20) -> List[User]:
+        """Search users by name words or phone number prefix.
+        
+        Names and queries are normalized alike (`app.utils.persian`) and every
+        query word must be the start of a word of the name. Results follow the
+        index on the longest query word: users with that exact word first, then
+        longer words alphabetically. A query of digits (Persian digits and
+        ``+98`` accepted) searches phone numbers by prefix instead, the exact
+        number first.
+        """
+        phone = phone_prefix(query)
+        if phone:
+            stmt = select(User).where(
+                self._prefix_range(User.phone_number, phone)
+            ).order_by(User.phone_number)
+            if role is not None:
+                stmt = stmt.where(User.role == role)
+            result = await self.session.execute(stmt.limit(limit), execution_options=REPLICA_READ)
+            return result.scalars().all()
+        
+        words = sorted(set(query_terms(query)), key=len, reverse=True)
+        if not words:
+            return []
+        
+        # Walk the index on the (likely most selective) longest word and check
+        # the other words per candidate, so the scan stops after ``limit`` users
+        term = aliased(UserSearchTerm)
+        stmt = select(User).join(term, term.user_id == User.id).where(
+            self._prefix_range(term.term, words[0])
+        ).order_by(term.term, term.user_id)
+        for word in words[1:]:
+            other = aliased(UserSearchTerm)
+            stmt = stmt.where(exists().where(
+                other.user_id == term.user_id, self._prefix_range(other.term, word)
+            ))
+        if role is not None:
+            stmt = stmt.where(User.role == role)
+        
+        # A user with several matching words (e.g. both parts of a half-space
+        # compound) comes back once per word
+        result = await self.session.execute(stmt.limit(limit * 2), execution_options=REPLICA_READ)
+        return list(dict.fromkeys(result.scalars()))[:limit]
 
 
 class InvestmentRepository:
@@ -93,34 +283,81 @@ class InvestmentRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def get_by_id(self, investment_id: int) -> Optional[Investment]:
-        """Get investment by ID with related data."""
+    @staticmethod
+    def _child_loaders(with_transactions: bool, with_valuations: bool) -> list:
+        """Loader options for explicitly requested child collections.
+        
+        Children are loaded with selectinload (one extra IN query per
+        collection) rather than joinedload, which multiplied rows to T×V per
+        investment and broke LIMIT on list queries.
+        """
+        options = []
+        if with_transactions:
+            options.append(selectinload(Investment.transactions))
+        if with_valuations:
+            options.append(selectinload(Investment.valuations))
+        return options
+    
+    async def get_by_id(self, investment_id: int, with_transactions: bool = False,
+                        with_valuations: bool = False) -> Optional[Investment]:
+        """Get investment by ID (header only unless children are requested)."""
         stmt = select(Investment).where(Investment.id == investment_id).options(
-            joinedload(Investment.transactions),
-            joinedload(Investment.valuations)
+            *self._child_loaders(with_transactions, with_valuations)
         )
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().first()
     
-    async def get_by_user(self, user_id: int) -> List[Investment]:
-        """Get all investments for a user."""
+    async def get_by_user(self, user_id: int, with_transactions: bool = False,
+                          with_valuations: bool = False) -> List[Investment]:
+        """Get all investments for a user (header only unless children are requested)."""
         stmt = select(Investment).where(
             Investment.user_id == user_id
         ).options(
-            joinedload(Investment.transactions),
-            joinedload(Investment.valuations)
+            *self._child_loaders(with_transactions, with_valuations)
         ).order_by(Investment.start_date.desc())
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
+        return result.scalars().all()
+    
+    async def get_first_by_user(self, user_id: int) -> Optional[Investment]:
+        """Get a user's main (most recently started) investment, header only."""
+        stmt = select(Investment).where(
+            Investment.user_id == user_id
+        ).order_by(Investment.start_date.desc()).limit(1)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
+        return result.scalars().first()
+    
+    async def get_all(self, skip: int = 0, limit: int = 10, with_transactions: bool = False,
+                      with_valuations: bool = False, columns: tuple = None) -> List[Investment]:
+        """Get all investments with pagination (header only unless children are requested).
+        
+        With ``columns``, rows of those columns are returned instead of investments.
+        """
+        if columns:
+            stmt = select(*columns)
+        else:
+            stmt = select(Investment).options(*self._child_loaders(with_transactions, with_valuations))
+        stmt = stmt.order_by(Investment.start_date.desc()).offset(skip).limit(limit)
         result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+        return result.all() if columns else result.scalars().all()
     
-    async def get_all(self, skip: int = 0, limit: int = 10) -> List[Investment]:
-        """Get all investments with pagination."""
-        stmt = select(Investment).order_by(Investment.start_date.desc()).offset(skip).limit(limit).options(
-            joinedload(Investment.transactions),
-            joinedload(Investment.valuations)
-        )
+    async def count_active(self, contract_type: ContractType = None) -> int:
+        """Count active investments, optionally of one contract type."""
+        stmt = select(func.count(Investment.id)).where(Investment.status == InvestmentStatus.ACTIVE)
+        if contract_type is not None:
+            stmt = stmt.where(Investment.contract_type == contract_type)
+        return (await self.session.execute(stmt)).scalar()
+    
+    async def get_summary_row(self, investment_id: int) -> Optional[Row]:
+        """Get investment header, ledger totals and latest valuation in one query.
+        
+        Per-type sums and the last transaction date come from conditional
+        aggregates; the latest valuation is picked with a ROW_NUMBER() window.
+        This scans the investment's ledger rows inside the database; screens
+        should prefer `BalanceRepository.get_snapshot_row`.
+        """
+        stmt = ledger_summary_query(investment_id)
         result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+        return result.first()
     
     async def create(self, user_id: int, contract_type: ContractType, 
                     initial_amount: float, start_date: date,
@@ -130,18 +367,21 @@ class InvestmentRepository:
         investment = Investment(
             user_id=user_id,
             contract_type=contract_type,
-            initial_amount=initial_amount,
+            initial_amount=to_money(initial_amount),
             start_date=start_date,
             dividend_rate=dividend_rate,
             holding_period_months=holding_period_months
         )
         self.session.add(investment)
         await self.session.flush()
+        self.session.add(InvestmentBalance(investment_id=investment.id))
+        await self.session.flush()
         return investment
     
     async def update_status(self, investment_id: int, status: InvestmentStatus,
                           cancelled_date: date = None) -> Investment:
         """Update investment status."""
+        pin_to_primary(self.session)
         investment = await self.get_by_id(investment_id)
         if investment:
             investment.status = status
@@ -156,13 +396,14 @@ class TransactionRepository:
     
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.balance_repo = BalanceRepository(session)
     
     async def get_by_id(self, transaction_id: int) -> Optional[Transaction]:
         """Get transaction by ID."""
         stmt = select(Transaction).where(Transaction.id == transaction_id).options(
             joinedload(Transaction.recorder)
         )
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().first()
     
     async def get_by_investment(self, investment_id: int,
@@ -177,7 +418,7 @@ class TransactionRepository:
         if limit:
             stmt = stmt.limit(limit)
         
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().all()
     
     async def get_all(self, skip: int = 0, limit: int = 10) -> List[Transaction]:
@@ -188,10 +429,46 @@ class TransactionRepository:
         result = await self.session.execute(stmt)
         return result.scalars().all()
     
+    async def get_page(self, investment_id: int = None, limit: int = 10, after: Tuple[date, int] = None,
+                       columns: tuple = None) -> Tuple[List[Transaction], Optional[Tuple[date, int]]]:
+        """Get one page of transactions newest-first using keyset pagination.
+        
+        Args:
+            investment_id: Restrict to one investment (uses the
+                (investment_id, transaction_date, id) index)
+            limit: Page size
+            after: (transaction_date, id) of the last row of the previous page
+            columns: Return rows of these columns (which must include
+                transaction_date and id) instead of transactions
+        
+        Returns:
+            Tuple of (transactions, position to pass as `after` for the next
+            page or None on the last page)
+        """
+        stmt = (select(*columns) if columns else select(Transaction)).order_by(
+            Transaction.transaction_date.desc(), Transaction.id.desc()
+        ).limit(limit + 1)
+        
+        if investment_id is not None:
+            stmt = stmt.where(Transaction.investment_id == investment_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(Transaction.transaction_date, Transaction.id) < tuple_(*after))
+        
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
+        transactions = result.all() if columns else result.scalars().all()
+        
+        if len(transactions) <= limit:
+            return transactions, None
+        
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        return transactions, (last.transaction_date, last.id)
+    
     async def create(self, investment_id: int, txn_type: TransactionType,
                     amount: float, transaction_date: date,
                     recorded_by: int, description: str = None) -> Transaction:
         """Create new transaction."""
+        amount = to_money(amount)
         transaction = Transaction(
             investment_id=investment_id,
             type=txn_type,
@@ -202,23 +479,100 @@ class TransactionRepository:
         )
         self.session.add(transaction)
         await self.session.flush()
+        await self.balance_repo.apply_transaction(
+            investment_id, new=(txn_type, amount, transaction_date)
+        )
         return transaction
     
+    async def bulk_create(self, rows: List[Dict]) -> List[int]:
+        """Insert many transactions in one executemany and update their snapshots set-wise.
+        
+        Args:
+            rows: Dicts of investment_id, type, amount, transaction_date,
+                recorded_by and optionally description
+        
+        Returns:
+            IDs of the new transactions, in the order of ``rows``
+        """
+        if not rows:
+            return []
+        await self.balance_repo.rebuild_missing()
+        
+        recorded_at = datetime.utcnow()
+        params = [
+            {
+                "investment_id": row["investment_id"],
+                "type": row["type"],
+                "amount": to_money(row["amount"]),
+                "transaction_date": row["transaction_date"],
+                "description": row.get("description"),
+                "recorded_by": row["recorded_by"],
+                "recorded_at": recorded_at,
+            }
+            for row in rows
+        ]
+        stmt = insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True)
+        connection = await self.session.connection()
+        transaction_ids = (await connection.execute(stmt, params)).scalars().all()
+        
+        await self.balance_repo.apply_transaction_batch([
+            (row["investment_id"], row["type"], row["amount"], row["transaction_date"]) for row in params
+        ])
+        return transaction_ids
+    
     async def update(self, transaction_id: int, amount: float = None,
                     transaction_date: date = None,
                     description: str = None) -> Transaction:
         """Update transaction."""
+        pin_to_primary(self.session)
         transaction = await self.get_by_id(transaction_id)
         if transaction:
+            old = (transaction.type, transaction.amount, transaction.transaction_date)
             if amount is not None:
-                transaction.amount = amount
+                transaction.amount = to_money(amount)
             if transaction_date is not None:
                 transaction.transaction_date = transaction_date
             if description is not None:
                 transaction.description = description
             await self.session.flush()
+            await self.balance_repo.apply_transaction(
+                transaction.investment_id,
+                old=old,
+                new=(transaction.type, transaction.amount, transaction.transaction_date)
+            )
         return transaction
     
+    EXPORT_COLUMNS = (
+        Transaction.id, Transaction.investment_id, Transaction.type, Transaction.amount,
+        Transaction.transaction_date, Transaction.description, Transaction.recorded_by,
+        Transaction.recorded_at,
+    )
+    
+    def stream_for_export(self, investment_id: int = None, txn_type: TransactionType = None,
+                          date_from: date = None, date_to: date = None,
+                          batch_size: int = 1000) -> AsyncIterator[List[Row]]:
+        """Stream ledger rows (`EXPORT_COLUMNS`) in ID order, in lists of ``batch_size``.
+        
+        Date bounds are inclusive. Memory use does not depend on how many
+        rows match.
+        """
+        stmt = select(*self.EXPORT_COLUMNS).order_by(Transaction.id)
+        if investment_id is not None:
+            stmt = stmt.where(Transaction.investment_id == investment_id)
+        if txn_type is not None:
+            stmt = stmt.where(Transaction.type == txn_type)
+        if date_from is not None:
+            stmt = stmt.where(Transaction.transaction_date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Transaction.transaction_date <= date_to)
+        return stream_partitions(self.session, stmt, batch_size)
+    
+    async def count_by_investment(self, investment_id: int) -> int:
+        """Count transactions of an investment."""
+        stmt = select(func.count(Transaction.id)).where(Transaction.investment_id == investment_id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+    
     async def get_by_type(self, investment_id: int, txn_type: TransactionType) -> List[Transaction]:
         """Get transactions of specific type."""
         stmt = select(Transaction).where(
@@ -227,7 +581,7 @@ class TransactionRepository:
                 Transaction.type == txn_type
             )
         ).order_by(Transaction.transaction_date.desc())
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().all()
 
 
@@ -236,34 +590,60 @@ class ValuationRepository:
     
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.balance_repo = BalanceRepository(session)
     
     async def get_by_id(self, valuation_id: int) -> Optional[Valuation]:
         """Get valuation by ID."""
         stmt = select(Valuation).where(Valuation.id == valuation_id).options(
             joinedload(Valuation.updater)
         )
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().first()
     
     async def get_latest_by_investment(self, investment_id: int) -> Optional[Valuation]:
         """Get latest valuation for an investment."""
         stmt = select(Valuation).where(
             Valuation.investment_id == investment_id
-        ).order_by(Valuation.valuation_date.desc()).limit(1).options(
+        ).order_by(Valuation.valuation_date.desc(), Valuation.id.desc()).limit(1).options(
             joinedload(Valuation.updater)
         )
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
         return result.scalars().first()
     
-    async def get_history_by_investment(self, investment_id: int, limit: int = 20) -> List[Valuation]:
-        """Get valuation history for an investment."""
-        stmt = select(Valuation).where(
+    async def get_history_by_investment(self, investment_id: int, limit: int = 20,
+                                        columns: tuple = None) -> List[Valuation]:
+        """Get valuation history for an investment (rows of ``columns`` instead if given)."""
+        if columns:
+            stmt = select(*columns)
+        else:
+            stmt = select(Valuation).options(joinedload(Valuation.updater))
+        stmt = stmt.where(
             Valuation.investment_id == investment_id
-        ).order_by(Valuation.valuation_date.desc()).limit(limit).options(
-            joinedload(Valuation.updater)
-        )
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
+        ).order_by(Valuation.valuation_date.desc(), Valuation.id.desc()).limit(limit)
+        result = await self.session.execute(stmt, execution_options=REPLICA_READ)
+        return result.all() if columns else result.scalars().all()
+    
+    EXPORT_COLUMNS = (
+        Valuation.id, Valuation.investment_id, Valuation.old_value, Valuation.new_value,
+        Valuation.profit_percentage, Valuation.valuation_date, Valuation.reason, Valuation.updated_by,
+        Valuation.created_at,
+    )
+    
+    def stream_for_export(self, investment_id: int = None, date_from: date = None,
+                          date_to: date = None, batch_size: int = 1000) -> AsyncIterator[List[Row]]:
+        """Stream valuation rows (`EXPORT_COLUMNS`) in ID order, in lists of ``batch_size``.
+        
+        Date bounds are inclusive. Memory use does not depend on how many
+        rows match.
+        """
+        stmt = select(*self.EXPORT_COLUMNS).order_by(Valuation.id)
+        if investment_id is not None:
+            stmt = stmt.where(Valuation.investment_id == investment_id)
+        if date_from is not None:
+            stmt = stmt.where(Valuation.valuation_date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Valuation.valuation_date <= date_to)
+        return stream_partitions(self.session, stmt, batch_size)
     
     async def create(self, investment_id: int, new_value: float,
                     valuation_date: date, updated_by: int,
@@ -273,8 +653,8 @@ class ValuationRepository:
         """Create new valuation record."""
         valuation = Valuation(
             investment_id=investment_id,
-            old_value=old_value,
-            new_value=new_value,
+            old_value=None if old_value is None else to_money(old_value),
+            new_value=to_money(new_value),
             profit_percentage=profit_percentage,
             valuation_date=valuation_date,
             updated_by=updated_by,
@@ -282,8 +662,122 @@ class ValuationRepository:
         )
         self.session.add(valuation)
         await self.session.flush()
+        await self.balance_repo.apply_valuation(valuation)
         return valuation
     
+    BULK_COLUMNS = [
+        "investment_id", "old_value", "new_value", "profit_percentage",
+        "valuation_date", "reason", "updated_by", "created_at",
+    ]
+    
+    async def bulk_create_by_percentage(self, percentage: float, valuation_date: date,
+                                        updated_by: int, contract_type: ContractType = None,
+                                        reason: str = None) -> List[Row]:
+        """Revalue every active investment (optionally of one contract type) by ``percentage``.
+        
+        Runs as one INSERT ... SELECT; old and new values are computed in SQL
+        from each investment's current value.
+        
+        Returns:
+            The new valuations, see `_insert_batch`
+        """
+        current = current_value_query().where(Investment.status == InvestmentStatus.ACTIVE)
+        if contract_type is not None:
+            current = current.where(Investment.contract_type == contract_type)
+        current = current.subquery()
+        
+        created_at = datetime.utcnow()
+        source = select(
+            current.c.investment_id,
+            current.c.current_value,
+            cast(func.round(cast(
+                current.c.current_value * literal(1 + percentage / 100, Float), Numeric
+            )), Money),
+            literal(percentage, Float),
+            literal(valuation_date, Date),
+            literal(reason, Text),
+            literal(updated_by, Integer),
+            literal(created_at, DateTime),
+        )
+        return await self._insert_batch(source, updated_by, valuation_date, created_at)
+    
+    async def bulk_create_from_values(self, new_values: Dict[int, float], valuation_date: date,
+                                      updated_by: int, reason: str = None) -> List[Row]:
+        """Record explicit new values (e.g. from a CSV upload) for many investments.
+        
+        One INSERT ... SELECT executed with every (investment_id, new_value)
+        pair as an executemany; old values come from SQL. Unknown investment
+        IDs insert nothing.
+        
+        Returns:
+            The new valuations, see `_insert_batch`
+        """
+        created_at = datetime.utcnow()
+        current = current_value_query().where(
+            Investment.id == bindparam("row_investment_id", type_=Integer)
+        ).subquery()
+        source = select(
+            current.c.investment_id,
+            current.c.current_value,
+            bindparam("row_new_value", type_=Money),
+            literal(None, Float),
+            literal(valuation_date, Date),
+            literal(reason, Text),
+            literal(updated_by, Integer),
+            literal(created_at, DateTime),
+        )
+        params = [
+            {"row_investment_id": investment_id, "row_new_value": new_value}
+            for investment_id, new_value in new_values.items()
+        ]
+        return await self._insert_batch(source, updated_by, valuation_date, created_at, params)
+    
+    async def _insert_batch(self, source, updated_by: int, valuation_date: date,
+                            created_at: datetime, params: List[Dict] = None) -> List[Row]:
+        """Insert valuations selected by ``source`` and move the snapshots to them.
+        
+        The batch is identified afterwards by (id above the previous maximum,
+        updated_by, created_at), so no ID list is sent back to the database.
+        
+        Returns:
+            Rows of (id, investment_id, old_value, new_value, chat_id), where
+            chat_id is the owner's Telegram ID if they are verified, else None
+        """
+        await self.balance_repo.rebuild_missing()
+        
+        last_id = (await self.session.execute(
+            select(func.coalesce(func.max(Valuation.id), 0))
+        )).scalar()
+        
+        stmt = insert(Valuation).from_select(self.BULK_COLUMNS, source)
+        connection = await self.session.connection()
+        if params is None:
+            await connection.execute(stmt)
+        elif params:
+            await connection.execute(stmt, params)
+        
+        in_batch = and_(
+            Valuation.id > last_id,
+            Valuation.updated_by == updated_by,
+            Valuation.created_at == created_at
+        )
+        await self.balance_repo.apply_valuation_batch(in_batch, valuation_date)
+        
+        stmt = select(
+            Valuation.id,
+            Valuation.investment_id,
+            Valuation.old_value,
+            Valuation.new_value,
+            case((User.is_verified.is_(True), User.telegram_id), else_=None).label("chat_id"),
+        ).join(
+            Investment, Investment.id == Valuation.investment_id
+        ).join(
+            User, User.id == Investment.user_id
+        ).where(in_batch).order_by(Valuation.id)
+        
+        result = await self.session.execute(stmt)
+        return result.all()
+    
     async def get_overdue_investments(self, days_threshold: int = 30) -> List[Investment]:
         """Get investments with valuations older than threshold."""
         # Subquery for latest valuation date per investment
@@ -299,3 +793,706 @@ class ValuationRepository:
         
         result = await self.session.execute(stmt)
         return result.scalars().all()
+
+
+class BalanceRepository:
+    """Materialized balances derived from the ledger.
+    
+    Maintains two tables inside the caller's unit of work:
+    `investment_balances` (running totals, one row per investment) and
+    `investment_daily_balances` (cumulative balance per date with activity),
+    so readers never have to scan `transactions`.
+    """
+    
+    # Money columns hold whole Tomans, so stored totals must match the ledger exactly
+    DRIFT_TOLERANCE = 0
+    
+    TOTAL_FIELDS = ("total_deposits", "total_withdrawals", "total_dividends")
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    @staticmethod
+    def _contribution(entry: Optional[Tuple[TransactionType, int, date]]) -> Dict[str, int]:
+        """Totals contributed by a single (type, amount, date) ledger entry."""
+        totals = dict.fromkeys(BalanceRepository.TOTAL_FIELDS, 0)
+        if entry is None:
+            return totals
+        
+        txn_type, amount, _ = entry
+        if txn_type == TransactionType.DEPOSIT:
+            totals["total_deposits"] = amount
+        elif txn_type == TransactionType.WITHDRAWAL:
+            totals["total_withdrawals"] = abs(amount)
+        elif txn_type == TransactionType.DIVIDEND:
+            totals["total_dividends"] = amount
+        return totals
+    
+    async def get_by_investment(self, investment_id: int) -> Optional[InvestmentBalance]:
+        """Get balance snapshot for an investment."""
+        return await self.session.get(InvestmentBalance, investment_id)
+    
+    async def get_snapshot_row(self, investment_id: int) -> Optional[Row]:
+        """Get investment header, snapshot totals and latest valuation by primary keys.
+        
+        Returns rows shaped like `ledger_summary_query`; `has_snapshot` is
+        False when the investment predates the snapshot table.
+        """
+        stmt = select(
+            Investment.id,
+            Investment.initial_amount,
+            Investment.start_date,
+            Investment.contract_type,
+            Investment.status,
+            func.coalesce(InvestmentBalance.total_deposits, 0).label("deposits"),
+            func.coalesce(InvestmentBalance.total_withdrawals, 0).label("withdrawals"),
+            func.coalesce(InvestmentBalance.total_dividends, 0).label("dividends"),
+            func.coalesce(InvestmentBalance.transaction_count, 0).label("transaction_count"),
+            InvestmentBalance.last_transaction_date,
+            InvestmentBalance.latest_valuation_id,
+            Valuation.new_value.label("latest_value"),
+            Valuation.valuation_date.label("latest_valuation_date"),
+            InvestmentBalance.investment_id.is_not(None).label("has_snapshot"),
+        ).outerjoin(
+            InvestmentBalance, InvestmentBalance.investment_id == Investment.id
+        ).outerjoin(
+            Valuation, Valuation.id == InvestmentBalance.latest_valuation_id
+        ).where(Investment.id == investment_id)
+        
+        result = await self.session.execute(stmt)
+        return result.first()
+    
+    async def apply_transaction(self, investment_id: int,
+                                old: Tuple[TransactionType, int, date] = None,
+                                new: Tuple[TransactionType, int, date] = None) -> None:
+        """Apply a ledger change to the snapshot.
+        
+        Args:
+            investment_id: Investment whose ledger changed
+            old: (type, amount, date) before the change, None for inserts
+            new: (type, amount, date) after the change, None for deletes
+        
+        Must be called after the ledger change has been flushed: when the
+        investment has no snapshot row yet it is rebuilt from the ledger.
+        """
+        before = self._contribution(old)
+        after = self._contribution(new)
+        count_delta = (new is not None) - (old is not None)
+        
+        values = {
+            field: getattr(InvestmentBalance, field) + (after[field] - before[field])
+            for field in self.TOTAL_FIELDS
+        }
+        values["transaction_count"] = InvestmentBalance.transaction_count + count_delta
+        
+        if old is not None and (new is None or new[2] < old[2]):
+            # The last transaction may have moved back in time: re-read the max date
+            values["last_transaction_date"] = select(
+                func.max(Transaction.transaction_date)
+            ).where(Transaction.investment_id == investment_id).scalar_subquery()
+        elif new is not None:
+            values["last_transaction_date"] = case(
+                (
+                    or_(
+                        InvestmentBalance.last_transaction_date.is_(None),
+                        InvestmentBalance.last_transaction_date < new[2]
+                    ),
+                    new[2]
+                ),
+                else_=InvestmentBalance.last_transaction_date
+            )
+        
+        stmt = update(InvestmentBalance).where(
+            InvestmentBalance.investment_id == investment_id
+        ).values(**values).execution_options(synchronize_session=False)
+        
+        result = await self.session.execute(stmt)
+        if result.rowcount == 0:
+            await self.rebuild(investment_id)
+            return
+        
+        if old is not None:
+            await self._shift_daily(investment_id, old[2], -old[1])
+        if new is not None:
+            await self._shift_daily(investment_id, new[2], new[1])
+    
+    async def apply_transaction_batch(self, entries: List[Tuple[int, TransactionType, int, date]]) -> None:
+        """Set-based `apply_transaction` for many inserted (investment_id, type, amount, date) entries.
+        
+        Totals are summed per investment and per day in Python and written
+        with one executemany each; the cumulative daily amounts of the
+        touched investments are then recomputed with one window query.
+        Every touched investment must already have a snapshot row.
+        """
+        totals: Dict[int, Dict] = {}
+        daily: Dict[Tuple[int, date], int] = {}
+        for investment_id, txn_type, amount, txn_date in entries:
+            investment = totals.setdefault(
+                investment_id, {**dict.fromkeys(self.TOTAL_FIELDS, 0), "count": 0, "last": txn_date}
+            )
+            for field, value in self._contribution((txn_type, amount, txn_date)).items():
+                investment[field] += value
+            investment["count"] += 1
+            investment["last"] = max(investment["last"], txn_date)
+            daily[investment_id, txn_date] = daily.get((investment_id, txn_date), 0) + amount
+        if not totals:
+            return
+        
+        connection = await self.session.connection()
+        last_date = bindparam("b_last_transaction_date", type_=Date)
+        stmt = update(InvestmentBalance).where(
+            InvestmentBalance.investment_id == bindparam("b_investment_id", type_=Integer)
+        ).values(
+            **{
+                field: getattr(InvestmentBalance, field) + bindparam(f"b_{field}", type_=Money)
+                for field in self.TOTAL_FIELDS
+            },
+            transaction_count=InvestmentBalance.transaction_count + bindparam("b_count", type_=Integer),
+            last_transaction_date=case(
+                (
+                    or_(
+                        InvestmentBalance.last_transaction_date.is_(None),
+                        InvestmentBalance.last_transaction_date < last_date
+                    ),
+                    last_date
+                ),
+                else_=InvestmentBalance.last_transaction_date
+            ),
+        )
+        await connection.execute(stmt, [
+            {
+                "b_investment_id": investment_id,
+                **{f"b_{field}": investment[field] for field in self.TOTAL_FIELDS},
+                "b_count": investment["count"],
+                "b_last_transaction_date": investment["last"],
+            }
+            for investment_id, investment in totals.items()
+        ])
+        
+        dialect_insert = (
+            postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        )
+        stmt = dialect_insert(InvestmentDailyBalance)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[InvestmentDailyBalance.investment_id, InvestmentDailyBalance.balance_date],
+            set_={"net_amount": InvestmentDailyBalance.net_amount + stmt.excluded.net_amount},
+        )
+        await connection.execute(stmt, [
+            {"investment_id": investment_id, "balance_date": balance_date, "net_amount": delta,
+             "cumulative_amount": 0}
+            for (investment_id, balance_date), delta in daily.items()
+        ])
+        
+        running = select(
+            InvestmentDailyBalance.investment_id,
+            InvestmentDailyBalance.balance_date,
+            func.sum(InvestmentDailyBalance.net_amount).over(
+                partition_by=InvestmentDailyBalance.investment_id,
+                order_by=InvestmentDailyBalance.balance_date
+            ).label("cumulative_amount"),
+        ).where(InvestmentDailyBalance.investment_id.in_(list(totals))).subquery()
+        await connection.execute(update(InvestmentDailyBalance).where(
+            and_(
+                InvestmentDailyBalance.investment_id == running.c.investment_id,
+                InvestmentDailyBalance.balance_date == running.c.balance_date,
+                InvestmentDailyBalance.cumulative_amount != running.c.cumulative_amount
+            )
+        ).values(cumulative_amount=running.c.cumulative_amount))
+    
+    async def _shift_daily(self, investment_id: int, balance_date: date, delta: int) -> None:
+        """Add `delta` to the day's net amount and to every cumulative from that day on."""
+        day_update = update(InvestmentDailyBalance).where(
+            and_(
+                InvestmentDailyBalance.investment_id == investment_id,
+                InvestmentDailyBalance.balance_date == balance_date
+            )
+        ).values(
+            net_amount=InvestmentDailyBalance.net_amount + delta
+        ).execution_options(synchronize_session=False)
+        day_exists = (await self.session.execute(day_update)).rowcount > 0
+        
+        if day_exists:
+            from_date_condition = InvestmentDailyBalance.balance_date >= balance_date
+        else:
+            previous_cumulative = select(InvestmentDailyBalance.cumulative_amount).where(
+                and_(
+                    InvestmentDailyBalance.investment_id == investment_id,
+                    InvestmentDailyBalance.balance_date < balance_date
+                )
+            ).order_by(InvestmentDailyBalance.balance_date.desc()).limit(1).scalar_subquery()
+            
+            await self.session.execute(insert(InvestmentDailyBalance).values(
+                investment_id=investment_id,
+                balance_date=balance_date,
+                net_amount=delta,
+                cumulative_amount=func.coalesce(previous_cumulative, 0) + delta
+            ))
+            from_date_condition = InvestmentDailyBalance.balance_date > balance_date
+        
+        await self.session.execute(update(InvestmentDailyBalance).where(
+            and_(
+                InvestmentDailyBalance.investment_id == investment_id,
+                from_date_condition
+            )
+        ).values(
+            cumulative_amount=InvestmentDailyBalance.cumulative_amount + delta
+        ).execution_options(synchronize_session=False))
+    
+    async def get_balances_as_of(self, investment_id: int,
+                                 dates: List[date]) -> Dict[date, int]:
+        """Get initial capital + cumulative ledger balance for each date, in one query.
+        
+        Each date is answered by an indexed range lookup on
+        `investment_daily_balances`; investments that predate the index fall
+        back to summing the ledger in SQL.
+        
+        Returns:
+            Dict mapping each requested date to its balance (empty if the
+            investment does not exist)
+        """
+        if not dates:
+            return {}
+        
+        unique_dates = sorted(set(dates))
+        as_of = union_all(*[
+            select(literal(d, Date).label("as_of")) for d in unique_dates
+        ]).subquery("as_of_dates")
+        
+        indexed_cumulative = select(InvestmentDailyBalance.cumulative_amount).where(
+            and_(
+                InvestmentDailyBalance.investment_id == investment_id,
+                InvestmentDailyBalance.balance_date <= as_of.c.as_of
+            )
+        ).order_by(InvestmentDailyBalance.balance_date.desc()).limit(1).scalar_subquery()
+        
+        ledger_cumulative = select(func.sum(Transaction.amount)).where(
+            and_(
+                Transaction.investment_id == investment_id,
+                Transaction.transaction_date <= as_of.c.as_of
+            )
+        ).scalar_subquery()
+        
+        has_index = exists().where(InvestmentBalance.investment_id == investment_id)
+        
+        stmt = select(
+            as_of.c.as_of,
+            type_coerce(Investment.initial_amount + func.coalesce(
+                case((has_index, indexed_cumulative), else_=ledger_cumulative), 0
+            ), Money),
+        ).select_from(as_of).join(Investment, Investment.id == investment_id)
+        
+        result = await self.session.execute(stmt)
+        return {row[0]: row[1] for row in result}
+    
+    async def apply_valuation(self, valuation: Valuation) -> None:
+        """Point the snapshot at `valuation` if it is now the latest one."""
+        current_date = select(Valuation.valuation_date).where(
+            Valuation.id == InvestmentBalance.latest_valuation_id
+        ).scalar_subquery()
+        
+        stmt = update(InvestmentBalance).where(
+            and_(
+                InvestmentBalance.investment_id == valuation.investment_id,
+                or_(
+                    InvestmentBalance.latest_valuation_id.is_(None),
+                    current_date <= valuation.valuation_date
+                )
+            )
+        ).values(latest_valuation_id=valuation.id).execution_options(synchronize_session=False)
+        
+        result = await self.session.execute(stmt)
+        if result.rowcount == 0 and await self.get_by_investment(valuation.investment_id) is None:
+            await self.rebuild(valuation.investment_id)
+    
+    async def apply_valuation_batch(self, in_batch, valuation_date: date) -> None:
+        """Set-based `apply_valuation` for valuations matching ``in_batch``.
+        
+        The batch must hold at most one valuation per investment, all dated
+        ``valuation_date``.
+        """
+        batch_id = select(Valuation.id).where(
+            and_(in_batch, Valuation.investment_id == InvestmentBalance.investment_id)
+        ).scalar_subquery()
+        current_date = select(Valuation.valuation_date).where(
+            Valuation.id == InvestmentBalance.latest_valuation_id
+        ).scalar_subquery()
+        
+        stmt = update(InvestmentBalance).where(
+            and_(
+                InvestmentBalance.investment_id.in_(select(Valuation.investment_id).where(in_batch)),
+                or_(
+                    InvestmentBalance.latest_valuation_id.is_(None),
+                    current_date <= valuation_date
+                )
+            )
+        ).values(latest_valuation_id=batch_id).execution_options(synchronize_session=False)
+        await self.session.execute(stmt)
+    
+    async def rebuild_missing(self) -> int:
+        """Build snapshot rows for investments that predate the snapshot table.
+        
+        Returns:
+            Number of investments rebuilt
+        """
+        stmt = select(Investment.id).where(
+            ~exists().where(InvestmentBalance.investment_id == Investment.id)
+        )
+        missing = (await self.session.execute(stmt)).scalars().all()
+        for investment_id in missing:
+            await self.rebuild(investment_id)
+        return len(missing)
+    
+    async def rebuild(self, investment_id: int = None) -> int:
+        """Recompute snapshot rows from the ledger (one investment or all).
+        
+        Returns:
+            Number of snapshot rows written
+        """
+        delete_stmt = delete(InvestmentBalance)
+        if investment_id is not None:
+            delete_stmt = delete_stmt.where(InvestmentBalance.investment_id == investment_id)
+        await self.session.execute(delete_stmt.execution_options(synchronize_session=False))
+        
+        summary = ledger_summary_query(investment_id).subquery()
+        insert_stmt = insert(InvestmentBalance).from_select(
+            [
+                "investment_id", "total_deposits", "total_withdrawals", "total_dividends",
+                "transaction_count", "last_transaction_date", "latest_valuation_id",
+            ],
+            select(
+                summary.c.id,
+                summary.c.deposits,
+                summary.c.withdrawals,
+                summary.c.dividends,
+                summary.c.transaction_count,
+                summary.c.last_transaction_date,
+                summary.c.latest_valuation_id,
+            )
+        )
+        result = await self.session.execute(insert_stmt)
+        await self._rebuild_daily(investment_id)
+        await self.session.flush()
+        return result.rowcount
+    
+    async def _rebuild_daily(self, investment_id: int = None) -> None:
+        """Recompute the cumulative daily index from the ledger."""
+        delete_stmt = delete(InvestmentDailyBalance)
+        if investment_id is not None:
+            delete_stmt = delete_stmt.where(InvestmentDailyBalance.investment_id == investment_id)
+        await self.session.execute(delete_stmt.execution_options(synchronize_session=False))
+        
+        await self.session.execute(insert(InvestmentDailyBalance).from_select(
+            ["investment_id", "balance_date", "net_amount", "cumulative_amount"],
+            daily_ledger_query(investment_id)
+        ))
+    
+    async def verify(self) -> List[Dict]:
+        """Compare every snapshot row with the ledger.
+        
+        Returns:
+            List of drift entries: investment_id, field, stored, expected
+        """
+        summary = ledger_summary_query().subquery()
+        stmt = select(summary, InvestmentBalance).outerjoin(
+            InvestmentBalance, InvestmentBalance.investment_id == summary.c.id
+        ).order_by(summary.c.id).execution_options(populate_existing=True)
+        result = await self.session.execute(stmt)
+        
+        expected_fields = {
+            "total_deposits": "deposits",
+            "total_withdrawals": "withdrawals",
+            "total_dividends": "dividends",
+            "transaction_count": "transaction_count",
+            "last_transaction_date": "last_transaction_date",
+            "latest_valuation_id": "latest_valuation_id",
+        }
+        
+        drift = []
+        for row in result:
+            balance = row.InvestmentBalance
+            if balance is None:
+                drift.append({
+                    "investment_id": row.id, "field": "missing",
+                    "stored": None, "expected": "snapshot row"
+                })
+                continue
+            
+            for field, column in expected_fields.items():
+                stored = getattr(balance, field)
+                expected = getattr(row, column)
+                if field in self.TOTAL_FIELDS:
+                    matches = abs((stored or 0) - (expected or 0)) <= self.DRIFT_TOLERANCE
+                else:
+                    matches = stored == expected
+                if not matches:
+                    drift.append({
+                        "investment_id": row.id, "field": field,
+                        "stored": stored, "expected": expected
+                    })
+        
+        drift.extend(await self._verify_daily())
+        return drift
+    
+    async def _verify_daily(self) -> List[Dict]:
+        """Compare the cumulative daily index with the ledger."""
+        expected = daily_ledger_query().subquery()
+        
+        missing_or_wrong = select(
+            expected.c.investment_id,
+            expected.c.balance_date,
+            InvestmentDailyBalance.cumulative_amount,
+            expected.c.cumulative_amount.label("expected_cumulative"),
+        ).outerjoin(
+            InvestmentDailyBalance,
+            and_(
+                InvestmentDailyBalance.investment_id == expected.c.investment_id,
+                InvestmentDailyBalance.balance_date == expected.c.balance_date
+            )
+        ).where(
+            or_(
+                InvestmentDailyBalance.cumulative_amount.is_(None),
+                func.abs(
+                    InvestmentDailyBalance.cumulative_amount - expected.c.cumulative_amount
+                ) > self.DRIFT_TOLERANCE
+            )
+        )
+        
+        # Index rows left on dates without ledger activity must net to zero
+        orphaned = select(
+            InvestmentDailyBalance.investment_id,
+            InvestmentDailyBalance.balance_date,
+            InvestmentDailyBalance.net_amount,
+        ).where(
+            and_(
+                func.abs(InvestmentDailyBalance.net_amount) > self.DRIFT_TOLERANCE,
+                ~exists().where(
+                    and_(
+                        Transaction.investment_id == InvestmentDailyBalance.investment_id,
+                        Transaction.transaction_date == InvestmentDailyBalance.balance_date
+                    )
+                )
+            )
+        )
+        
+        drift = [
+            {
+                "investment_id": row.investment_id,
+                "field": f"cumulative_amount@{row.balance_date}",
+                "stored": row.cumulative_amount,
+                "expected": row.expected_cumulative,
+            }
+            for row in await self.session.execute(missing_or_wrong)
+        ]
+        drift.extend(
+            {
+                "investment_id": row.investment_id,
+                "field": f"net_amount@{row.balance_date}",
+                "stored": row.net_amount,
+                "expected": 0,
+            }
+            for row in await self.session.execute(orphaned)
+        )
+        return drift
+
+
+class AnalyticsRepository:
+    """Read-only aggregates for admin reports.
+    
+    Every figure is a single GROUP BY / COUNT over indexed columns or the
+    balance snapshot, so cost does not grow with the rows returned.
+    """
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def count_users(self) -> Dict[Tuple[UserRole, bool], int]:
+        """Number of users per (role, is_verified)."""
+        stmt = select(User.role, User.is_verified, func.count(User.id)).group_by(
+            User.role, User.is_verified
+        )
+        return {(role, verified): count for role, verified, count in await self.session.execute(stmt)}
+    
+    async def aum_by_contract_type(self) -> List[Row]:
+        """Active investments per contract type with invested capital and current value.
+        
+        Invested capital is initial amount + deposits - withdrawals; current
+        value is the latest valuation, else invested capital + dividends (as in
+        `PortfolioService.get_portfolio_summary`).
+        """
+        deposits = func.coalesce(InvestmentBalance.total_deposits, 0)
+        withdrawals = func.coalesce(InvestmentBalance.total_withdrawals, 0)
+        dividends = func.coalesce(InvestmentBalance.total_dividends, 0)
+        invested = Investment.initial_amount + deposits - withdrawals
+        
+        stmt = select(
+            Investment.contract_type,
+            func.count(Investment.id).label("investment_count"),
+            type_coerce(func.coalesce(func.sum(invested), 0), Money).label("invested_capital"),
+            type_coerce(func.coalesce(func.sum(
+                func.coalesce(Valuation.new_value, invested + dividends)
+            ), 0), Money).label("current_value"),
+        ).outerjoin(
+            InvestmentBalance, InvestmentBalance.investment_id == Investment.id
+        ).outerjoin(
+            Valuation, Valuation.id == InvestmentBalance.latest_valuation_id
+        ).where(
+            Investment.status == InvestmentStatus.ACTIVE
+        ).group_by(Investment.contract_type)
+        
+        result = await self.session.execute(stmt)
+        return result.all()
+    
+    async def daily_flows(self, since: date) -> List[Row]:
+        """Ledger totals per (transaction_date, type) from ``since`` on."""
+        stmt = select(
+            Transaction.transaction_date,
+            Transaction.type,
+            func.sum(Transaction.amount).label("total"),
+        ).where(
+            Transaction.transaction_date >= since
+        ).group_by(Transaction.transaction_date, Transaction.type)
+        
+        result = await self.session.execute(stmt)
+        return result.all()
+    
+    async def count_transactions_since(self, since: date) -> int:
+        """Ledger rows dated ``since`` or later."""
+        stmt = select(func.count(Transaction.id)).where(Transaction.transaction_date >= since)
+        return (await self.session.execute(stmt)).scalar()
+    
+    async def count_active_investors_since(self, since: date) -> int:
+        """Investors with at least one ledger row dated ``since`` or later."""
+        stmt = select(func.count(func.distinct(Investment.user_id))).join(
+            Transaction, Transaction.investment_id == Investment.id
+        ).where(Transaction.transaction_date >= since)
+        return (await self.session.execute(stmt)).scalar()
+
+
+class OutboxRepository:
+    """Notification outbox operations.
+    
+    `enqueue` runs inside the caller's unit of work, so a message exists if and
+    only if the ledger change it announces was committed. The claim/mark methods
+    are used by `OutboxDispatcher` in its own short transactions.
+    """
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def enqueue(self, chat_id: int, text: str, dedup_key: str = None,
+                      parse_mode: Optional[str] = "HTML") -> bool:
+        """Queue a message. Returns False if ``dedup_key`` was already queued."""
+        values = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "dedup_key": dedup_key,
+            "status": OutboxStatus.PENDING,
+            "attempts": 0,
+            "next_attempt_at": datetime.utcnow(),
+            "created_at": datetime.utcnow(),
+        }
+        dialect_insert = (
+            postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        )
+        stmt = dialect_insert(OutboundMessage).values(**values)
+        if dedup_key is not None:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[OutboundMessage.dedup_key])
+        result = await self.session.execute(stmt)
+        return result.rowcount == 1
+    
+    async def enqueue_many(self, messages: List[Dict]) -> int:
+        """Queue many messages (dicts of chat_id, text, dedup_key) in one executemany.
+        
+        Returns:
+            Number of messages queued (duplicates of existing dedup keys are skipped)
+        """
+        if not messages:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {
+                "chat_id": message["chat_id"],
+                "text": message["text"],
+                "parse_mode": message.get("parse_mode", "HTML"),
+                "dedup_key": message.get("dedup_key"),
+                "status": OutboxStatus.PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for message in messages
+        ]
+        dialect_insert = (
+            postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        )
+        stmt = dialect_insert(OutboundMessage).on_conflict_do_nothing(
+            index_elements=[OutboundMessage.dedup_key]
+        )
+        connection = await self.session.connection()
+        result = await connection.execute(stmt, rows)
+        return result.rowcount
+    
+    async def claim_due(self, limit: int, lease_seconds: float) -> List[OutboundMessage]:
+        """Lease up to ``limit`` due messages, oldest first.
+        
+        Claimed rows move to SENDING until ``lease_seconds`` from now; if the
+        dispatcher dies before marking them, they become due again. On
+        PostgreSQL concurrent dispatchers skip each other's locked rows.
+        """
+        now = datetime.utcnow()
+        stmt = select(OutboundMessage).where(
+            and_(
+                OutboundMessage.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]),
+                OutboundMessage.next_attempt_at <= now
+            )
+        ).order_by(OutboundMessage.id).limit(limit)
+        if self.session.bind.dialect.name == "postgresql":
+            stmt = stmt.with_for_update(skip_locked=True)
+        
+        messages = (await self.session.execute(stmt)).scalars().all()
+        if messages:
+            lease_until = now + timedelta(seconds=lease_seconds)
+            await self.session.execute(
+                update(OutboundMessage)
+                .where(OutboundMessage.id.in_([message.id for message in messages]))
+                .values(status=OutboxStatus.SENDING, next_attempt_at=lease_until)
+                .execution_options(synchronize_session=False)
+            )
+        return messages
+    
+    async def mark_sent(self, message_ids: List[int]) -> None:
+        """Mark delivered messages as SENT."""
+        if message_ids:
+            await self.session.execute(
+                update(OutboundMessage)
+                .where(OutboundMessage.id.in_(message_ids))
+                .values(status=OutboxStatus.SENT, attempts=OutboundMessage.attempts + 1,
+                        sent_at=datetime.utcnow(), last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+    
+    async def mark_retry(self, message_id: int, attempts: int,
+                         next_attempt_at: datetime, error: str) -> None:
+        """Put a message back in the queue for another attempt."""
+        await self.session.execute(
+            update(OutboundMessage)
+            .where(OutboundMessage.id == message_id)
+            .values(status=OutboxStatus.PENDING, attempts=attempts,
+                    next_attempt_at=next_attempt_at, last_error=error)
+            .execution_options(synchronize_session=False)
+        )
+    
+    async def mark_failed(self, message_id: int, attempts: int, error: str) -> None:
+        """Give up on a message."""
+        await self.session.execute(
+            update(OutboundMessage)
+            .where(OutboundMessage.id == message_id)
+            .values(status=OutboxStatus.FAILED, attempts=attempts, last_error=error)
+            .execution_options(synchronize_session=False)
+        )
+    
+    async def count_by_status(self) -> Dict[OutboxStatus, int]:
+        """Number of outbox rows per status."""
+        stmt = select(OutboundMessage.status, func.count()).group_by(OutboundMessage.status)
+        return {status: count for status, count in await self.session.execute(stmt)}
@@ -0,0 +1,136 @@
+"""Bounded work queue between the webhook endpoint and the dispatcher.
+
+The webhook handler only validates and enqueues an update, so Telegram gets
+its response immediately. ``workers`` consumers feed updates to the
+dispatcher. Each chat is pinned to one worker (``chat_id % workers``), so
+updates from the same chat are handled one at a time and in arrival order,
+while different chats run concurrently.
+
+When a worker's queue is full, `UpdateQueue.put` waits up to
+``enqueue_timeout`` seconds and then gives up. The endpoint answers 503 and
+Telegram redelivers the update later.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from app.utils.logger import logger
+from app.utils.metrics import LATENCY_WINDOW, percentile
+
+
+class UpdateQueue:
+    """Sharded, bounded queue of Telegram updates with a fixed worker pool."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, workers: int = 8,
+                 max_size: int = 1000, enqueue_timeout: float = 2.0):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.max_size = max_size
+        self.enqueue_timeout = enqueue_timeout
+        per_worker = max(1, max_size // workers)
+        self._queues = [asyncio.Queue(maxsize=per_worker) for _ in range(workers)]
+        self._workers: List[asyncio.Task] = []
+
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._handle_ms = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    def shard_key(update: Update) -> int:
+        """Chat ID of the update (or user ID / update ID when there is no chat)."""
+        chat, user, _ = UserContextMiddleware.resolve_event_context(update)
+        if chat is not None:
+            return chat.id
+        if user is not None:
+            return user.id
+        return update.update_id
+
+    def start(self):
+        """Start the worker tasks."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(queue), name=f"update-worker-{i}")
+                for i, queue in enumerate(self._queues)
+            ]
+            logger.info(f"Update queue started with {len(self._workers)} workers")
+
+    async def stop(self, drain_timeout: Optional[float] = 10.0):
+        """Let queued updates finish (up to ``drain_timeout`` seconds), then stop."""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), drain_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Update queue stopped with {self.depth} updates still queued")
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def put(self, update: Update) -> bool:
+        """Enqueue an update; ``False`` if its shard stayed full past the timeout."""
+        queue = self._queues[self.shard_key(update) % len(self._queues)]
+        try:
+            await asyncio.wait_for(queue.put((update, time.perf_counter())), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"Update queue full, rejecting update {update.update_id}")
+            return False
+
+        self.enqueued += 1
+        return True
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            update, enqueued_at = await queue.get()
+            started = time.perf_counter()
+            self._wait_ms.append((started - enqueued_at) * 1000)
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to handle update {update.update_id}: {e}", exc_info=True)
+            finally:
+                self._handle_ms.append((time.perf_counter() - started) * 1000)
+                queue.task_done()
+
+    @property
+    def depth(self) -> int:
+        """Updates waiting across all shards."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    def metrics(self) -> dict:
+        """Queue depth, throughput counters and recent latency percentiles."""
+        wait_ms = list(self._wait_ms)
+        handle_ms = list(self._handle_ms)
+        return {
+            "depth": self.depth,
+            "max_size": self.max_size,
+            "shard_depths": [queue.qsize() for queue in self._queues],
+            "workers": len(self._workers),
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_wait_ms": {
+                "p50": percentile(wait_ms, 0.5),
+                "p95": percentile(wait_ms, 0.95),
+                "max": max(wait_ms, default=0.0),
+            },
+            "handle_ms": {
+                "p50": percentile(handle_ms, 0.5),
+                "p95": percentile(handle_ms, 0.95),
+                "max": max(handle_ms, default=0.0),
+            },
+        }
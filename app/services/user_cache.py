@@ -0,0 +1,164 @@
+"""Process-wide cache of authenticated users keyed by Telegram ID.
+
+Handlers receive a `CachedUser` snapshot (never an ORM object, which would
+be bound to a closed session) through `AuthMiddleware`. Entries for verified
+users, which grant access, expire after ``USER_CACHE_GRANT_TTL_SECONDS``;
+unknown and unverified senders after ``USER_CACHE_TTL_SECONDS``. The least
+recently used entries are evicted past ``USER_CACHE_MAX_SIZE``.
+
+Any flush that inserts, edits or deletes a `User` queues that user's Telegram
+IDs (old and new) for invalidation once the transaction commits, so
+`UserRepository.verify_user`, `update_role` and direct attribute edits in
+handlers are all covered. Bulk ``update(User)`` statements bypass the ORM and
+must call `user_cache.invalidate` themselves.
+
+Other bot processes and the API are not notified of these edits. So that a
+demotion made elsewhere takes effect at once, `AuthMiddleware` re-reads the
+role and verification of `PRIVILEGED_ROLES` users from the primary on every
+update (`UserRepository.get_access`); for everyone else a grant revoked
+elsewhere is served for at most the grant TTL.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import User, UserRole
+
+PENDING_KEY = "user_cache_invalidations"
+
+# Roles whose cached rights are re-checked against the database on every update
+PRIVILEGED_ROLES = frozenset({UserRole.ADMIN, UserRole.ACCOUNTANT})
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Detached, read-only view of a `User` row."""
+    id: int
+    telegram_id: int
+    phone_number: str
+    name: str
+    role: UserRole
+    is_verified: bool
+    verified_at: Optional[datetime]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            phone_number=user.phone_number,
+            name=user.name,
+            role=user.role,
+            is_verified=user.is_verified,
+            verified_at=user.verified_at,
+            created_at=user.created_at,
+        )
+
+
+class UserCache:
+    """TTL + LRU cache of `CachedUser` (or ``None`` for unknown IDs)."""
+
+    def __init__(self, ttl_seconds: float, max_size: int, grant_ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.grant_ttl_seconds = grant_ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[float, Optional[CachedUser]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+        self.revalidations = 0
+        self.revoked = 0
+
+    def get(self, telegram_id: int) -> Tuple[bool, Optional[CachedUser]]:
+        """Return ``(found, user)``; ``user`` may be ``None`` for a cached miss."""
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[telegram_id]
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return True, entry[1]
+
+    def set(self, telegram_id: int, user: Optional[CachedUser]):
+        """Store a lookup result, evicting the least recently used entries."""
+        ttl = self.grant_ttl_seconds if user is not None and user.is_verified else self.ttl_seconds
+        self._entries[telegram_id] = (time.monotonic() + ttl, user)
+        self._entries.move_to_end(telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: int):
+        """Drop one Telegram ID."""
+        self._entries.pop(telegram_id, None)
+
+    def clear(self):
+        """Drop every entry (statistics are kept)."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit ratio and DB lookups saved since startup.
+
+        Each hit replaces the ``get_by_telegram_id`` query the update would
+        otherwise have issued, except hits on privileged users, which are
+        revalidated with a query of their own.
+        """
+        lookups = self.hits + self.misses
+        saved = self.hits - self.revalidations
+        return {
+            "size": len(self._entries),
+            "updates": self.updates,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "queries_saved": saved,
+            "queries_saved_per_update": saved / self.updates if self.updates else 0.0,
+            "revalidations": self.revalidations,
+            "revoked": self.revoked,
+        }
+
+
+user_cache = UserCache(
+    settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_GRANT_TTL_SECONDS
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _queue_user_invalidations(session: Session, flush_context):
+    """Remember the Telegram IDs of users touched by this flush."""
+    pending = session.info.setdefault(PENDING_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, User):
+            continue
+        history = inspect(obj).attrs.telegram_id.history
+        pending.update(tid for tid in (*history.added, *history.unchanged, *history.deleted) if tid)
+
+    # Invalidate right away as well so this process never serves the old row
+    # between flush and commit.
+    for telegram_id in pending:
+        user_cache.invalidate(telegram_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_invalidations(session: Session):
+    """Invalidate users touched by the committed transaction.
+
+    A concurrent update may have re-cached the pre-commit row in the meantime.
+    """
+    for telegram_id in session.info.pop(PENDING_KEY, ()):
+        user_cache.invalidate(telegram_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_invalidations(session: Session):
+    session.info.pop(PENDING_KEY, None)
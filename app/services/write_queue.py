@@ -0,0 +1,194 @@
+"""Serialized, group-committed writes for SQLite deployments.
+
+SQLite allows one writer at a time. When handlers commit from their own
+sessions, bursts of writes contend for the lock and the losers wait out
+``busy_timeout`` or fail with "database is locked". With
+``WRITE_QUEUE_ENABLED`` the handlers instead hand their writes to
+`WriteQueue`. A single writer task runs them, so nothing contends for the
+lock. Reads keep using the handlers' own sessions and run concurrently
+(WAL).
+
+A write unit is an async callable taking an `AsyncSession`. It makes its
+changes and returns a result, but does not commit. The writer runs every
+unit queued since its last commit in one transaction (``BEGIN IMMEDIATE``
+on SQLite) and commits once, so a burst costs one commit instead of one per
+write. Units run in queue order, so each sees the writes queued before it.
+When a unit raises, the transaction is rolled back, its caller gets the
+exception and the rest of the batch runs again without it. Units may
+therefore run more than once: they must only touch the database.
+
+Units run on the writer's session: they must load the rows they change
+there rather than modify objects from the caller's session. Returned ORM
+objects stay readable after the commit (``expire_on_commit=False``).
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database.routing import pin_to_primary
+from app.database.session import AsyncSessionLocal
+from app.utils.logger import logger
+from app.utils.metrics import LATENCY_WINDOW, percentile
+
+T = TypeVar("T")
+WriteUnit = Callable[[AsyncSession], Awaitable[T]]
+QueuedUnit = Tuple[WriteUnit, asyncio.Future, float]
+
+
+class WriteQueue:
+    """One writer task that group-commits queued write units."""
+
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int = 64,
+                 max_size: int = 1000):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+        self.committed = 0
+        self.failed = 0
+        self.commits = 0
+        self.retried_batches = 0
+        self._batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None
+
+    def start(self):
+        """Start the writer task."""
+        if self._writer is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._writer = asyncio.create_task(self._write_loop(), name="write-queue")
+            logger.info(f"Write queue started (batches of up to {self.max_batch})")
+
+    async def stop(self):
+        """Commit the units already queued, then stop the writer."""
+        if self._writer is None:
+            return
+        await self._queue.join()
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+        self._writer = None
+        self._queue = None
+
+    async def run(self, session: AsyncSession, unit: WriteUnit[T]) -> T:
+        """Run ``unit`` and commit it; returns the unit's result.
+
+        Goes through the writer task when the queue is running. Otherwise the
+        unit runs on ``session`` (the caller's) and is committed there. Either
+        way ``session`` reads from the primary afterwards (read-your-writes).
+        """
+        pin_to_primary(session)
+        if self._writer is None:
+            result = await unit(session)
+            await session.commit()
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((unit, future, time.perf_counter()))
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            started = time.perf_counter()
+            self._wait_ms.extend((started - queued_at) * 1000 for _, _, queued_at in batch)
+            # Skip callers that were cancelled while waiting
+            pending = [item for item in batch if not item[1].done()]
+            try:
+                while pending:
+                    pending = await self._commit(pending)
+            except Exception as e:
+                logger.error(f"Write queue failed: {e}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _begin(self, session: AsyncSession):
+        if session.bind.dialect.name == "sqlite":
+            # Take the write lock up front: upgrading a read transaction to a
+            # write can fail with SQLITE_BUSY without waiting for busy_timeout
+            await (await session.connection()).exec_driver_sql("BEGIN IMMEDIATE")
+
+    async def _commit(self, batch: List[QueuedUnit]) -> List[QueuedUnit]:
+        """Run ``batch`` in one transaction and resolve its futures.
+
+        Returns the units to run again: when a unit raises, the transaction is
+        rolled back, that unit's caller gets the exception and the rest of the
+        batch is returned. If the transaction itself fails (begin or commit),
+        every caller in the batch gets the error.
+        """
+        results, failed = [], None
+        try:
+            async with self.session_factory() as session:
+                pin_to_primary(session)
+                await self._begin(session)
+                for index, (unit, _, _) in enumerate(batch):
+                    try:
+                        results.append(await unit(session))
+                    except Exception as e:
+                        failed = index, e
+                        break
+                else:
+                    await session.commit()
+        except Exception as e:
+            self.failed += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return []
+
+        if failed is not None:
+            index, error = failed
+            self.failed += 1
+            self.retried_batches += len(batch) > 1
+            if not batch[index][1].done():
+                batch[index][1].set_exception(error)
+            return batch[:index] + batch[index + 1:]
+
+        self.commits += 1
+        self.committed += len(batch)
+        self._batch_sizes.append(len(batch))
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        return []
+
+    def metrics(self) -> dict:
+        """Queue depth, commit counters and recent batch sizes / queue waits."""
+        sizes = list(self._batch_sizes)
+        wait_ms = list(self._wait_ms)
+        return {
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "committed": self.committed,
+            "failed": self.failed,
+            "commits": self.commits,
+            "retried_batches": self.retried_batches,
+            "batch_size": {
+                "mean": sum(sizes) / len(sizes) if sizes else 0.0,
+                "max": max(sizes, default=0),
+            },
+            "queue_wait_ms": {
+                "p50": percentile(wait_ms, 0.5),
+                "p95": percentile(wait_ms, 0.95),
+            },
+        }
+
+
+write_queue = WriteQueue(
+    AsyncSessionLocal,
+    max_batch=settings.WRITE_QUEUE_MAX_BATCH,
+    max_size=settings.WRITE_QUEUE_SIZE,
+)
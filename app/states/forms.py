@@ -26,6 +26,15 @@ class ValuationFSM(StatesGroup):
     waiting_confirmation = State()
 
 
+class BulkValuationFSM(StatesGroup):
+    """States for bulk valuation update flow (admin)."""
+    waiting_mode = State()  # Percentage for all or CSV upload
+    waiting_contract_type = State()
+    waiting_percentage_input = State()
+    waiting_csv_upload = State()
+    waiting_confirmation = State()
+
+
 class SearchFSM(StatesGroup):
     """States for investor search flow."""
     waiting_search_query = State()
@@ -0,0 +1,339 @@
+"""Persistent FSM storage backends.
+
+`FSM_STORAGE` selects the backend:
+
+- ``memory``: aiogram `MemoryStorage` (single process, lost on restart)
+- ``sql``: `SQLStorage`, the ``fsm_states`` table in the main database
+- ``redis``: aiogram `RedisStorage` (or any Redis-compatible server), which
+  needs the optional ``redis`` package
+
+The persistent backends coalesce writes: inside `BufferedStorage.buffer()`
+(opened once per update by `FSMWriteBufferMiddleware`) a key is loaded once
+and all `set_state`/`set_data`/`update_data` calls are written back in a
+single save when the update finishes. The key stays locked until then, so
+overlapping updates of one chat in this process take turns instead of
+overwriting each other's write-back; an update that raises writes nothing
+back. The lock is per process: updates of one chat must be handled by a
+single process for it to cover them.
+
+FSM data is stored as JSON. Dates and datetimes round-trip; tuples come back
+as lists.
+"""
+
+import asyncio
+import json
+from abc import abstractmethod
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.models.models import FSMRecord
+from app.utils.logger import logger
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(value: dict) -> Any:
+    if len(value) == 1:
+        if "__date__" in value:
+            return date.fromisoformat(value["__date__"])
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+    return value
+
+
+def dumps_data(data: Dict[str, Any]) -> str:
+    """Serialize FSM data to JSON."""
+    return json.dumps(data, default=_json_default, ensure_ascii=False)
+
+
+def loads_data(raw: Optional[str]) -> Dict[str, Any]:
+    """Deserialize FSM data written by `dumps_data`."""
+    return json.loads(raw, object_hook=_json_object_hook) if raw else {}
+
+
+def build_key(key: StorageKey) -> str:
+    """Flatten a `StorageKey` into ``bot:chat:user:thread:destiny``."""
+    thread = key.thread_id if key.thread_id is not None else ""
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{thread}:{key.destiny}"
+
+
+@dataclass
+class _BufferedRecord:
+    state: Optional[str]
+    data: Dict[str, Any] = field(default_factory=dict)
+    dirty: bool = False
+
+
+_buffer: ContextVar[Optional[Dict[StorageKey, _BufferedRecord]]] = ContextVar(
+    "fsm_write_buffer", default=None
+)
+
+
+class _KeyLocks:
+    """One `asyncio.Lock` per storage key, dropped once nobody holds or awaits it."""
+
+    def __init__(self):
+        self._locks: Dict[StorageKey, Tuple[asyncio.Lock, int]] = {}
+
+    async def acquire(self, key: StorageKey):
+        lock, users = self._locks.get(key) or (asyncio.Lock(), 0)
+        self._locks[key] = (lock, users + 1)
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._forget(key)
+            raise
+
+    def release(self, key: StorageKey):
+        self._locks[key][0].release()
+        self._forget(key)
+
+    def _forget(self, key: StorageKey):
+        lock, users = self._locks[key]
+        if users == 1:
+            del self._locks[key]
+        else:
+            self._locks[key] = (lock, users - 1)
+
+
+class BufferedStorage(BaseStorage):
+    """FSM storage that loads and saves state and data together, once per update.
+
+    Subclasses implement `_load` and `_save`. Outside `buffer()` every call
+    goes straight to the backend.
+    """
+
+    def __init__(self):
+        self._locks = _KeyLocks()
+        self.loads = 0
+        self.saves = 0
+        self.writes = 0
+
+    @abstractmethod
+    async def _load(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Return ``(state, data)`` for ``key``; ``(None, {})`` if absent or expired."""
+
+    @abstractmethod
+    async def _save(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        """Persist ``state`` and ``data`` for ``key``, deleting it when both are empty."""
+
+    @asynccontextmanager
+    async def buffer(self):
+        """Coalesce reads and writes until the block exits.
+
+        Keys used in the block are locked from their first load until the
+        write-back. Nothing is written back if the block raises.
+        """
+        if _buffer.get() is not None:
+            yield
+            return
+
+        records: Dict[StorageKey, _BufferedRecord] = {}
+        token = _buffer.set(records)
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            _buffer.reset(token)
+            try:
+                for key, record in records.items():
+                    if completed and record.dirty:
+                        await self._save(key, record.state, record.data)
+                        self.saves += 1
+            finally:
+                for key in records:
+                    self._locks.release(key)
+
+    async def _record(self, key: StorageKey) -> _BufferedRecord:
+        records = _buffer.get()
+        record = records.get(key) if records is not None else None
+        if record is None:
+            if records is None:
+                state, data = await self._load(key)
+                self.loads += 1
+                return _BufferedRecord(state, data)
+
+            await self._locks.acquire(key)
+            try:
+                state, data = await self._load(key)
+            except BaseException:
+                self._locks.release(key)
+                raise
+            self.loads += 1
+            record = records[key] = _BufferedRecord(state, data)
+        return record
+
+    async def _write(self, key: StorageKey, record: _BufferedRecord):
+        self.writes += 1
+        if _buffer.get() is None:
+            await self._save(key, record.state, record.data)
+            self.saves += 1
+        else:
+            record.dirty = True
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._write(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._record(key)
+        record.data = data.copy()
+        await self._write(key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._record(key)).data.copy()
+
+    def stats(self) -> dict:
+        """Backend round trips versus FSM writes requested by handlers."""
+        return {
+            "loads": self.loads,
+            "saves": self.saves,
+            "writes": self.writes,
+            "writes_coalesced": self.writes - self.saves,
+        }
+
+
+class SQLStorage(BufferedStorage):
+    """FSM storage in the ``fsm_states`` table.
+
+    Every save pushes `expires_at` forward by ``state_ttl`` seconds; expired
+    rows read as empty and are deleted by `purge_expired`.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, state_ttl: float):
+        super().__init__()
+        self.session_factory = session_factory
+        self.state_ttl = state_ttl
+        self._purge_task: Optional[asyncio.Task] = None
+
+    async def _load(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        stmt = select(FSMRecord.state, FSMRecord.data).where(
+            FSMRecord.key == build_key(key),
+            FSMRecord.expires_at > datetime.utcnow()
+        )
+        async with self.session_factory() as session:
+            row = (await session.execute(stmt)).first()
+        if row is None:
+            return None, {}
+        return row.state, loads_data(row.data)
+
+    async def _save(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        storage_key = build_key(key)
+        async with self.session_factory() as session:
+            if state is None and not data:
+                await session.execute(delete(FSMRecord).where(FSMRecord.key == storage_key))
+            else:
+                now = datetime.utcnow()
+                values = {
+                    "state": state,
+                    "data": dumps_data(data),
+                    "expires_at": now + timedelta(seconds=self.state_ttl),
+                    "updated_at": now,
+                }
+                await session.execute(self._upsert(session.bind.dialect.name, storage_key, values))
+            await session.commit()
+
+    @staticmethod
+    def _upsert(dialect_name: str, storage_key: str, values: dict):
+        """INSERT ... ON CONFLICT (key) DO UPDATE for the active backend."""
+        dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+        stmt = dialect_insert(FSMRecord).values(key=storage_key, **values)
+        return stmt.on_conflict_do_update(index_elements=[FSMRecord.key], set_=values)
+
+    async def purge_expired(self) -> int:
+        """Delete abandoned flows past their TTL. Returns the number of rows removed."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(FSMRecord).where(FSMRecord.expires_at <= datetime.utcnow())
+            )
+            await session.commit()
+        return result.rowcount
+
+    def start_purge_task(self, interval: float):
+        """Run `purge_expired` every ``interval`` seconds until `close`."""
+        if self._purge_task is None:
+            self._purge_task = asyncio.create_task(self._purge_loop(interval))
+
+    async def _purge_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await self.purge_expired()
+                if removed:
+                    logger.info(f"Purged {removed} expired FSM states")
+            except Exception as e:
+                logger.error(f"Failed to purge expired FSM states: {e}")
+
+    async def close(self) -> None:
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            self._purge_task = None
+
+
+class RedisBufferedStorage(BufferedStorage):
+    """Write coalescing on top of aiogram's `RedisStorage` (TTL handled by Redis)."""
+
+    def __init__(self, redis_storage: BaseStorage):
+        super().__init__()
+        self.redis_storage = redis_storage
+
+    async def _load(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        return await self.redis_storage.get_state(key), await self.redis_storage.get_data(key)
+
+    async def _save(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        await self.redis_storage.set_state(key, state)
+        await self.redis_storage.set_data(key, data)
+
+    async def close(self) -> None:
+        await self.redis_storage.close()
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Build the FSM storage selected by ``FSM_STORAGE``."""
+    backend = settings.FSM_STORAGE.lower()
+
+    if backend == "memory":
+        return MemoryStorage()
+
+    if backend == "sql":
+        return SQLStorage(AsyncSessionLocal, settings.FSM_STATE_TTL_SECONDS)
+
+    if backend == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError("FSM_STORAGE=redis requires the 'redis' package") from e
+
+        ttl = int(settings.FSM_STATE_TTL_SECONDS)
+        return RedisBufferedStorage(RedisStorage.from_url(
+            settings.FSM_REDIS_URL,
+            state_ttl=ttl,
+            data_ttl=ttl,
+            json_dumps=dumps_data,
+            json_loads=loads_data,
+        ))
+
+    raise ValueError(f"Unknown FSM_STORAGE backend: {settings.FSM_STORAGE}")
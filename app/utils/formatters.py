@@ -1,18 +1,22 @@
-from datetime import date, datetime
+import csv
+import io
+from datetime import date
 import jdatetime
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils import jalali
+from app.utils.jalali import MONTH_NAMES as JALALI_MONTH_NAMES
+from app.utils.money import to_money
 
 
 def gregorian_to_jalali(gregorian_date: date) -> jdatetime.date:
     """Convert Gregorian date to Jalali date."""
-    if isinstance(gregorian_date, datetime):
-        gregorian_date = gregorian_date.date()
-    return jdatetime.date.fromgregorian(gregorian_date)
+    return jdatetime.date(*jalali.to_jalali(gregorian_date))
 
 
 def jalali_to_gregorian(jalali_date: jdatetime.date) -> date:
     """Convert Jalali date to Gregorian date."""
-    return jalali_date.togregorian()
+    return jalali.to_gregorian(jalali_date.year, jalali_date.month, jalali_date.day)
 
 
 def format_jalali_date(gregorian_date: date, format_str: str = "%A %d, %Y") -> str:
@@ -25,17 +29,19 @@ def format_jalali_date(gregorian_date: date, format_str: str = "%A %d, %Y") -> s
     Returns:
         Formatted Persian date string
     """
-    jalali_date = gregorian_to_jalali(gregorian_date)
-    
-    # Persian month names
-    month_names_fa = {
-        1: "فروردین", 2: "اردیبهشت", 3: "خرداد",
-        4: "تیر", 5: "مرداد", 6: "شهریور",
-        7: "مهر", 8: "آبان", 9: "آذر",
-        10: "دی", 11: "بهمن", 12: "اسفند"
-    }
+    return jalali.format_date(gregorian_date)
+
+
+def format_jalali_dates(gregorian_dates: Iterable[date]) -> List[str]:
+    """Format a list of dates in Jalali calendar in one pass.
+    
+    Args:
+        gregorian_dates: Dates to format
     
-    return f"{month_names_fa[jalali_date.month]} {jalali_date.day}, {jalali_date.year}"
+    Returns:
+        Formatted Persian date strings, in the same order
+    """
+    return jalali.format_dates(gregorian_dates)
 
 
 def format_currency(amount: float) -> str:
@@ -52,21 +58,21 @@ def format_currency(amount: float) -> str:
     return f"{formatted_amount} تومان"
 
 
-def parse_currency_input(text: str) -> Optional[float]:
+def parse_currency_input(text: str) -> Optional[int]:
     """Parse user input as currency amount.
     
     Args:
         text: User input (e.g., "500000000", "5e8", "500,000,000")
     
     Returns:
-        Parsed amount or None if invalid
+        Parsed amount in whole Tomans or None if invalid
     """
     try:
         # Remove commas and spaces
         text = text.replace(",", "").replace(" ", "")
         
-        # Try to parse as float
-        amount = float(text)
+        # Parse exactly (no float round-trip) and round to whole Tomans
+        amount = to_money(text)
         
         # Validate reasonable range (>0, < 100 billion)
         if amount <= 0 or amount > 100_000_000_000:
@@ -77,6 +83,38 @@ def parse_currency_input(text: str) -> Optional[float]:
         return None
 
 
+def parse_valuation_csv(text: str) -> Dict[int, int]:
+    """Parse a bulk valuation CSV of ``investment_id,new_value`` rows.
+    
+    A header row is optional; values may use thousands separators if quoted.
+    
+    Args:
+        text: CSV file contents
+    
+    Returns:
+        Mapping of investment ID to new value (later rows win)
+    
+    Raises:
+        ValueError: On a malformed row, with its line number
+    """
+    values = {}
+    for line_number, row in enumerate(csv.reader(io.StringIO(text.lstrip("\ufeff"))), start=1):
+        if not row or not "".join(row).strip():
+            continue
+        if len(row) < 2:
+            raise ValueError(f"Line {line_number}: expected investment_id,new_value")
+        
+        investment_id, raw_value = row[0].strip(), row[1].strip()
+        if line_number == 1 and not investment_id.isdigit():
+            continue  # Header
+        
+        amount = parse_currency_input(raw_value)
+        if not investment_id.isdigit() or amount is None:
+            raise ValueError(f"Line {line_number}: invalid row {row[:2]}")
+        values[int(investment_id)] = amount
+    return values
+
+
 def format_phone_number(phone: str) -> str:
     """Format phone number to standard format (0912XXXXXXXX)."""
     phone = phone.replace(" ", "").replace("-", "").strip()
@@ -163,7 +201,6 @@ def parse_jalali_date_parts(year: int, month: int, day: int) -> Optional[date]:
         Gregorian date or None if invalid
     """
     try:
-        jalali_date = jdatetime.date(year, month, day)
-        return jalali_date.togregorian()
+        return jalali.to_gregorian(year, month, day)
     except (ValueError, OverflowError):
         return None
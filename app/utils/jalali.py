@@ -0,0 +1,133 @@
+"""Precomputed Gregorian ↔ Jalali conversion.
+
+`jdatetime` converts with arithmetic and builds an object per call, which
+dominates the cost of rendering a page of dates. This module precomputes the
+Jalali (year, month, day) of every Gregorian day from `MIN_DATE` to
+`MAX_DATE` into compact arrays indexed by ``date.toordinal()``, plus the
+ordinal of each Jalali new year for the reverse direction. The table is built
+on first use (~73k days, a few tens of milliseconds) and conversions
+afterwards are index lookups.
+
+Dates outside the table fall back to `jdatetime`.
+"""
+
+from array import array
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+import jdatetime
+
+MIN_DATE = date(1900, 1, 1)
+MAX_DATE = date(2100, 12, 31)
+
+# Persian month names
+MONTH_NAMES = {
+    1: "فروردین", 2: "اردیبهشت", 3: "خرداد",
+    4: "تیر", 5: "مرداد", 6: "شهریور",
+    7: "مهر", 8: "آبان", 9: "آذر",
+    10: "دی", 11: "بهمن", 12: "اسفند"
+}
+
+# Days before each month of a Jalali year (months 1-6 have 31 days, 7-11 have 30)
+_MONTH_OFFSETS = tuple(31 * min(m, 6) + 30 * max(0, m - 6) for m in range(12))
+
+_BASE = MIN_DATE.toordinal()
+_years: Optional[array] = None
+_months: Optional[array] = None
+_days: Optional[array] = None
+_nowruz = {}  # Jalali year -> ordinal of 1 Farvardin
+
+
+def month_length(year: int, month: int) -> int:
+    """Days in a Jalali month."""
+    if month <= 6:
+        return 31
+    if month <= 11:
+        return 30
+    return 30 if jdatetime.date(year, 1, 1).isleap() else 29
+
+
+def _build():
+    global _years, _months, _days
+    size = MAX_DATE.toordinal() - _BASE + 1
+    years, months, days = array("H", bytes(2 * size)), array("B", bytes(size)), array("B", bytes(size))
+
+    start = jdatetime.date.fromgregorian(date=MIN_DATE)
+    year, month, day = start.year, start.month, start.day
+    length = month_length(year, month)
+    _nowruz[year] = _BASE - _MONTH_OFFSETS[month - 1] - (day - 1)
+
+    for i in range(size):
+        years[i], months[i], days[i] = year, month, day
+        day += 1
+        if day > length:
+            day = 1
+            month += 1
+            if month > 12:
+                month = 1
+                year += 1
+                _nowruz[year] = _BASE + i + 1
+            length = month_length(year, month)
+
+    _years, _months, _days = years, months, days
+
+
+def _table():
+    if _years is None:
+        _build()
+    return _years, _months, _days
+
+
+def to_jalali(gregorian_date: date) -> Tuple[int, int, int]:
+    """Jalali (year, month, day) of a Gregorian date or datetime."""
+    years, months, days = _table()
+    i = gregorian_date.toordinal() - _BASE
+    if 0 <= i < len(years):
+        return years[i], months[i], days[i]
+    if isinstance(gregorian_date, datetime):
+        gregorian_date = gregorian_date.date()
+    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
+    return jalali.year, jalali.month, jalali.day
+
+
+def to_jalali_many(dates: Iterable[date]) -> List[Tuple[int, int, int]]:
+    """`to_jalali` for a whole sequence of dates."""
+    years, months, days = _table()
+    size = len(years)
+    result = []
+    for gregorian_date in dates:
+        i = gregorian_date.toordinal() - _BASE
+        if 0 <= i < size:
+            result.append((years[i], months[i], days[i]))
+        else:
+            result.append(to_jalali(gregorian_date))
+    return result
+
+
+def to_gregorian(year: int, month: int, day: int) -> date:
+    """Gregorian date of a Jalali (year, month, day).
+
+    Raises:
+        ValueError: If the Jalali date does not exist
+    """
+    _table()
+    if not 1 <= month <= 12 or not 1 <= day <= month_length(year, month):
+        raise ValueError(f"Invalid Jalali date: {year}/{month}/{day}")
+    nowruz = _nowruz.get(year)
+    if nowruz is None:
+        return jdatetime.date(year, month, day).togregorian()
+    return date.fromordinal(nowruz + _MONTH_OFFSETS[month - 1] + day - 1)
+
+
+def format_date(gregorian_date: date) -> str:
+    """Persian date string, e.g. ``فروردین 1, 1403``."""
+    year, month, day = to_jalali(gregorian_date)
+    return f"{MONTH_NAMES[month]} {day}, {year}"
+
+
+def format_dates(dates: Iterable[date]) -> List[str]:
+    """`format_date` for a whole sequence of dates."""
+    return [
+        f"{MONTH_NAMES[month]} {day}, {year}"
+        for year, month, day in to_jalali_many(dates)
+    ]
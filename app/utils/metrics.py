@@ -0,0 +1,19 @@
+"""Helpers for the in-process latency metrics of the background services."""
+
+from typing import Iterable
+
+# Recent samples kept per latency series
+LATENCY_WINDOW = 1000
+
+
+def percentile(samples: Iterable[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples`` (0.0 when there are none).
+
+    Args:
+        samples: Recent measurements, in any order
+        fraction: Percentile as a fraction, e.g. 0.95 for p95
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
@@ -0,0 +1,58 @@
+"""Money amounts as whole Tomans.
+
+Every amount in the ledger (initial capital, transactions, valuations and
+the balance snapshots) is stored as a BIGINT number of Tomans via the `Money`
+column type, so sums are exact and aggregates run on integers. Values are
+rounded half away from zero on the way in: floats from percentage maths,
+Decimals from the database driver and user input all go through `to_money`.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Optional, Union
+
+from pydantic import BeforeValidator
+from sqlalchemy import BigInteger, Float, Numeric
+from sqlalchemy.types import TypeDecorator
+
+Number = Union[int, float, Decimal, str]
+
+
+def to_money(value: Number) -> int:
+    """Round an amount to whole Tomans.
+
+    Raises:
+        ValueError: If ``value`` is not a finite number
+    """
+    if isinstance(value, int):
+        return value
+    try:
+        amount = Decimal(str(value).replace(",", "")) if isinstance(value, str) else Decimal(value)
+        return int(amount.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (ArithmeticError, ValueError) as e:
+        raise ValueError(f"Invalid money amount: {value!r}") from e
+
+
+class Money(TypeDecorator):
+    """BIGINT column holding whole Tomans; binds round, results are ``int``."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[Number], dialect) -> Optional[int]:
+        return None if value is None else to_money(value)
+
+    def coerce_compared_value(self, op, value):
+        # Factors such as 1.032 in ``amount * 1.032`` must not be rounded to Tomans
+        if isinstance(value, float):
+            return Float()
+        if isinstance(value, Decimal):
+            return Numeric()
+        return self
+
+    def process_result_value(self, value, dialect) -> Optional[int]:
+        # SUM() over BIGINT comes back as NUMERIC (Decimal) on PostgreSQL
+        return None if value is None else to_money(value)
+
+
+# Pydantic field type: accepts numbers (or numeric strings), rounds to whole Tomans
+MoneyAmount = Annotated[int, BeforeValidator(to_money)]
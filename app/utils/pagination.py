@@ -0,0 +1,25 @@
+"""Opaque cursors for keyset pagination."""
+
+import base64
+from datetime import date
+from typing import Tuple
+
+
+def encode_cursor(sort_date: date, row_id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque URL-safe token."""
+    raw = f"{sort_date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a token produced by `encode_cursor`.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_date, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return date.fromisoformat(sort_date), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
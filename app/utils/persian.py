@@ -0,0 +1,84 @@
+"""Persian text normalization for search.
+
+Names and queries are folded to one spelling before they are compared, so
+Arabic and Persian letter variants (ي/ی, ك/ک, ة/ه, hamza forms), diacritics,
+tatweel and Persian/Arabic-Indic digits all match their plain forms.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+ZWNJ = "\u200c"
+
+_DIGITS = {
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # Persian digits
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic-Indic digits
+}
+_FOLD_DIGITS = str.maketrans(_DIGITS)
+_FOLD = str.maketrans({
+    **_DIGITS,
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و",
+    "ـ": None,  # Tatweel
+    "\u200d": None,  # ZWJ
+    **{chr(0x064B + i): None for i in range(0x0660 - 0x064B)},  # Harakat
+    "ٰ": None,  # Superscript alef
+})
+
+_SEPARATORS = re.compile(r"[^\w\u200c]+")
+
+# Longest indexed term (`UserSearchTerm.term`)
+MAX_TERM_LENGTH = 64
+
+
+def fold_digits(text: str) -> str:
+    """Convert Persian and Arabic-Indic digits to ASCII digits."""
+    return text.translate(_FOLD_DIGITS)
+
+
+def normalize_text(text: str) -> str:
+    """Fold ``text`` to its search spelling: one space between words.
+
+    Half-spaces (ZWNJ) are kept so `search_terms` can split compound words.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_FOLD).casefold()
+    return " ".join(_SEPARATORS.sub(" ", text).replace("_", " ").split())
+
+
+def search_terms(name: str) -> List[str]:
+    """Indexed words of ``name``, in order and without duplicates.
+
+    A half-space compound (``مهدی‌زاده``) is indexed joined (``مهدیزاده``) and
+    as its parts, so it is found however the half-space is typed.
+    """
+    terms = []
+    for word in normalize_text(name).split():
+        parts = [part for part in word.split(ZWNJ) if part]
+        for term in ["".join(parts)] + (parts if len(parts) > 1 else []):
+            term = term[:MAX_TERM_LENGTH]
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def query_terms(query: str) -> List[str]:
+    """Words of a search query, matched as prefixes of `search_terms`."""
+    return [word[:MAX_TERM_LENGTH] for word in normalize_text(query).replace(ZWNJ, "").split()]
+
+
+def phone_prefix(query: str) -> Optional[str]:
+    """Phone number prefix (``0912...``) typed in ``query``, or None.
+
+    Accepts Persian digits, spaces, dashes and the ``+98`` / ``98`` country
+    code; returns None when ``query`` is not a phone number.
+    """
+    digits = re.sub(r"[\s\-()]", "", fold_digits(query))
+    if digits.startswith("+98"):
+        digits = "0" + digits[3:]
+    elif digits.startswith("98") and len(digits) > 2:
+        digits = "0" + digits[2:]
+    return digits if digits.isdigit() else None
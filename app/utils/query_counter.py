@@ -0,0 +1,46 @@
+"""Count SQL statements and fetched rows for a block of database work."""
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class QueryCounter:
+    """Context manager counting statements and ORM rows issued through a session.
+
+    Statements are counted at the cursor level, so relationship loads and
+    flushes are included. Rows are counted for ORM SELECTs by buffering the
+    result once and handing the caller a fresh copy.
+
+    Example:
+        with QueryCounter(session) as counter:
+            await repo.get_by_id(1)
+        print(counter.statements, counter.rows)
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.engine = session.bind.sync_engine
+        self.sync_session = session.sync_session
+        self.statements = 0
+        self.rows = 0
+        self.sql = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        self.sql.append(statement)
+
+    def _do_orm_execute(self, orm_execute_state):
+        if not orm_execute_state.is_select:
+            return None
+        frozen = orm_execute_state.invoke_statement().freeze()
+        self.rows += len(frozen.data)
+        return frozen()
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.sync_session, "do_orm_execute", self._do_orm_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.sync_session, "do_orm_execute", self._do_orm_execute)
+        return False
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Route check: `APIClient` calls against the real API routers.
+
+Mounts the real routers on a throw-away database and points `APIClient`'s
+shared httpx client at the app through `httpx.ASGITransport`, so every call
+goes through the same paths, redirects (none are followed) and query
+parameters as against the served API. Checks that the collection calls
+(GETs and the create POSTs) reach their ``/`` routes instead of stopping at
+a 307, and that following ``next_cursor`` walks the whole ledger
+newest-first without gaps or repeats.
+
+Usage:
+    python benchmarks/api_client_routes.py
+"""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from common import bench_database
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+from app.api import investments, transactions, users, valuations
+from app.models.models import User, Investment, Transaction, UserRole, ContractType, TransactionType
+from app.services.api_client import APIClient
+
+USER_COUNT = 30
+INVESTMENT_COUNT = 3
+TRANSACTION_COUNT = 95
+
+
+async def seed(session_factory):
+    async with session_factory() as session:
+        await session.execute(insert(User), [
+            {"telegram_id": 1_000_000 + i, "phone_number": f"0912{i:07d}", "name": f"سرمایه‌گذار {i}",
+             "role": UserRole.INVESTOR, "is_verified": True}
+            for i in range(USER_COUNT)
+        ])
+        await session.execute(insert(Investment), [
+            {"user_id": i + 1, "contract_type": ContractType.VARIABLE_HOLDING, "initial_amount": 1_000_000_000,
+             "start_date": date(2024, 1, 1)}
+            for i in range(INVESTMENT_COUNT)
+        ])
+        # Few distinct dates, so pages break inside a day and the ID tie-break matters
+        await session.execute(insert(Transaction), [
+            {"investment_id": i % INVESTMENT_COUNT + 1, "type": TransactionType.DEPOSIT, "amount": 1_000_000 + i,
+             "transaction_date": date(2024, 1, 1) + timedelta(days=i % 7), "recorded_by": 1}
+            for i in range(TRANSACTION_COUNT)
+        ])
+        await session.commit()
+
+
+def api_app(session_factory) -> FastAPI:
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    for module in (users, investments, transactions, valuations):
+        app.include_router(module.router)
+        app.dependency_overrides[module.get_db] = get_db
+    return app
+
+
+async def main() -> int:
+    failures = 0
+    checks = []
+    async with bench_database() as session_factory:
+        await seed(session_factory)
+        client = APIClient("http://api", retries=0)
+        client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api_app(session_factory)),
+                                           base_url="http://api")
+
+        listed = await client.get_users([7, 3, USER_COUNT + 1, 5])
+        checks.append(([user["id"] for user in listed] == [7, 3, 5], "get_users keeps the order, skips unknown IDs"))
+        single = await client.get_user(3)
+        checks.append((listed[1] == single, "get_users rows match get_user"))
+        page = await client.list_users(skip=10, limit=5)
+        checks.append((len(page) == 5 and await client.get_users([user["id"] for user in page]) == page,
+                       "list_users returns a page of users"))
+
+        owned = await client.get_user_investments(2)
+        checks.append(([investment["id"] for investment in owned] == [2], "get_user_investments filters by investor"))
+        listed = await client.list_investments(limit=INVESTMENT_COUNT)
+        checks.append((sorted(investment["id"] for investment in listed) == list(range(1, INVESTMENT_COUNT + 1)),
+                       "list_investments returns a page of investments"))
+
+        async def walk(fetch, **kwargs):
+            items, cursor, pages = [], None, 0
+            while True:
+                page = await fetch(limit=10, cursor=cursor, **kwargs)
+                items += page["items"]
+                pages += 1
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return items, pages
+
+        def newest_first(items):
+            keys = [(item["transaction_date"], item["id"]) for item in items]
+            return keys == sorted(keys, reverse=True)
+
+        items, pages = await walk(client.list_transactions)
+        ids = [item["id"] for item in items]
+        checks.append((sorted(ids) == list(range(1, TRANSACTION_COUNT + 1)) and newest_first(items),
+                       f"list_transactions follows next_cursor over {pages} pages, no gaps or repeats"))
+        items, pages = await walk(client.get_investment_transactions, investment_id=2)
+        expected = [i + 1 for i in range(TRANSACTION_COUNT) if i % INVESTMENT_COUNT == 1]
+        checks.append((sorted(item["id"] for item in items) == expected and newest_first(items)
+                       and {item["investment_id"] for item in items} == {2},
+                       f"get_investment_transactions follows next_cursor over {pages} pages"))
+
+        user = await client.create_user(2_000_000, "سرمایه‌گذار جدید", "09350000000", "investor")
+        checks.append((user == await client.get_user(user["id"]), "create_user stores the user"))
+        investment = await client.create_investment(user["id"], "fixed_rate", 500_000_000, date(2024, 6, 1),
+                                                    dividend_rate=8.0)
+        checks.append((
+            [row["id"] for row in await client.get_user_investments(user["id"])] == [investment["id"]]
+            and investment["start_date"] == "2024-06-01T00:00:00",
+            "create_investment stores the investment"
+        ))
+        created = [
+            await client.create_transaction(investment["id"], "deposit", 10_000_000, date(2024, 7, 1), 1),
+            await client.create_transaction(investment["id"], "withdrawal", -2_000_000, date(2024, 7, 2), 1,
+                                            description="برداشت"),
+        ]
+        page = await client.get_investment_transactions(investment["id"])
+        checks.append((page["items"] == created[::-1], "create_transaction stores the transactions"))
+
+        await client.close()
+
+    print("\n🧪 Checks")
+    for ok, label in checks:
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Benchmark: admin reports built from SQL aggregates and served from the cache.
+
+Seeds ``investor_count`` investors (three quarters verified), one investment
+each and a year of ledger rows, then compares:
+
+- the old approach: load every investor with `list_by_role` and `len()` it
+- `AnalyticsService.build_report` (GROUP BY / COUNT aggregates)
+- `ReportCache.get` once the report is cached
+
+Usage:
+    python benchmarks/bench_analytics.py [investor_count]
+"""
+
+import asyncio
+import logging
+import sys
+from datetime import date, timedelta
+
+from common import bench_database, measure, print_result
+
+from sqlalchemy import insert, select
+
+from app.models.models import (
+    User, Investment, Transaction, UserRole, ContractType, TransactionType
+)
+from app.services.analytics_cache import ReportCache, logger
+from app.services.portfolio_service import AnalyticsService
+from app.services.repositories import BalanceRepository, UserRepository
+
+TRANSACTIONS_PER_INVESTOR = 3
+
+
+async def seed(session_factory, investor_count: int):
+    today = date.today()
+    async with session_factory() as session:
+        await session.execute(insert(User), [
+            {
+                "telegram_id": 1_000_000 + i,
+                "phone_number": f"0912{i:07d}",
+                "name": f"سرمایه‌گذار {i}",
+                "role": UserRole.INVESTOR,
+                "is_verified": i % 4 != 0,
+            }
+            for i in range(investor_count)
+        ])
+        user_ids = (await session.execute(select(User.id).order_by(User.id))).scalars().all()
+        await session.execute(insert(Investment), [
+            {
+                "user_id": user_id,
+                "contract_type": ContractType.VARIABLE_HOLDING if i % 3 else ContractType.FIXED_RATE,
+                "initial_amount": 100_000_000,
+                "start_date": today - timedelta(days=400),
+            }
+            for i, user_id in enumerate(user_ids)
+        ])
+        investment_ids = (await session.execute(
+            select(Investment.id).order_by(Investment.id)
+        )).scalars().all()
+
+        types = [TransactionType.DEPOSIT, TransactionType.WITHDRAWAL, TransactionType.DIVIDEND]
+        rows = []
+        for i, investment_id in enumerate(investment_ids):
+            for n, txn_type in enumerate(types[:TRANSACTIONS_PER_INVESTOR]):
+                rows.append({
+                    "investment_id": investment_id,
+                    "type": txn_type,
+                    "amount": -1_000_000 if txn_type == TransactionType.WITHDRAWAL else 2_000_000,
+                    "transaction_date": today - timedelta(days=(i * 7 + n * 31) % 365),
+                    "recorded_by": user_ids[0],
+                })
+            if len(rows) >= 30_000:
+                await session.execute(insert(Transaction), rows)
+                rows = []
+        if rows:
+            await session.execute(insert(Transaction), rows)
+        await BalanceRepository(session).rebuild()
+        await session.commit()
+
+
+async def main(investor_count: int):
+    print(f"\n📈 Admin analytics benchmark ({investor_count:,} investors, "
+          f"{investor_count * TRANSACTIONS_PER_INVESTOR:,} transactions)")
+
+    async with bench_database() as session_factory:
+        await seed(session_factory, investor_count)
+
+        async def load_and_count():
+            async with session_factory() as session:
+                investors = await UserRepository(session).list_by_role(UserRole.INVESTOR)
+                return len(investors), len([u for u in investors if u.is_verified])
+
+        async def build_report():
+            async with session_factory() as session:
+                return await AnalyticsService(session).build_report()
+
+        print_result("list_by_role + len()", await measure(load_and_count, repeat=3))
+        print_result("build_report (aggregates)", await measure(build_report, repeat=5))
+
+        cache = ReportCache(session_factory, bucket_seconds=60)
+        report = await cache.get()
+        print_result("ReportCache.get (warm)", await measure(cache.get, repeat=1000))
+
+        users = report["users"]
+        assert users["investors"] == investor_count
+        assert users["verified_investors"] == investor_count - len(range(0, investor_count, 4))
+        assert sum(a["investment_count"] for a in report["aum_by_contract_type"].values()) == investor_count
+        expected_capital = investor_count * (100_000_000 + 2_000_000 - 1_000_000)
+        assert abs(report["total_invested_capital"] - expected_capital) < 1
+        assert all(
+            type(month[field]) is int
+            for month in report["monthly_flows"] for field in ("deposits", "withdrawals", "dividends", "net")
+        ), report["monthly_flows"]
+
+        # A computation in flight when the cache is invalidated must not store its report
+        refreshing = asyncio.create_task(cache.refresh())
+        await asyncio.sleep(0)
+        cache.invalidate()
+        await refreshing
+        assert cache._report is None and cache._inflight is None
+        assert (await cache.get())["users"] == users
+
+        # A failing background refresh (started by a stale hit) is logged
+        failures = []
+        handler = logging.Handler()
+        handler.emit = failures.append
+        logger.addHandler(handler)
+
+        def broken_session():
+            raise RuntimeError("database unavailable")
+
+        failing = ReportCache(broken_session, bucket_seconds=60)
+        failing._report, failing._report_bucket = report, -1
+        assert await failing.get() is report
+        await asyncio.wait([failing._inflight])
+        logger.removeHandler(handler)
+        assert any("database unavailable" in record.getMessage() for record in failures), failures
+
+        stats = cache.stats()
+        print(f"  cache: {stats['hits']:,} hits, {stats['misses']} miss, "
+              f"refresh {stats['last_refresh_ms']:.1f} ms")
+        print("  net flow per Jalali month: " + ", ".join(
+            f"{month['label']} {month['net']:,.0f}" for month in report["monthly_flows"]
+        ))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    asyncio.run(main(count))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Benchmark: bot API client GET coalescing and ETag revalidation.
+
+Serves a FastAPI stand-in for the users API, behind the real
+`ETagMiddleware`, in process through `httpx.ASGITransport` (every request
+takes ``latency_ms`` to answer). Then:
+
+- ``burst`` concurrent identical `get_user_by_telegram` calls, without and
+  with coalescing (requests the API received, wall time)
+- sequential repeats of one call: full bodies vs 304 revalidations, and
+  with a TTL (no request at all)
+- checks: a 304 reuses the cached body, the client's own PUT invalidates
+  it, and a response changed by someone else is picked up on revalidation
+
+Usage:
+    python benchmarks/bench_api_cache.py [burst] [latency_ms]
+"""
+
+import asyncio
+import sys
+import time
+
+from common import measure, print_result
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.etag import ETagMiddleware
+from app.services.api_client import APIClient
+
+
+class UncachedAPIClient(APIClient):
+    """Previous behaviour: every GET is sent."""
+
+    async def _get(self, endpoint, params, timeout):
+        response = await self._send("GET", endpoint, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+
+class StandInAPI:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.statuses = []
+        self.users = {}
+
+    def user(self, user_id: int) -> dict:
+        return self.users.setdefault(user_id, {
+            "id": user_id, "telegram_id": 1_000_000 + user_id, "phone": "09120000001",
+            "name": "سرمایه‌گذار", "role": "investor", "is_verified": True,
+            "investments": [{"id": i, "amount": 10_000_000 * i} for i in range(1, 51)],
+        })
+
+    def app(self) -> FastAPI:
+        app = FastAPI()
+        app.add_middleware(ETagMiddleware)
+
+        @app.get("/api/v1/users/telegram/{telegram_id}")
+        async def user_by_telegram(telegram_id: int):
+            await asyncio.sleep(self.latency)
+            return self.user(telegram_id - 1_000_000)
+
+        @app.put("/api/v1/users/{user_id}")
+        async def update_user(user_id: int, changes: dict):
+            self.user(user_id).update(changes)
+            return self.user(user_id)
+
+        return app
+
+    def client(self, api_client_class=APIClient, **kwargs) -> APIClient:
+        async def record(response: httpx.Response):
+            self.statuses.append(response.status_code)
+
+        client = api_client_class("http://api", **kwargs)
+        client._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app()), base_url="http://api",
+            event_hooks={"response": [record]},
+        )
+        return client
+
+
+async def main(burst: int, latency_ms: float) -> int:
+    api = StandInAPI(latency_ms / 1000)
+    failures = 0
+
+    def check(ok: bool, label: str):
+        nonlocal failures
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label}")
+
+    print(f"\n🌐 {burst} concurrent identical GETs ({latency_ms:g} ms API latency)")
+    for label, client in (("every GET sent", api.client(UncachedAPIClient)),
+                          ("coalesced", api.client())):
+        api.statuses.clear()
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.get_user_by_telegram(1_000_001) for _ in range(burst)))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        same = all(result == results[0] for result in results)
+        print(f"  {label:<16} {len(api.statuses):>5} API requests {elapsed_ms:>9.1f} ms"
+              f"{'' if same else '  (results differ!)'}")
+        failures += not same
+        await client.close()
+
+    print("\n🔁 Sequential repeats of one GET")
+    for label, client in (("every GET sent", api.client(UncachedAPIClient)),
+                          ("revalidated", api.client()),
+                          ("TTL 60 s", api.client(cache_ttl=60))):
+        api.statuses.clear()
+        stats = await measure(lambda: client.get_user_by_telegram(1_000_001), 200)
+        print_result(f"{label:<16} {api.statuses.count(200):>4}x200 {api.statuses.count(304):>4}x304", stats)
+        await client.close()
+
+    print("\n🧪 Checks")
+    client = api.client()
+    first = await client.get_user_by_telegram(1_000_002)
+    api.statuses.clear()
+    again = await client.get_user_by_telegram(1_000_002)
+    check(again == first and api.statuses == [304], f"repeat GET revalidated with a 304: {api.statuses}")
+
+    await client.update_user(2, name="نام تازه")
+    api.statuses.clear()
+    updated = await client.get_user_by_telegram(1_000_002)
+    check(updated["name"] == "نام تازه" and api.statuses == [200],
+          f"own PUT invalidates the cached user: {api.statuses}")
+
+    api.user(2)["name"] = "تغییر از بیرون"
+    changed = await client.get_user_by_telegram(1_000_002)
+    check(changed["name"] == "تغییر از بیرون", "change made elsewhere seen on revalidation")
+
+    api.statuses.clear()
+    waiting = [asyncio.create_task(client.get_user_by_telegram(1_000_003)) for _ in range(3)]
+    await asyncio.sleep(0)
+    waiting[0].cancel()
+    results = await asyncio.gather(*waiting, return_exceptions=True)
+    check(isinstance(results[0], asyncio.CancelledError) and results[1] == results[2]
+          and len(api.statuses) == 1, "cancelled caller does not cancel the shared GET")
+    print(f"  stats: {client.stats()}")
+    await client.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )))
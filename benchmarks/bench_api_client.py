@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark: bot API client, per-call client vs the pooled keep-alive client.
+
+Starts a local aiohttp stand-in for the API (the real app needs uvicorn
+and a database) and makes ``call_count`` sequential `get_user_by_telegram`
+calls with:
+
+- the previous client: a new `httpx.AsyncClient` (and connection) per call
+- `APIClient`: one pooled client reusing keep-alive connections
+
+The stand-in counts the TCP connections it accepted. It then checks the
+retry policy: a GET through two 503s succeeds, and a POST is not repeated.
+
+Usage:
+    python benchmarks/bench_api_client.py [call_count]
+"""
+
+import asyncio
+import sys
+
+from common import measure, print_result
+
+import httpx
+from aiohttp import web
+
+from app.services.api_client import APIClient
+
+
+class LegacyAPIClient(APIClient):
+    """Previous behaviour: a new client for every request."""
+
+    async def request(self, method, endpoint, data=None, params=None, timeout=None):
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.request(method, f"{self.base_url}{endpoint}", params=params)
+            response.raise_for_status()
+            return response.json()
+
+
+class StandInAPI:
+    def __init__(self):
+        self.connections = set()
+        self.flaky_calls = 0
+
+    async def user_by_telegram(self, request: web.Request):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        telegram_id = int(request.match_info["telegram_id"])
+        return web.json_response({
+            "id": telegram_id - 1_000_000, "telegram_id": telegram_id, "phone": "09120000001",
+            "name": "سرمایه‌گذار", "role": "investor", "is_verified": True,
+        })
+
+    async def flaky(self, request: web.Request):
+        """503 twice, then 200."""
+        self.flaky_calls += 1
+        if self.flaky_calls % 3:
+            return web.json_response({"detail": "unavailable"}, status=503)
+        return web.json_response({"ok": True})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v1/users/telegram/{telegram_id}", self.user_by_telegram)
+        app.router.add_route("*", "/flaky", self.flaky)
+        return app
+
+
+async def main(call_count: int) -> int:
+    api = StandInAPI()
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    failures = 0
+
+    try:
+        print(f"\n🌐 {call_count} sequential get_user_by_telegram calls")
+        for label, client in (("new client per call", LegacyAPIClient(base_url)),
+                              ("pooled keep-alive client", APIClient(base_url))):
+            api.connections.clear()
+            telegram_id = iter(range(1_000_001, 1_000_001 + 10 * call_count))
+            stats = await measure(lambda: client.get_user_by_telegram(next(telegram_id)), call_count)
+            await client.close()
+            print_result(f"{label:<26} {len(api.connections):>5} connections", stats)
+
+        print("\n🔁 Retry policy")
+        client = APIClient(base_url, retries=2, retry_backoff=0.01)
+        api.flaky_calls = 0
+        result = await client.request("GET", "/flaky")
+        ok = result == {"ok": True} and api.flaky_calls == 3
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} GET through two 503s: {api.flaky_calls} attempts")
+
+        api.flaky_calls = 0
+        try:
+            await client.request("POST", "/flaky", data={})
+            ok = False
+        except httpx.HTTPStatusError:
+            ok = api.flaky_calls == 1
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} POST answered 503 is not repeated: {api.flaky_calls} attempt(s)")
+        await client.close()
+    finally:
+        await runner.cleanup()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)))
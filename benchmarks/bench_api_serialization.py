@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Benchmark: API list endpoint throughput, validated ORM responses vs row serializers.
+
+Seeds users, investments, transactions and valuations, then requests
+``list_users`` and ``list_transactions`` at ``limit=100`` back to back
+through `httpx.ASGITransport` (in process, one client) against:
+
+- the previous endpoints: full ORM objects returned through
+  ``response_model`` (Pydantic validation, stdlib JSON encoder)
+- the real routers: column-projected rows serialized to dicts and encoded
+  by `ORJSONResponse`
+
+and reports requests per second and CPU time per request (SQLite's work
+included; a served database leaves the API process only the encoding).
+Every list endpoint's JSON is checked to be the same both ways.
+
+Usage:
+    python benchmarks/bench_api_serialization.py [request_count]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+from common import bench_database
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, Query
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import investments, transactions, users, valuations
+from app.api.schemas import InvestmentResponse, TransactionPage, UserResponse, ValuationResponse
+from app.models.models import (
+    User, Investment, Transaction, Valuation, UserRole, ContractType, TransactionType
+)
+from app.services.repositories import (
+    UserRepository, InvestmentRepository, TransactionRepository, ValuationRepository
+)
+from app.utils.pagination import decode_cursor, encode_cursor
+
+ROW_COUNT = 2000
+
+
+async def seed(session_factory):
+    async with session_factory() as session:
+        await session.execute(insert(User), [
+            {"telegram_id": 1_000_000 + i, "phone_number": f"0912{i:07d}", "name": f"سرمایه‌گذار {i}",
+             "role": UserRole.INVESTOR if i else UserRole.ACCOUNTANT, "is_verified": i % 3 != 0}
+            for i in range(ROW_COUNT)
+        ])
+        await session.execute(insert(Investment), [
+            {"user_id": i + 1, "contract_type": ContractType.VARIABLE_HOLDING, "initial_amount": 1_000_000_000,
+             "start_date": date(2022, 1, 1) + timedelta(days=i % 700), "holding_period_months": 12}
+            for i in range(ROW_COUNT)
+        ])
+        await session.execute(insert(Transaction), [
+            {"investment_id": i % 10 + 1, "type": TransactionType.DEPOSIT, "amount": 1_000_000 + i,
+             "transaction_date": date(2022, 1, 1) + timedelta(days=i % 700),
+             "description": "واریز" if i % 2 else None, "recorded_by": 1}
+            for i in range(ROW_COUNT)
+        ])
+        await session.execute(insert(Valuation), [
+            {"investment_id": 1, "old_value": 1_000_000_000 + i, "new_value": 1_010_000_000 + i,
+             "profit_percentage": 1.0, "valuation_date": date(2022, 1, 1) + timedelta(days=i),
+             "updated_by": 1}
+            for i in range(100)
+        ])
+        await session.commit()
+
+
+def legacy_router(get_db) -> APIRouter:
+    """The list endpoints as they were: ORM objects validated through response_model."""
+    router = APIRouter()
+
+    @router.get("/api/v1/users/", response_model=List[UserResponse])
+    async def list_users(skip: int = Query(0), limit: int = Query(10), db: AsyncSession = Depends(get_db)):
+        return await UserRepository(db).get_all(skip=skip, limit=limit)
+
+    @router.get("/api/v1/investments/", response_model=List[InvestmentResponse])
+    async def list_investments(skip: int = Query(0), limit: int = Query(10), db: AsyncSession = Depends(get_db)):
+        return await InvestmentRepository(db).get_all(skip=skip, limit=limit)
+
+    @router.get("/api/v1/transactions/", response_model=TransactionPage)
+    async def list_transactions(limit: int = Query(10), cursor: Optional[str] = Query(None),
+                                db: AsyncSession = Depends(get_db)):
+        after = decode_cursor(cursor) if cursor else None
+        items, next_position = await TransactionRepository(db).get_page(None, limit=limit, after=after)
+        return TransactionPage(items=items, next_cursor=encode_cursor(*next_position) if next_position else None)
+
+    @router.get("/api/v1/valuations/", response_model=List[ValuationResponse])
+    async def list_valuations(investment_id: int = Query(...), limit: int = Query(20),
+                              db: AsyncSession = Depends(get_db)):
+        return await ValuationRepository(db).get_history_by_investment(investment_id, limit)
+
+    return router
+
+
+def apps(session_factory):
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    legacy = FastAPI()
+    legacy.include_router(legacy_router(get_db))
+
+    current = FastAPI()
+    for module in (users, investments, transactions, valuations):
+        current.include_router(module.router)
+        current.dependency_overrides[module.get_db] = get_db
+    return legacy, current
+
+
+async def run(client: httpx.AsyncClient, path: str, params: dict, count: int):
+    """Requests per second, and CPU ms per request (the database thread included)."""
+    started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(count):
+        (await client.get(path, params=params)).raise_for_status()
+    return count / (time.perf_counter() - started), (time.process_time() - cpu_started) * 1000 / count
+
+
+async def main(request_count: int) -> int:
+    failures = 0
+    async with bench_database() as session_factory:
+        await seed(session_factory)
+        legacy_app, current_app = apps(session_factory)
+        legacy = httpx.AsyncClient(transport=httpx.ASGITransport(app=legacy_app), base_url="http://api")
+        current = httpx.AsyncClient(transport=httpx.ASGITransport(app=current_app), base_url="http://api")
+
+        print(f"\n⚡ {request_count} sequential requests at limit=100")
+        for label, path in (("list_users", "/api/v1/users/"), ("list_transactions", "/api/v1/transactions/")):
+            params = {"limit": 100}
+            await run(current, path, params, 5)  # Warm up
+            before, before_cpu = await run(legacy, path, params, request_count)
+            after, after_cpu = await run(current, path, params, request_count)
+            print(f"  {label:<18} validated ORM {before:>6.0f} req/s {before_cpu:>5.2f} CPU ms"
+                  f"   row serializer {after:>6.0f} req/s {after_cpu:>5.2f} CPU ms   x{after / before:.1f}")
+
+        print("\n🧪 Same JSON both ways")
+        cursor = (await current.get("/api/v1/transactions/", params={"limit": 100})).json()["next_cursor"]
+        cases = [
+            ("/api/v1/users/", {"limit": 100}),
+            ("/api/v1/users/", {"skip": 1990, "limit": 100}),
+            ("/api/v1/investments/", {"limit": 100}),
+            ("/api/v1/transactions/", {"limit": 100}),
+            ("/api/v1/transactions/", {"limit": 100, "cursor": cursor}),
+            ("/api/v1/valuations/", {"investment_id": 1, "limit": 100}),
+        ]
+        for path, params in cases:
+            old = await legacy.get(path, params=params)
+            new = await current.get(path, params=params)
+            ok = old.status_code == new.status_code == 200 and old.json() == new.json()
+            failures += not ok
+            print(f"  {'✅' if ok else '❌'} {path} {params}")
+
+        batch = (await current.get("/api/v1/users/", params={"ids": "3,1,2"})).json()
+        singles = [(await current.get(f"/api/v1/users/{user_id}")).json() for user_id in (3, 1, 2)]
+        ok = batch == singles
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} users?ids= matches GET /users/{{id}}")
+
+        await legacy.aclose()
+        await current.aclose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)))
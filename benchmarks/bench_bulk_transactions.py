@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Benchmark: recording ledger rows through the API, one request per row vs in bulk.
+
+Seeds ``investment_count`` investments with some history, then posts
+``row_count`` transactions spread over them to the real transactions router
+(in process, through `httpx.ASGITransport`):
+
+- one request per row (a sample, extrapolated to the full count)
+- ``POST /api/v1/transactions/bulk``: the rows in ``BULK_CHUNK``-row requests
+
+and checks that the balance snapshots match the ledger afterwards. Then
+compares rendering a page of users and investment summaries with per-id
+calls against ``GET /api/v1/users?ids=`` and ``/summary``.
+
+Usage:
+    python benchmarks/bench_bulk_transactions.py [row_count] [investment_count]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from common import bench_database, measure, print_result
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import insert, select, func
+
+from app.api import investments, transactions, users
+from app.models.models import (
+    User, Investment, Transaction, UserRole, ContractType, TransactionType
+)
+from app.services.repositories import BalanceRepository
+
+SAMPLE_SIZE = 500
+BULK_CHUNK = 10_000
+PAGE_SIZE = 50
+
+
+async def seed(session_factory, investment_count: int) -> int:
+    """Create an accountant, investors with one investment each and a year of history."""
+    async with session_factory() as session:
+        accountant = User(telegram_id=1, phone_number="09000000000", name="حسابدار",
+                          role=UserRole.ACCOUNTANT, is_verified=True)
+        session.add(accountant)
+        await session.flush()
+
+        await session.execute(insert(User), [
+            {"telegram_id": 1_000_000 + i, "phone_number": f"0912{i:07d}",
+             "name": f"سرمایه‌گذار {i}", "role": UserRole.INVESTOR, "is_verified": True}
+            for i in range(investment_count)
+        ])
+        user_ids = (await session.execute(
+            select(User.id).where(User.role == UserRole.INVESTOR).order_by(User.id)
+        )).scalars().all()
+        await session.execute(insert(Investment), [
+            {"user_id": user_id, "contract_type": ContractType.VARIABLE_HOLDING,
+             "initial_amount": 1_000_000_000, "start_date": date(2024, 1, 1)}
+            for user_id in user_ids
+        ])
+        investment_ids = (await session.execute(select(Investment.id))).scalars().all()
+        await session.execute(insert(Transaction), [
+            {"investment_id": investment_id, "type": TransactionType.DEPOSIT, "amount": 10_000_000,
+             "transaction_date": date(2024, 1, 1) + timedelta(days=30 * month),
+             "recorded_by": accountant.id}
+            for investment_id in investment_ids for month in range(12)
+        ])
+        await BalanceRepository(session).rebuild()
+        await session.commit()
+        return accountant.id
+
+
+def ledger_rows(count: int, investment_count: int, recorded_by: int) -> list:
+    """Random deposits, withdrawals and dividends, dated within the seeded history."""
+    rng = random.Random(7)
+    rows = []
+    for _ in range(count):
+        txn_type = rng.choice(["deposit", "withdrawal", "dividend"])
+        amount = rng.randrange(100_000, 50_000_000, 1000)
+        rows.append({
+            "investment_id": rng.randrange(1, investment_count + 1),
+            "type": txn_type,
+            "amount": -amount if txn_type == "withdrawal" else amount,
+            "transaction_date": (date(2024, 1, 1) + timedelta(days=rng.randrange(540))).isoformat(),
+            "recorded_by": recorded_by,
+        })
+    return rows
+
+
+def api_app(session_factory) -> FastAPI:
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    for router in (users, investments, transactions):
+        app.include_router(router.router)
+        app.dependency_overrides[router.get_db] = get_db
+    return app
+
+
+async def main(row_count: int, investment_count: int) -> int:
+    failures = 0
+    async with bench_database() as session_factory:
+        recorded_by = await seed(session_factory, investment_count)
+        rows = ledger_rows(row_count + SAMPLE_SIZE, investment_count, recorded_by)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api_app(session_factory)),
+                                   base_url="http://api")
+
+        print(f"\n📒 {row_count} ledger rows over {investment_count} investments")
+        started = time.perf_counter()
+        for row in rows[:SAMPLE_SIZE]:
+            response = await client.post("/api/v1/transactions/bulk", json={"transactions": [row]})
+            response.raise_for_status()
+        per_row = (time.perf_counter() - started) / SAMPLE_SIZE
+        print(f"  {'one request per row':<28} {per_row * row_count:>8.1f} s"
+              f"  ({1 / per_row:>8.0f} rows/s, {SAMPLE_SIZE}-row sample)")
+
+        started = time.perf_counter()
+        ids = []
+        for offset in range(SAMPLE_SIZE, len(rows), BULK_CHUNK):
+            response = await client.post(
+                "/api/v1/transactions/bulk", json={"transactions": rows[offset:offset + BULK_CHUNK]}
+            )
+            response.raise_for_status()
+            ids.extend(response.json()["ids"])
+        elapsed = time.perf_counter() - started
+        print(f"  {f'bulk, {BULK_CHUNK} rows per request':<28} {elapsed:>8.1f} s  ({row_count / elapsed:>8.0f} rows/s)")
+
+        async with session_factory() as session:
+            stored = (await session.execute(
+                select(Transaction.investment_id, Transaction.amount).where(Transaction.id.in_(ids[:1000]))
+                .order_by(Transaction.id)
+            )).all()
+            drift = await BalanceRepository(session).verify()
+            total = (await session.execute(select(func.count(Transaction.id)))).scalar()
+        expected = [(row["investment_id"], row["amount"]) for row in rows[SAMPLE_SIZE:SAMPLE_SIZE + 1000]]
+        checks = [
+            (len(ids) == row_count and ids == sorted(ids), f"{len(ids)} IDs returned in row order"),
+            (stored == expected, "returned IDs belong to the posted rows"),
+            (total == investment_count * 12 + SAMPLE_SIZE + row_count, f"{total} ledger rows stored"),
+            (not drift, f"snapshots and daily balances match the ledger ({len(drift)} drifted)"),
+        ]
+
+        withdrawal = next(row for row in rows if row["type"] == "withdrawal")
+        bad = [
+            (dict(rows[0], type="bonus"), "unknown type", 422),
+            (dict(withdrawal, amount=-withdrawal["amount"]), "positive withdrawal", 422),
+            (dict(rows[0], type="deposit", amount=-1000), "negative deposit", 422),
+            (dict(rows[0], transaction_date="2024-01-01T10:30:00"), "date with a time of day", 422),
+            (dict(rows[1], investment_id=investment_count + 1), "unknown investment", 400),
+            (dict(rows[1], recorded_by=10 ** 9), "unknown recording user", 400),
+        ]
+        for row, label, status in bad:
+            response = await client.post("/api/v1/transactions/bulk", json={"transactions": [rows[2], row]})
+            checks.append((response.status_code == status, f"{label} rejects the whole request ({status})"))
+        async with session_factory() as session:
+            after = (await session.execute(select(func.count(Transaction.id)))).scalar()
+        checks.append((after == total, "nothing stored by rejected requests"))
+
+        print(f"\n👥 Rendering {PAGE_SIZE} rows")
+        page = list(range(2, 2 + PAGE_SIZE))
+
+        async def per_id_users():
+            for user_id in page:
+                (await client.get(f"/api/v1/users/{user_id}")).raise_for_status()
+
+        async def batch_users():
+            (await client.get("/api/v1/users/", params={"ids": ",".join(map(str, page))})).raise_for_status()
+
+        async def per_id_investments():
+            for investment_id in page:
+                (await client.get(f"/api/v1/investments/{investment_id}")).raise_for_status()
+                (await client.get(f"/api/v1/investments/{investment_id}/details")).raise_for_status()
+
+        async def summaries():
+            for investment_id in page:
+                (await client.get(f"/api/v1/investments/{investment_id}/summary")).raise_for_status()
+
+        for label, func_ in (("users, one GET per id", per_id_users), ("users?ids=", batch_users),
+                             ("investment + details per id", per_id_investments),
+                             ("summary per id", summaries)):
+            print_result(label, await measure(func_, 10))
+
+        listed = (await client.get("/api/v1/users/", params={"ids": "5,3,999999,3"})).json()
+        checks.append(([user["id"] for user in listed] == [5, 3], "users?ids= keeps the order, skips unknown IDs"))
+        summary = (await client.get("/api/v1/investments/1/summary")).json()
+        details = (await client.get("/api/v1/investments/1/details")).json()
+        checks.append((all(summary[key] == details[key] for key in summary if key != "last_updated"),
+                       "summary matches details"))
+        await client.aclose()
+
+    print("\n🧪 Checks")
+    for ok, label in checks:
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+    )))
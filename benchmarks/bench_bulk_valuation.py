@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Benchmark: bulk revaluation versus one `update_valuation` call per investment.
+
+Seeds ``investment_count`` active investments (half of them with an earlier
+valuation) and revalues them:
+
+- per investment: `PortfolioService.update_valuation` in a loop (a sample,
+  extrapolated to the full count)
+- percentage: one INSERT ... SELECT through `bulk_update_valuations`
+- CSV: parsed ``investment_id,new_value`` rows as one executemany
+
+Every run commits once and is checked for snapshot drift, correct old values
+and one queued notification per verified investor.
+
+Usage:
+    python benchmarks/bench_bulk_valuation.py [investment_count]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import date
+
+from common import bench_database
+
+from sqlalchemy import insert, select, func
+
+from app.models.models import (
+    User, Investment, Valuation, InvestmentBalance, OutboundMessage,
+    UserRole, ContractType
+)
+from app.services.portfolio_service import PortfolioService
+from app.services.repositories import BalanceRepository, current_value_query
+from app.utils.formatters import parse_valuation_csv
+from app.utils.money import to_money
+
+SAMPLE_SIZE = 200
+
+
+async def seed(session_factory, investment_count: int) -> int:
+    """Create investors, investments and an earlier valuation for every other one."""
+    async with session_factory() as session:
+        admin = User(telegram_id=1, phone_number="09000000000", name="ادمین",
+                     role=UserRole.ADMIN, is_verified=True)
+        session.add(admin)
+        await session.flush()
+
+        await session.execute(insert(User), [
+            {
+                "telegram_id": 1_000_000 + i,
+                "phone_number": f"0912{i:07d}",
+                "name": f"سرمایه‌گذار {i}",
+                "role": UserRole.INVESTOR,
+                "is_verified": i % 4 != 0,
+            }
+            for i in range(investment_count)
+        ])
+        user_ids = (await session.execute(
+            select(User.id).where(User.role == UserRole.INVESTOR).order_by(User.id)
+        )).scalars().all()
+        await session.execute(insert(Investment), [
+            {
+                "user_id": user_id,
+                "contract_type": ContractType.VARIABLE_HOLDING if i % 3 else ContractType.FIXED_RATE,
+                "initial_amount": 100_000_000 + i * 1000,
+                "start_date": date(2023, 1, 1),
+            }
+            for i, user_id in enumerate(user_ids)
+        ])
+        investment_ids = (await session.execute(
+            select(Investment.id).order_by(Investment.id)
+        )).scalars().all()
+        await session.execute(insert(Valuation), [
+            {
+                "investment_id": investment_id,
+                "old_value": None,
+                "new_value": 110_000_000 + i,
+                "valuation_date": date(2024, 1, 1),
+                "updated_by": admin.id,
+            }
+            for i, investment_id in enumerate(investment_ids)
+            if i % 2 == 0
+        ])
+        await BalanceRepository(session).rebuild()
+        await session.commit()
+        return admin.id
+
+
+async def current_values(session) -> dict:
+    return dict((await session.execute(current_value_query())).all())
+
+
+async def check(session, before: dict, expected_new: dict, label: str):
+    """Snapshots point at the new valuations, old values match, no drift."""
+    after = await current_values(session)
+    assert after == expected_new, f"{label}: snapshot values differ"
+
+    latest = select(
+        Valuation.investment_id, Valuation.old_value
+    ).join(InvestmentBalance, InvestmentBalance.latest_valuation_id == Valuation.id)
+    for investment_id, old_value in await session.execute(latest):
+        assert abs(old_value - before[investment_id]) < 1e-6, f"{label}: wrong old_value"
+
+    assert not await BalanceRepository(session).verify(), f"{label}: snapshot drift"
+
+
+async def main(investment_count: int):
+    print(f"\n🧮 Bulk valuation benchmark ({investment_count:,} investments)")
+
+    async with bench_database() as session_factory:
+        admin_id = await seed(session_factory, investment_count)
+        verified = investment_count - len(range(0, investment_count, 4))
+
+        # One update_valuation per investment (sample, extrapolated)
+        async with session_factory() as session:
+            ids = sorted(await current_values(session))[:SAMPLE_SIZE]
+            service = PortfolioService(session)
+            started = time.perf_counter()
+            for investment_id in ids:
+                await service.update_valuation(
+                    investment_id, 120_000_000, date(2024, 6, 1), admin_id
+                )
+            await session.commit()
+            sample = time.perf_counter() - started
+        per_item = sample / len(ids)
+        print(f"  {'per-investment loop':<24} {per_item * 1000:8.2f} ms/investment  "
+              f"≈ {per_item * investment_count:7.2f} s for {investment_count:,}")
+
+        # Percentage applied to every active investment
+        async with session_factory() as session:
+            before = await current_values(session)
+            started = time.perf_counter()
+            result = await PortfolioService(session).bulk_update_valuations(
+                date(2024, 7, 1), admin_id, percentage=3.2, reason="بازده ماهانه"
+            )
+            await session.commit()
+            elapsed = time.perf_counter() - started
+            expected = {k: to_money(v * 1.032) for k, v in before.items()}
+            assert result["count"] == investment_count
+            await check(session, before, expected, "percentage")
+        print(f"  {'bulk +3.2% (SQL)':<24} {elapsed:8.2f} s total  "
+              f"{result['count']:,} valuations, {result['notified']:,} notifications queued")
+
+        # CSV upload of explicit values (one unknown ID)
+        csv_text = "investment_id,new_value\n" + "".join(
+            f'{investment_id},"{150_000_000 + investment_id:,}"\n' for investment_id in before
+        ) + "99999999,1000\n"
+        async with session_factory() as session:
+            before = await current_values(session)
+            started = time.perf_counter()
+            new_values = parse_valuation_csv(csv_text)
+            result = await PortfolioService(session).bulk_update_valuations(
+                date(2024, 8, 1), admin_id, new_values=new_values
+            )
+            await session.commit()
+            elapsed = time.perf_counter() - started
+            expected = {k: 150_000_000 + k for k in before}
+            assert result["missing_investment_ids"] == [99999999]
+            await check(session, before, expected, "csv")
+
+            outbox = (await session.execute(select(func.count(OutboundMessage.id)))).scalar()
+        print(f"  {'bulk CSV (executemany)':<24} {elapsed:8.2f} s total  "
+              f"{result['count']:,} valuations, missing IDs {result['missing_investment_ids']}")
+
+        expected_outbox = verified * 2 + sum(1 for i in range(SAMPLE_SIZE) if i % 4 != 0)
+        assert outbox == expected_outbox, (outbox, expected_outbox)
+        print(f"  outbox rows: {outbox:,} (one per verified investor per revaluation) ✅")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    asyncio.run(main(count))
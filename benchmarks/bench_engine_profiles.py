@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark: connection checkout and commit latency per engine profile.
+
+Compares the engine settings used before profiles (SQLAlchemy's default
+pool with ``pool_pre_ping``; on PostgreSQL also ``pool_size=20,
+max_overflow=0``) with the backend's tuned profile from
+`app.database.engine`. Each profile gets a fresh database and is timed for:
+
+- a bare checkout/return
+- checkout + a primary-key read (a typical handler lookup)
+- a one-row write committed in its own transaction
+- readers running concurrently with writers (throughput, lock errors)
+
+Usage:
+    python benchmarks/bench_engine_profiles.py [repeat]
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_engine_profiles.py
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import BENCH_DATABASE_URL, bench_database, measure, print_result
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.database.engine import create_engine, resolve_profile
+from app.models.models import FSMRecord, User, UserRole
+
+LEGACY_OPTIONS = {
+    "sqlite": {"pool_pre_ping": True},
+    "postgresql": {"pool_size": 20, "max_overflow": 0, "pool_pre_ping": True},
+}
+
+
+async def seed(engine):
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {
+                "telegram_id": 2_000_000 + i, "phone_number": f"0912{i:07d}",
+                "name": f"سرمایه‌گذار {i}", "role": UserRole.INVESTOR, "is_verified": True,
+            }
+            for i in range(1, 101)
+        ])
+
+
+async def run_profile(label: str, engine, repeat: int):
+    await seed(engine)
+    counter = iter(range(10**9))
+
+    async def checkout():
+        async with engine.connect():
+            pass
+
+    async def point_read():
+        async with engine.connect() as conn:
+            await conn.execute(select(User.name).where(User.id == 42))
+
+    async def write():
+        async with engine.begin() as conn:
+            await conn.execute(insert(FSMRecord).values(
+                key=f"{label}:{next(counter)}", data="{}",
+                expires_at=datetime.utcnow() + timedelta(hours=1),
+            ))
+
+    print(f"\n  [{label}] {engine.pool.__class__.__name__}")
+    for name, func in (("checkout", checkout), ("checkout + point read", point_read),
+                       ("write + commit", write)):
+        await func()  # warm up the pool
+        print_result(name, await measure(func, repeat))
+
+    reads = writes = errors = 0
+    stop = asyncio.Event()
+
+    async def reader():
+        nonlocal reads, errors
+        while not stop.is_set():
+            try:
+                await point_read()
+                reads += 1
+            except OperationalError:
+                errors += 1
+
+    async def writer():
+        nonlocal writes, errors
+        while not stop.is_set():
+            try:
+                await write()
+                writes += 1
+            except OperationalError:
+                errors += 1
+
+    tasks = [asyncio.create_task(reader()) for _ in range(8)]
+    tasks += [asyncio.create_task(writer()) for _ in range(2)]
+    started = time.perf_counter()
+    await asyncio.sleep(2)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {'8 readers + 2 writers':<32} reads={reads / elapsed:8.0f}/s  "
+        f"writes={writes / elapsed:6.0f}/s  lock errors={errors}"
+    )
+
+
+async def main(repeat: int):
+    backend = resolve_profile(BENCH_DATABASE_URL)
+    print(f"\n🔌 Engine profile benchmark ({backend}, {repeat} samples per line)")
+
+    profiles = [("legacy", "default", LEGACY_OPTIONS.get(backend, {})), (backend, backend, {})]
+    for label, profile, overrides in profiles:
+        async with bench_database():
+            engine = create_engine(BENCH_DATABASE_URL, profile=profile, **overrides)
+            try:
+                await run_profile(label, engine, repeat)
+            finally:
+                await engine.dispose()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    asyncio.run(main(count))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Benchmark: per-update FSM storage overhead for the transaction-recording flow.
+
+Replays the storage calls `TransactionFSM` makes (aiogram's initial state
+read, then the handler's get_data/update_data/set_state calls) against
+MemoryStorage, SQLStorage without buffering and SQLStorage behind the
+per-update write buffer. Then checks that overlapping buffered updates of
+one chat keep each other's changes and that an update that raises writes
+nothing back.
+
+Usage:
+    python benchmarks/bench_fsm_storage.py [chat_count]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import date
+
+from common import bench_database
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.states.forms import TransactionFSM
+from app.states.storage import BufferedStorage, SQLStorage
+
+# One entry per update: (update_data kwargs, next state)
+FLOW = [
+    ({"investor_search_results": [[1, "سرمایه‌گذار", "09120000001"]], "search_page": 1},
+     TransactionFSM.waiting_investor_selection),
+    ({"selected_investor_id": 1, "selected_investment_id": 1}, TransactionFSM.waiting_transaction_type),
+    ({"transaction_type": "deposit"}, TransactionFSM.waiting_amount_input),
+    ({"amount": 500_000_000}, TransactionFSM.waiting_date_input),
+    ({"date_year": 1403, "date_month": 1, "date_day": 1}, TransactionFSM.waiting_date_input),
+    ({"transaction_date": date(2024, 3, 20)}, TransactionFSM.waiting_description_input),
+    ({"description": None}, TransactionFSM.waiting_confirmation),
+]
+
+
+async def handle_update(storage, key: StorageKey, step: int):
+    """The storage calls aiogram and one handler make for a single update."""
+    await storage.get_state(key)  # FSMContextMiddleware
+    await storage.get_data(key)
+    updates, next_state = FLOW[step]
+    await storage.update_data(key, updates)
+    await storage.set_state(key, next_state)
+
+
+async def replay(storage, chat_count: int, buffered: bool) -> float:
+    """Run the full flow for every chat; return mean ms per update."""
+    started = time.perf_counter()
+    for step in range(len(FLOW)):
+        for chat_id in range(chat_count):
+            key = StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id)
+            if buffered:
+                async with storage.buffer():
+                    await handle_update(storage, key, step)
+            else:
+                await handle_update(storage, key, step)
+    return (time.perf_counter() - started) * 1000 / (chat_count * len(FLOW))
+
+
+def print_line(label: str, ms_per_update: float, storage, updates: int):
+    line = f"  {label:<28} {ms_per_update:8.3f} ms/update"
+    if isinstance(storage, BufferedStorage):
+        stats = storage.stats()
+        line += (
+            f"  loads={stats['loads'] / updates:.1f}/update"
+            f"  saves={stats['saves'] / updates:.1f}/update"
+            f"  coalesced={stats['writes_coalesced']:,}"
+        )
+    print(line)
+
+
+async def overlapping_updates(storage: BufferedStorage, key: StorageKey) -> dict:
+    """Two updates of one chat whose handlers interleave; returns the stored data."""
+    first_loaded = asyncio.Event()
+
+    async def first():
+        async with storage.buffer():
+            await storage.update_data(key, {"amount": 500_000_000})
+            first_loaded.set()
+            await asyncio.sleep(0.05)  # Still handling when the second update arrives
+            await storage.set_state(key, TransactionFSM.waiting_date_input)
+
+    async def second():
+        await first_loaded.wait()
+        async with storage.buffer():
+            await storage.update_data(key, {"description": "واریز"})
+
+    await asyncio.gather(first(), second())
+    return await storage.get_data(key)
+
+
+async def failed_update(storage: BufferedStorage, key: StorageKey):
+    """An update whose handler changes the FSM and then raises."""
+    try:
+        async with storage.buffer():
+            await storage.update_data(key, {"amount": 1})
+            await storage.set_state(key, TransactionFSM.waiting_confirmation)
+            raise RuntimeError("handler failed")
+    except RuntimeError:
+        pass
+
+
+async def main(chat_count: int) -> int:
+    updates = chat_count * len(FLOW)
+    print(f"\n💾 FSM storage benchmark ({chat_count:,} chats × {len(FLOW)} updates)")
+
+    memory = MemoryStorage()
+    print_line("MemoryStorage", await replay(memory, chat_count, buffered=False), memory, updates)
+
+    async with bench_database() as session_factory:
+        unbuffered = SQLStorage(session_factory, state_ttl=3600)
+        print_line(
+            "SQLStorage (write-through)", await replay(unbuffered, chat_count, buffered=False),
+            unbuffered, updates
+        )
+
+        buffered = SQLStorage(session_factory, state_ttl=3600)
+        print_line(
+            "SQLStorage (buffered)", await replay(buffered, chat_count, buffered=True),
+            buffered, updates
+        )
+
+        key = StorageKey(bot_id=1, chat_id=0, user_id=0)
+        data = await buffered.get_data(key)
+        assert data["transaction_date"] == date(2024, 3, 20), data
+        assert await buffered.get_state(key) == TransactionFSM.waiting_confirmation.state
+
+        expired = SQLStorage(session_factory, state_ttl=-1)
+        await expired.set_state(StorageKey(bot_id=1, chat_id=-1, user_id=-1), "abandoned")
+        print(f"  purged {await expired.purge_expired()} expired flow(s)")
+
+        key = StorageKey(bot_id=1, chat_id=-2, user_id=-2)
+        data = await overlapping_updates(buffered, key)
+        checks = [(
+            data == {"amount": 500_000_000, "description": "واریز"}
+            and await buffered.get_state(key) == TransactionFSM.waiting_date_input.state,
+            f"overlapping updates of one chat keep both changes: {data}"
+        )]
+        await failed_update(buffered, key)
+        checks.append((
+            await buffered.get_data(key) == data
+            and await buffered.get_state(key) == TransactionFSM.waiting_date_input.state,
+            "an update that raised wrote nothing back"
+        ))
+        checks.append((not buffered._locks._locks, "no key locks left behind"))
+
+    print("\n🧪 Checks")
+    failures = 0
+    for ok, label in checks:
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sys.exit(asyncio.run(main(count)))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark: in-process investor index vs the indexed database search.
+
+Seeds ``user_count`` investors (names and phones as in
+`bench_user_search.py`), loads `InvestorIndex` and reports its memory
+footprint per 100k investors, then replays typed prefixes of names and phone
+numbers against the index and against `UserRepository.search_by_name_or_phone`
+and reports p50/p99 latency. Every query's results are checked to match.
+
+Usage:
+    python benchmarks/bench_investor_index.py [user_count] [query_count]
+"""
+
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+
+from bench_user_search import FIRST_NAMES, LAST_NAMES, seed
+from common import bench_database
+
+from sqlalchemy import select
+
+from app.models.models import User, UserRole
+from app.services.investor_index import InvestorIndex
+from app.services.repositories import UserRepository
+
+
+def typed_queries(phones: list, count: int) -> list:
+    """Prefixes an accountant would send while typing names and numbers."""
+    rng = random.Random(42)
+    queries = []
+    while len(queries) < count:
+        kind = rng.random()
+        if kind < 0.4:
+            word = rng.choice(LAST_NAMES).replace("‌", "")
+            queries.append(word[:rng.randint(2, len(word))])
+        elif kind < 0.7:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            queries.append(f"{first} {last[:rng.randint(1, len(last))]}")
+        else:
+            phone = rng.choice(phones)
+            queries.append(phone[:rng.randint(5, len(phone))])
+    return queries
+
+
+def percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def main(user_count: int, query_count: int) -> int:
+    async with bench_database() as session_factory:
+        await seed(session_factory, user_count)
+        async with session_factory() as session:
+            investors = (await session.execute(
+                select(User.id, User.name, User.phone_number).where(User.role == UserRole.INVESTOR)
+            )).all()
+
+        index = InvestorIndex(session_factory, refresh_seconds=300)
+        started = time.perf_counter()
+        index.load(investors)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        index = InvestorIndex(session_factory, refresh_seconds=300)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        index.load(investors)
+        used = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        tracemalloc.stop()
+        del investors
+
+        print(f"\n📇 Investor index over {user_count:,} investors ({index.stats()['name_words']:,} name words)")
+        print(f"  load: {load_ms:.0f} ms, memory: {used / 2**20:.1f} MiB "
+              f"({used / 2**20 * 100_000 / user_count:.1f} MiB per 100k investors)")
+
+        queries = typed_queries([phone for _, _, phone in index.lookup("09", user_count)], query_count)
+        index_ms, db_ms, mismatches = [], [], 0
+        async with session_factory() as session:
+            repo = UserRepository(session)
+            for query in queries:
+                started = time.perf_counter()
+                from_index = index.lookup(query)
+                index_ms.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                users = await repo.search_by_name_or_phone(query, role=UserRole.INVESTOR)
+                db_ms.append((time.perf_counter() - started) * 1000)
+                mismatches += from_index != [(user.id, user.name, user.phone_number) for user in users]
+                session.expunge_all()
+
+        print(f"\n  {query_count} typed queries")
+        for label, samples in (("index lookup", index_ms), ("database search", db_ms)):
+            print(f"  {label:<16} p50={percentile(samples, 0.5):8.3f} ms  p99={percentile(samples, 0.99):8.3f} ms")
+        print(f"  {'✅' if not mismatches else '❌'} results differ for {mismatches} of {query_count} queries")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    sys.exit(asyncio.run(main(*(args + [100_000, 2_000][len(args):]))))
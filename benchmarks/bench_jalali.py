@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark: Jalali conversion through the lookup table versus `jdatetime`.
+
+Checks every day of the table (``jalali.MIN_DATE`` .. ``jalali.MAX_DATE``) in
+both directions against `jdatetime`, then times, per date:
+
+- `jdatetime.date.fromgregorian` (the old `gregorian_to_jalali`)
+- the old `format_jalali_date` (month-name dict built per call)
+- `jalali.to_jalali` / `format_jalali_date` on the table
+- the batch APIs (`jalali.to_jalali_many`, `format_jalali_dates`) over a
+  history page and a year of daily rows
+
+Usage:
+    python benchmarks/bench_jalali.py [calls]
+"""
+
+import sys
+import time
+from datetime import date, timedelta
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+import jdatetime
+
+from app.utils import jalali
+from app.utils.formatters import format_jalali_date, format_jalali_dates
+
+
+def old_format_jalali_date(gregorian_date: date) -> str:
+    """`format_jalali_date` before the lookup table."""
+    month_names = {
+        1: "فروردین", 2: "اردیبهشت", 3: "خرداد",
+        4: "تیر", 5: "مرداد", 6: "شهریور",
+        7: "مهر", 8: "آبان", 9: "آذر",
+        10: "دی", 11: "بهمن", 12: "اسفند"
+    }
+    jalali_date = jdatetime.date.fromgregorian(date=gregorian_date)
+    return f"{month_names[jalali_date.month]} {jalali_date.day}, {jalali_date.year}"
+
+
+def per_call_ns(func, args, calls: int) -> float:
+    """Mean cost of ``func(arg)`` over ``calls`` calls cycling through ``args``."""
+    args = (args * (calls // len(args) + 1))[:calls]
+    started = time.perf_counter()
+    for arg in args:
+        func(arg)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def per_item_ns(func, items, repeat: int) -> float:
+    """Mean cost per item of ``func(items)``."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(items)
+    return (time.perf_counter() - started) / (repeat * len(items)) * 1e9
+
+
+def verify():
+    started = time.perf_counter()
+    jalali.to_jalali(jalali.MIN_DATE)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    day = jalali.MIN_DATE
+    days = 0
+    while day <= jalali.MAX_DATE:
+        expected = jdatetime.date.fromgregorian(date=day)
+        assert jalali.to_jalali(day) == (expected.year, expected.month, expected.day), day
+        assert jalali.to_gregorian(expected.year, expected.month, expected.day) == day, day
+        day += timedelta(days=1)
+        days += 1
+
+    # Outside the table: jdatetime fallback
+    for outside in (date(1800, 3, 21), date(2200, 1, 1)):
+        expected = jdatetime.date.fromgregorian(date=outside)
+        assert jalali.to_jalali(outside) == (expected.year, expected.month, expected.day)
+        assert jalali.to_gregorian(expected.year, expected.month, expected.day) == outside
+
+    for invalid in ((1403, 13, 1), (1403, 7, 31), (1402, 12, 30)):
+        try:
+            jalali.to_gregorian(*invalid)
+        except ValueError:
+            continue
+        raise AssertionError(f"{invalid} accepted")
+
+    print(f"  table built in {build_ms:.1f} ms; {days:,} days match jdatetime both ways ✅")
+
+
+def main(calls: int):
+    print(f"\n📅 Jalali conversion benchmark ({calls:,} calls)")
+    verify()
+
+    today = date.today()
+    dates = [today - timedelta(days=i * 37) for i in range(100)]
+    page = [today - timedelta(days=i) for i in range(10)]
+    year = [today - timedelta(days=i) for i in range(365)]
+
+    convert = per_call_ns(lambda d: jdatetime.date.fromgregorian(date=d), dates, calls)
+    old_format = per_call_ns(old_format_jalali_date, dates, calls)
+    results = [
+        ("jdatetime.fromgregorian", convert, convert),
+        ("jalali.to_jalali", per_call_ns(jalali.to_jalali, dates, calls), convert),
+        ("to_jalali_many (365)", per_item_ns(jalali.to_jalali_many, year, calls // 365), convert),
+        ("old format_jalali_date", old_format, old_format),
+        ("format_jalali_date", per_call_ns(format_jalali_date, dates, calls), old_format),
+        ("format_jalali_dates (10)", per_item_ns(format_jalali_dates, page, calls // 10), old_format),
+        ("format_jalali_dates (365)", per_item_ns(format_jalali_dates, year, calls // 365), old_format),
+    ]
+    for label, ns, baseline in results:
+        print(f"  {label:<26} {ns:8.0f} ns/date   {baseline / ns:5.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark: per-update session cost of `DatabaseSessionMiddleware`.
+
+Runs three kinds of update through the session and auth middleware: a pure
+UI callback (settings/help menus, date picker redraws), an update whose
+sender is already in `user_cache`, and one that queries the database.
+Compares the lazy session against creating a session for every update
+(the previous behaviour), counting pool checkouts and sessions created.
+
+Usage:
+    python benchmarks/bench_lazy_session.py [updates]
+"""
+
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from common import bench_database, measure, print_result
+
+from sqlalchemy import event
+
+from app.database.lazy_session import session_usage
+from app.middleware import AuthMiddleware, DatabaseSessionMiddleware
+from app.models.models import User, UserRole
+from app.services.repositories import InvestmentRepository
+from app.services.user_cache import user_cache
+
+TELEGRAM_ID = 2_000_001
+
+
+class EagerSessionMiddleware(DatabaseSessionMiddleware):
+    """Previous behaviour: a session for every update."""
+
+    async def __call__(self, handler, event, data: dict):
+        async with self.session_factory() as session:
+            data["session"] = session
+            try:
+                return await handler(event, data)
+            finally:
+                await session.close()
+
+
+async def ui_only(event, data):
+    return None
+
+
+async def database_read(event, data):
+    return await InvestmentRepository(data["session"]).get_by_user(data["user"].id)
+
+
+async def main(updates: int) -> int:
+    async with bench_database() as session_factory:
+        async with session_factory() as session:
+            session.add(User(
+                telegram_id=TELEGRAM_ID, phone_number="09120000001", name="بنچمارک",
+                role=UserRole.INVESTOR, is_verified=True,
+            ))
+            await session.commit()
+
+        checkouts = 0
+
+        def count_checkout(*args):
+            nonlocal checkouts
+            checkouts += 1
+
+        engine = session_factory.kw["bind"]
+        event.listen(engine.sync_engine.pool, "checkout", count_checkout)
+
+        auth = AuthMiddleware()
+        sender = SimpleNamespace(id=TELEGRAM_ID)
+        scenarios = [
+            ("pure UI callback (no auth lookup)", ui_only, False),
+            ("cached sender, UI-only handler", ui_only, True),
+            ("cached sender, one DB read", database_read, True),
+        ]
+
+        print(f"\n🔌 Session middleware cost ({updates} updates per scenario)")
+        for middleware in (EagerSessionMiddleware(session_factory), DatabaseSessionMiddleware(session_factory)):
+            name = "lazy" if type(middleware) is DatabaseSessionMiddleware else "eager"
+            print(f"\n  {name} session")
+            for label, handler, with_auth in scenarios:
+                async def update():
+                    data = {"event_from_user": sender}
+                    if with_auth:
+                        return await middleware(lambda e, d: auth(handler, e, d), None, data)
+                    return await middleware(handler, None, data)
+
+                user_cache.clear()
+                await update()  # warm the user cache
+                checkouts = 0
+                stats = await measure(update, updates)
+                print_result(f"{label:<36} {checkouts / updates:.2f} checkouts/update", stats)
+
+        print(f"\n  session usage (lazy runs): {session_usage.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Benchmark: streaming ledger export, memory and throughput.
+
+Seeds ``row_count`` transactions over 1000 investments and exports them
+through the real export router, driving the ASGI app directly and
+discarding the body as it arrives (like a client writing it to disk):
+
+- NDJSON and CSV streamed by ``GET /api/v1/export/transactions``
+- for comparison, the same rows loaded with one ``.all()`` and encoded in
+  one piece (the shape of a non-streaming endpoint), on a tenth of the rows
+
+and reports rows/s and how far the process RSS grew during each. Then
+checks line counts, the Jalali column and the filters.
+
+Usage:
+    python benchmarks/bench_ledger_export.py [row_count]
+"""
+
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from datetime import date, timedelta
+
+from common import bench_database
+
+from fastapi import FastAPI
+from sqlalchemy import insert, select, func
+
+from app.api import exports
+from app.models.models import (
+    User, Investment, Transaction, Valuation, UserRole, ContractType, TransactionType
+)
+from app.services.ledger_export import ndjson_chunks
+from app.services.repositories import TransactionRepository
+
+INVESTMENT_COUNT = 1000
+SEED_BATCH = 50_000
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mib() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2 ** 20
+
+
+async def seed(session_factory, row_count: int):
+    types = [TransactionType.DEPOSIT, TransactionType.WITHDRAWAL, TransactionType.DIVIDEND]
+    async with session_factory() as session:
+        accountant = User(telegram_id=1, phone_number="09000000000", name="حسابدار",
+                          role=UserRole.ACCOUNTANT, is_verified=True)
+        session.add(accountant)
+        await session.flush()
+        await session.execute(insert(User), [
+            {"telegram_id": 1_000_000 + i, "phone_number": f"0912{i:07d}", "name": f"سرمایه‌گذار {i}",
+             "role": UserRole.INVESTOR, "is_verified": True}
+            for i in range(INVESTMENT_COUNT)
+        ])
+        await session.execute(insert(Investment), [
+            {"user_id": i + 2, "contract_type": ContractType.VARIABLE_HOLDING,
+             "initial_amount": 1_000_000_000, "start_date": date(2020, 1, 1)}
+            for i in range(INVESTMENT_COUNT)
+        ])
+        for offset in range(0, row_count, SEED_BATCH):
+            await session.execute(insert(Transaction), [
+                {"investment_id": i % INVESTMENT_COUNT + 1, "type": types[i % 3],
+                 "amount": -1_000_000 - i if i % 3 == 1 else 1_000_000 + i,
+                 "transaction_date": date(2020, 1, 1) + timedelta(days=i % 2000),
+                 "description": "واریز از طریق اپلیکیشن" if i % 10 == 0 else None,
+                 "recorded_by": accountant.id}
+                for i in range(offset, min(offset + SEED_BATCH, row_count))
+            ])
+        await session.execute(insert(Valuation), [
+            {"investment_id": i + 1, "new_value": 1_100_000_000, "valuation_date": date(2024, 3, 20),
+             "updated_by": accountant.id}
+            for i in range(INVESTMENT_COUNT)
+        ])
+        await session.commit()
+
+
+async def get(app: FastAPI, path: str, query: str = "", keep: bool = False) -> dict:
+    """Run one GET through the ASGI app; count (or keep) the body and track RSS."""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": path,
+        "raw_path": path.encode(), "query_string": query.encode(), "headers": [],
+        "server": ("bench", 80), "client": ("127.0.0.1", 1), "root_path": "",
+    }
+    response = {"status": None, "bytes": 0, "body": [], "rss_start": rss_mib(), "rss_peak": 0.0}
+
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        # The request, then (as a real server would) nothing until the client goes away
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["bytes"] += len(message.get("body", b""))
+            if keep:
+                response["body"].append(message.get("body", b""))
+            response["rss_peak"] = max(response["rss_peak"], rss_mib())
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    response["body"] = b"".join(response["body"])
+    return response
+
+
+async def main(row_count: int) -> int:
+    failures = 0
+    checks = []
+    async with bench_database() as session_factory:
+        print(f"\n🌱 Seeding {row_count} ledger rows...")
+        await seed(session_factory, row_count)
+
+        app = FastAPI()
+        app.include_router(exports.router)
+        app.dependency_overrides[exports.get_session_factory] = lambda: session_factory
+
+        print(f"\n📤 Exporting {row_count} transactions (RSS {rss_mib():.0f} MiB before)")
+        for export_format in ("ndjson", "csv"):
+            started = time.perf_counter()
+            response = await get(app, "/api/v1/export/transactions", f"format={export_format}")
+            elapsed = time.perf_counter() - started
+            print(f"  streamed {export_format:<7} {elapsed:>6.1f} s {row_count / elapsed:>9.0f} rows/s "
+                  f"{response['bytes'] / 2 ** 20:>7.0f} MiB sent, RSS +{response['rss_peak'] - response['rss_start']:.0f} MiB")
+
+        sample = row_count // 10
+        rss_start = rss_mib()
+        started = time.perf_counter()
+        async with session_factory() as session:
+            rows = (await session.execute(
+                select(*TransactionRepository.EXPORT_COLUMNS).order_by(Transaction.id).limit(sample)
+            )).all()
+
+            async def one_batch():
+                yield rows
+
+            fields = [column.key for column in TransactionRepository.EXPORT_COLUMNS]
+            body = b"".join([chunk async for chunk in ndjson_chunks(one_batch(), fields, ("transaction_date",))])
+        elapsed = time.perf_counter() - started
+        print(f"  {'in one piece':<16} {elapsed:>6.1f} s {sample / elapsed:>9.0f} rows/s {len(body) / 2 ** 20:>7.0f} MiB "
+              f"built, RSS +{rss_mib() - rss_start:.0f} MiB ({sample} rows only)")
+        del rows, body
+        print(f"  peak RSS of the process: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+        async with session_factory() as session:
+            async def count(*conditions):
+                return (await session.execute(select(func.count(Transaction.id)).where(*conditions))).scalar()
+
+            filtered = [
+                ("investment_id=7", (Transaction.investment_id == 7,)),
+                ("type=dividend", (Transaction.type == TransactionType.DIVIDEND,)),
+                ("date_from=2021-01-01&date_to=2021-03-31",
+                 (Transaction.transaction_date >= date(2021, 1, 1), Transaction.transaction_date <= date(2021, 3, 31))),
+                ("investment_id=7&type=withdrawal&date_from=2022-01-01",
+                 (Transaction.investment_id == 7, Transaction.type == TransactionType.WITHDRAWAL,
+                  Transaction.transaction_date >= date(2022, 1, 1))),
+            ]
+            expected = [await count(*conditions) for _, conditions in filtered]
+
+        for (query, _), expected_count in zip(filtered, expected):
+            response = await get(app, "/api/v1/export/transactions", query, keep=True)
+            lines = response["body"].decode().splitlines()
+            checks.append((len(lines) == expected_count, f"{query}: {len(lines)} NDJSON lines"))
+
+        response = await get(app, "/api/v1/export/valuations", "format=csv", keep=True)
+        lines = response["body"].decode("utf-8-sig").splitlines()
+        checks.append((
+            lines[0] == "id,investment_id,old_value,new_value,profit_percentage,valuation_date,"
+                        "valuation_date_jalali,reason,updated_by,created_at"
+            and len(lines) == INVESTMENT_COUNT + 1 and ",2024-03-20,1403/01/01," in lines[1],
+            "valuations CSV: header, one line per row, Jalali date"
+        ))
+        response = await get(app, "/api/v1/export/transactions", "investment_id=1&type=deposit", keep=True)
+        first = json.loads(response["body"].decode().splitlines()[0])
+        checks.append((first["type"] == "deposit" and first["transaction_date"] == "2020-01-01"
+                       and first["transaction_date_jalali"] == "1398/10/11", f"NDJSON row: {first}"))
+        response = await get(app, "/api/v1/export/transactions", "date_from=2022-01-02&date_to=2022-01-01")
+        checks.append((response["status"] == 400, "reversed date range rejected"))
+
+    print("\n🧪 Checks")
+    for ok, label in checks:
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)))
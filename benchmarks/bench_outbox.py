@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Benchmark: notification outbox delivery against a local fake Bot API server.
+
+Records one deposit per investor through `PortfolioService` (which queues the
+notification in the same transaction), records it a second time under the
+same dedup key, then lets `OutboxDispatcher` deliver everything to a fake
+Bot API that enforces Telegram's limits: about 30 messages/s per bot and one
+message/s per chat, answering 429 with ``retry_after`` otherwise. It also
+fails a share of requests with 500.
+
+Two runs are compared: rate limiting on (the default settings) and off
+(limits far above Telegram's, so every burst runs into 429s). Then checks
+that a non-Telegram exception during a send is retried without stalling the
+chat or leaking dispatcher capacity, and that outcomes survive a failed
+write-back.
+
+Usage:
+    python benchmarks/bench_outbox.py [investor_count] [messages_per_investor]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from datetime import date
+
+from common import bench_database
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from app.models.models import (
+    User, Investment, OutboxStatus, UserRole, ContractType, TransactionType
+)
+from app.services.outbox_dispatcher import OutboxDispatcher
+from app.services.portfolio_service import PortfolioService
+from app.services.repositories import OutboxRepository
+
+GLOBAL_LIMIT = 30        # messages per rolling second, per bot
+CHAT_INTERVAL = 0.9      # seconds between messages to one chat (1/s with some slack)
+SERVER_ERROR_RATE = 0.02
+FAKE_API_PORT = 8765
+
+
+class FakeBotAPI:
+    """Minimal ``sendMessage`` endpoint with Telegram-style flood control."""
+
+    def __init__(self):
+        self.recent = deque()
+        self.last_by_chat = {}
+        self.delivered = defaultdict(list)
+        self.too_many = 0
+        self.errors = 0
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        params = dict(await request.post()) or await request.json()
+        chat_id = int(params["chat_id"])
+        now = time.monotonic()
+
+        while self.recent and now - self.recent[0] >= 1.0:
+            self.recent.popleft()
+        last = self.last_by_chat.get(chat_id)
+        if len(self.recent) >= GLOBAL_LIMIT or (last is not None and now - last < CHAT_INTERVAL):
+            self.too_many += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            }, status=429)
+        if random.random() < SERVER_ERROR_RATE:
+            self.errors += 1
+            return web.json_response(
+                {"ok": False, "error_code": 500, "description": "Internal Server Error"}, status=500
+            )
+
+        self.recent.append(now)
+        self.last_by_chat[chat_id] = now
+        self.delivered[chat_id].append(params["text"])
+        return web.json_response({"ok": True, "result": {
+            "message_id": len(self.delivered[chat_id]),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params["text"],
+        }})
+
+
+async def seed(session_factory, investor_count: int) -> list:
+    async with session_factory() as session:
+        investments = []
+        for i in range(investor_count):
+            user = User(
+                telegram_id=5_000_000 + i,
+                phone_number=f"0912{i:07d}",
+                name=f"سرمایه‌گذار {i}",
+                role=UserRole.INVESTOR,
+                is_verified=True,
+            )
+            session.add(user)
+            await session.flush()
+            investment = Investment(
+                user_id=user.id,
+                contract_type=ContractType.VARIABLE_HOLDING,
+                initial_amount=1_000_000_000,
+                start_date=date(2024, 1, 1),
+            )
+            session.add(investment)
+            investments.append(investment)
+        await session.commit()
+        return [investment.id for investment in investments]
+
+
+async def queue_notifications(session_factory, investment_ids: list, per_investor: int) -> int:
+    """Record deposits (queuing their notifications), then re-queue them all."""
+    async with session_factory() as session:
+        service = PortfolioService(session)
+        transactions = []
+        for n in range(per_investor):
+            for investment_id in investment_ids:
+                transactions.append(await service.record_transaction(
+                    investment_id, TransactionType.DEPOSIT, 1_000_000 * (n + 1),
+                    date(2024, 3, 20), recorded_by=1
+                ))
+        await session.commit()
+
+        duplicates = 0
+        for transaction in transactions:
+            duplicates += await service.notification_service.notify_transaction_recorded(transaction)
+        await session.commit()
+    return duplicates
+
+
+async def deliver(session_factory, bot: Bot, api: FakeBotAPI, expected: int, rate_limited: bool):
+    if rate_limited:
+        dispatcher = OutboxDispatcher(session_factory, bot, poll_interval=0.2)
+    else:
+        dispatcher = OutboxDispatcher(session_factory, bot, global_rate=1000,
+                                      per_chat_rate=1000, poll_interval=0.2)
+    dispatcher.backoff_base = 0.2
+
+    started = time.perf_counter()
+    dispatcher.start()
+    while dispatcher.sent + dispatcher.failed < expected:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - started
+    await dispatcher.stop()
+
+    async with session_factory() as session:
+        statuses = await OutboxRepository(session).count_by_status()
+    return dispatcher.metrics(), elapsed, statuses
+
+
+async def run(investor_count: int, per_investor: int, rate_limited: bool):
+    api = FakeBotAPI()
+    app = web.Application()
+    app.router.add_post("/bot{token}/sendMessage", api.send_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", FAKE_API_PORT).start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{FAKE_API_PORT}"))
+    bot = Bot("123456:bench", session=session)
+    expected = investor_count * per_investor
+
+    try:
+        async with bench_database() as session_factory:
+            investment_ids = await seed(session_factory, investor_count)
+            duplicates = await queue_notifications(session_factory, investment_ids, per_investor)
+            metrics, elapsed, statuses = await deliver(
+                session_factory, bot, api, expected, rate_limited
+            )
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+
+    delivered = sum(len(texts) for texts in api.delivered.values())
+    repeated = sum(
+        count - 1 for texts in api.delivered.values() for count in Counter(texts).values()
+    )
+    label = "rate limited" if rate_limited else "unthrottled"
+    print(
+        f"  {label:<13} {delivered}/{expected} delivered in {elapsed:5.1f} s "
+        f"({delivered / elapsed:5.1f} msg/s)  "
+        f"latency p50={metrics['delivery_latency_ms']['p50'] / 1000:5.1f} s "
+        f"p95={metrics['delivery_latency_ms']['p95'] / 1000:5.1f} s"
+    )
+    print(
+        f"  {'':<13} 429s={api.too_many}  500s={api.errors}  retried={metrics['retried']}  "
+        f"failed={metrics['failed']}  dedup re-queues accepted={duplicates}  "
+        f"repeated deliveries={repeated}  "
+        f"outbox={ {status.value: count for status, count in statuses.items()} }"
+    )
+    assert duplicates == 0
+    assert statuses.get(OutboxStatus.SENT, 0) + statuses.get(OutboxStatus.FAILED, 0) == expected
+
+
+class FlakyBot:
+    """Stands in for `Bot`: the first send to ``broken_chat`` raises a plain exception."""
+
+    def __init__(self, broken_chat: int):
+        self.broken_chat = broken_chat
+        self.broke = False
+        self.delivered = defaultdict(list)
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if chat_id == self.broken_chat and not self.broke:
+            self.broke = True
+            raise ValueError("cannot encode message")
+        self.delivered[chat_id].append(text)
+
+
+async def failure_checks() -> list:
+    checks = []
+    async with bench_database() as session_factory:
+        async with session_factory() as session:
+            repo = OutboxRepository(session)
+            for chat_id in (1, 2):
+                for n in range(3):
+                    await repo.enqueue(chat_id, f"پیام {n}", dedup_key=f"check:{chat_id}:{n}")
+            await session.commit()
+
+        bot = FlakyBot(broken_chat=1)
+        # Capacity for only two messages, so a leaked in-flight slot stalls everything
+        dispatcher = OutboxDispatcher(session_factory, bot, global_rate=1000, per_chat_rate=1000,
+                                      batch_size=2, poll_interval=0.05)
+        dispatcher.backoff_base = 0.05
+        dispatcher.start()
+        deadline = time.monotonic() + 10
+        while dispatcher.sent < 6 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await dispatcher.stop()
+        checks.append((
+            bot.broke and dispatcher.sent == 6 and dispatcher.retried == 1
+            and sorted(bot.delivered[1]) == ["پیام 0", "پیام 1", "پیام 2"],
+            f"plain exception retried, chat kept going ({dispatcher.sent}/6 sent)"
+        ))
+        checks.append((dispatcher.metrics()["in_flight"] == 0, "no in-flight slots leaked"))
+
+        async with session_factory() as session:
+            await OutboxRepository(session).enqueue(3, "پیام", dedup_key="check:3")
+            await session.commit()
+            message_id = (await OutboxRepository(session).claim_due(1, 300))[0].id
+            await session.commit()
+
+        def broken_factory():
+            raise ConnectionError("database unavailable")
+
+        dispatcher._sent.append(message_id)
+        dispatcher.session_factory = broken_factory
+        try:
+            await dispatcher.flush()
+        except ConnectionError:
+            pass
+        kept = dispatcher._sent == [message_id]
+        dispatcher.session_factory = session_factory
+        await dispatcher.flush()
+        async with session_factory() as session:
+            statuses = await OutboxRepository(session).count_by_status()
+        checks.append((kept and statuses.get(OutboxStatus.SENT) == 7,
+                       "outcomes kept through a failed flush and written by the next"))
+    return checks
+
+
+async def main(investor_count: int, per_investor: int) -> int:
+    print(f"\n📨 Outbox delivery benchmark ({investor_count} chats × {per_investor} messages, "
+          f"fake API: {GLOBAL_LIMIT} msg/s global, 1 msg/s per chat, "
+          f"{SERVER_ERROR_RATE:.0%} 500s)")
+    await run(investor_count, per_investor, rate_limited=True)
+    await run(investor_count, per_investor, rate_limited=False)
+
+    print("\n🧪 Checks")
+    failures = 0
+    for ok, label in await failure_checks():
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    investors = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    sys.exit(asyncio.run(main(investors, messages)))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Benchmark: legacy three-query portfolio summary vs aggregate query vs snapshot.
+
+Usage:
+    python benchmarks/bench_portfolio_summary.py [transaction_count]
+"""
+
+import asyncio
+import sys
+
+from common import bench_database, seed_investment, measure, print_result
+
+from app.models.models import TransactionType
+from app.services.repositories import (
+    InvestmentRepository, TransactionRepository, ValuationRepository, BalanceRepository
+)
+from app.services.portfolio_service import PortfolioService
+
+
+async def legacy_summary(session, investment_id: int) -> dict:
+    """The pre-aggregation implementation: load everything, sum in Python."""
+    investment = await InvestmentRepository(session).get_by_id(investment_id)
+    transactions = await TransactionRepository(session).get_by_investment(investment_id)
+    latest = await ValuationRepository(session).get_latest_by_investment(investment_id)
+    
+    deposits = sum(t.amount for t in transactions if t.type == TransactionType.DEPOSIT)
+    withdrawals = sum(abs(t.amount) for t in transactions if t.type == TransactionType.WITHDRAWAL)
+    profits = sum(t.amount for t in transactions if t.type == TransactionType.DIVIDEND)
+    if latest:
+        return {"current_value": latest.new_value}
+    return {"current_value": investment.initial_amount + deposits - withdrawals + profits}
+
+
+async def main(transaction_count: int):
+    print(f"\n📊 Portfolio summary benchmark ({transaction_count:,} transactions)")
+    
+    async with bench_database() as session_factory:
+        async with session_factory() as session:
+            investment = await seed_investment(session, transaction_count)
+        
+        async def run_legacy():
+            async with session_factory() as session:
+                return await legacy_summary(session, investment.id)
+        
+        async def run_aggregate():
+            async with session_factory() as session:
+                # No snapshot row yet: the service aggregates the ledger
+                return await PortfolioService(session).get_portfolio_summary(investment.id)
+        
+        async def run_snapshot():
+            async with session_factory() as session:
+                return await PortfolioService(session).get_portfolio_summary(investment.id)
+        
+        legacy = await run_legacy()
+        aggregate = await run_aggregate()
+        assert abs(legacy["current_value"] - aggregate["current_value"]) < 1e-6, (
+            legacy, aggregate
+        )
+        
+        print_result("legacy (3 queries + Python)", await measure(run_legacy, repeat=5))
+        print_result("aggregate (1 query)", await measure(run_aggregate, repeat=20))
+        
+        async with session_factory() as session:
+            await BalanceRepository(session).rebuild()
+            await session.commit()
+        
+        snapshot = await run_snapshot()
+        assert abs(snapshot["current_value"] - aggregate["current_value"]) < 1e-6
+        print_result("snapshot (PK lookup)", await measure(run_snapshot, repeat=20))
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    asyncio.run(main(count))
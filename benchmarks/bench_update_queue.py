@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark: webhook update queue throughput, per-chat ordering and backpressure.
+
+Feeds synthetic message updates through `UpdateQueue` into a dispatcher
+whose handler simulates ``handler_ms`` of I/O, then checks every chat saw its
+messages in order. A second run uses a tiny queue to show rejections (503s).
+
+Usage:
+    python benchmarks/bench_update_queue.py [chat_count] [messages_per_chat]
+"""
+
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import common  # noqa: F401  (adds the project root to sys.path)
+
+from aiogram import Bot, Dispatcher, Router, types
+
+from app.services.update_queue import UpdateQueue
+
+HANDLER_MS = 5
+
+
+def make_update(update_id: int, chat_id: int, seq: int) -> types.Update:
+    return types.Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": seq,
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "bench"},
+            "text": str(seq),
+        },
+    })
+
+
+def make_dispatcher(seen: dict) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def record(message: types.Message):
+        await asyncio.sleep(HANDLER_MS / 1000)
+        seen[message.chat.id].append(int(message.text))
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+async def run(chat_count: int, per_chat: int, workers: int, max_size: int,
+              enqueue_timeout: float) -> tuple:
+    seen = defaultdict(list)
+    bot = Bot("123456:bench")
+    queue = UpdateQueue(make_dispatcher(seen), bot, workers=workers, max_size=max_size,
+                        enqueue_timeout=enqueue_timeout)
+    queue.start()
+
+    started = time.perf_counter()
+    update_id = 0
+    for seq in range(per_chat):
+        for chat_id in range(1, chat_count + 1):
+            update_id += 1
+            await queue.put(make_update(update_id, chat_id, seq))
+    await queue.stop(drain_timeout=None)
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+
+    ordered = all(values == sorted(values) for values in seen.values())
+    return queue.metrics(), elapsed, ordered
+
+
+async def main(chat_count: int, per_chat: int):
+    total = chat_count * per_chat
+    print(f"\n📬 Update queue benchmark ({chat_count} chats × {per_chat} updates, "
+          f"{HANDLER_MS} ms handler)")
+
+    for workers in (1, 8, 32):
+        metrics, elapsed, ordered = await run(chat_count, per_chat, workers, 1000, 5.0)
+        print(
+            f"  workers={workers:<3} {total / elapsed:8.0f} updates/s  "
+            f"wait p95={metrics['queue_wait_ms']['p95']:8.1f} ms  "
+            f"handle p95={metrics['handle_ms']['p95']:6.1f} ms  "
+            f"per-chat order {'✅' if ordered else '❌'}"
+        )
+
+    metrics, _, ordered = await run(chat_count, per_chat, workers=2, max_size=4,
+                                    enqueue_timeout=0.001)
+    print(
+        f"  backpressure (queue=4, timeout=1 ms): rejected {metrics['rejected']}/{total} "
+        f"(would answer 503), per-chat order {'✅' if ordered else '❌'}"
+    )
+
+
+if __name__ == "__main__":
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(chats, messages))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark: investor search over ``user_count`` users.
+
+Compares the old ``ILIKE '%query%'`` scan of `users.name` / `phone_number`
+with `UserRepository.search_by_name_or_phone` (prefix ranges over the
+normalized `user_search_terms` index and `phone_number`). Queries cover a
+short prefix, a last name, two words, Arabic letter variants and Persian
+digits; the result counts show what the old query missed.
+
+Usage:
+    python benchmarks/bench_user_search.py [user_count]
+"""
+
+import asyncio
+import sys
+import time
+
+from common import bench_database, measure, print_result
+
+from sqlalchemy import insert, or_, select, text
+
+from app.models.models import User, UserRole, UserSearchTerm, search_term_rows
+from app.services.repositories import UserRepository
+
+FIRST_NAMES = [
+    "علی", "محمد", "حسین", "رضا", "مهدی", "امیر", "سارا", "مریم", "فاطمه", "زهرا",
+    "نرگس", "آرش", "کیان", "یاسمن", "نیلوفر", "حمید", "کاوه", "شیما", "الهام", "پویا",
+]
+LAST_NAMES = [
+    "احمدی", "محمدی", "کریمی", "رضایی", "حسینی", "موسوی", "جعفری", "کاظمی", "یزدانی",
+    "مهدی‌زاده", "علیزاده", "نوروزی", "قاسمی", "صادقی", "رحیمی", "کیانی", "شریفی", "اکبری",
+]
+BATCH_SIZE = 20_000
+
+QUERIES = [
+    ("short prefix", "عل"),
+    ("last name", "کریمی"),
+    ("first + last name", "مریم یزدانی"),
+    ("Arabic letters (علي كريمي)", "علي كريمي"),
+    ("half-space compound typed joined", "مهدیزاده"),
+    ("phone prefix", "0912345"),
+    ("full phone, Persian digits", "۰۹۱۲۰۰۰۷۹۱۹"),
+]
+
+
+def name_for(i: int) -> str:
+    return f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i}"
+
+
+async def seed(session_factory, user_count: int):
+    async with session_factory() as session:
+        for start in range(0, user_count, BATCH_SIZE):
+            users = [
+                {
+                    "id": i + 1,
+                    "telegram_id": 1_000_000 + i,
+                    "phone_number": f"0912{(i * 7919) % 10_000_000:07d}",
+                    "name": name_for(i),
+                    "role": UserRole.INVESTOR,
+                    "is_verified": True,
+                }
+                for i in range(start, min(start + BATCH_SIZE, user_count))
+            ]
+            await session.execute(insert(User), users)
+            await session.execute(insert(UserSearchTerm), [
+                row for user in users for row in search_term_rows(user["id"], user["name"])
+            ])
+        # As migration 0002 does: SQLite needs statistics to pick the search indexes
+        await session.execute(text("ANALYZE"))
+        await session.commit()
+
+
+async def legacy_search(session, query: str):
+    """The previous implementation."""
+    search_term = f"%{query}%"
+    stmt = select(User).where(
+        or_(User.name.ilike(search_term), User.phone_number.ilike(search_term))
+    ).order_by(User.name).limit(20)
+    return (await session.execute(stmt)).scalars().all()
+
+
+async def main(user_count: int) -> int:
+    async with bench_database() as session_factory:
+        started = time.perf_counter()
+        await seed(session_factory, user_count)
+        print(f"\n🔎 Investor search over {user_count:,} users (seeded in {time.perf_counter() - started:.1f}s)")
+
+        async with session_factory() as session:
+            repo = UserRepository(session)
+            for label, query in QUERIES:
+                print(f"\n  {label}: {query}")
+                for name, search in (
+                    ("ILIKE scan", lambda: legacy_search(session, query)),
+                    ("indexed search", lambda: repo.search_by_name_or_phone(query, role=UserRole.INVESTOR)),
+                ):
+                    found = len(await search())
+                    stats = await measure(search, 20)
+                    print_result(f"{name:<15} {found:>2} results", stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)))
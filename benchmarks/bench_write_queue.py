@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Load test: sustained SQLite write throughput with and without `WriteQueue`.
+
+``handlers`` concurrent tasks each record deposits in a loop through
+`PortfolioService.record_transaction` (ledger row, balance snapshot and
+outbox notification), while a few reader tasks keep loading portfolio
+summaries. One write in ``FAILURE_RATE`` raises after its changes are
+flushed, like a handler's validation error. Two runs on the tuned
+``sqlite`` engine profile are compared:
+
+- direct: every write opens a session and commits it, as handlers did
+- write queue: every write goes through `WriteQueue.run`
+
+Each run reports committed writes/s, lock errors, write latency and the
+readers' throughput. It then checks that exactly the successful writes
+reached the ledger and that the balance snapshots match it.
+
+Usage:
+    python benchmarks/bench_write_queue.py [handlers] [seconds]
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+from common import BENCH_DATABASE_URL, bench_database
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.engine import create_engine
+from app.models.models import User, Transaction, UserRole, ContractType, TransactionType
+from app.services.portfolio_service import PortfolioService
+from app.services.repositories import BalanceRepository, InvestmentRepository
+from app.services.write_queue import WriteQueue
+
+INVESTOR_COUNT = 200
+READERS = 4
+FAILURE_RATE = 100
+
+
+class RejectedWrite(Exception):
+    pass
+
+
+async def seed(session_factory) -> tuple:
+    async with session_factory() as session:
+        accountant = User(
+            telegram_id=4_000_000, phone_number="09129999999", name="حسابدار",
+            role=UserRole.ACCOUNTANT, is_verified=True,
+        )
+        session.add(accountant)
+        investments = []
+        for i in range(INVESTOR_COUNT):
+            user = User(
+                telegram_id=4_000_001 + i,
+                phone_number=f"0912{i:07d}",
+                name=f"سرمایه‌گذار {i}",
+                role=UserRole.INVESTOR,
+                is_verified=True,
+            )
+            session.add(user)
+            await session.flush()
+            investments.append(await InvestmentRepository(session).create(
+                user.id, ContractType.VARIABLE_HOLDING, 1_000_000_000, date(2024, 1, 1)
+            ))
+        await session.commit()
+        return accountant.id, [investment.id for investment in investments]
+
+
+async def run_load(session_factory, queue, handlers: int, seconds: float) -> dict:
+    accountant_id, investment_ids = await seed(session_factory)
+    latencies, stats = [], {"writes": 0, "errors": 0, "rejected": 0, "reads": 0}
+    stop = asyncio.Event()
+
+    async def handler():
+        while not stop.is_set():
+            investment_id = random.choice(investment_ids)
+            rejected = random.randrange(FAILURE_RATE) == 0
+
+            async def record(write_session: AsyncSession):
+                transaction = await PortfolioService(write_session).record_transaction(
+                    investment_id=investment_id,
+                    txn_type=TransactionType.DEPOSIT,
+                    amount=1_000_000,
+                    transaction_date=date.today(),
+                    recorded_by=accountant_id,
+                )
+                if rejected:
+                    raise RejectedWrite()
+                return transaction
+
+            started = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    await queue.run(session, record)
+                stats["writes"] += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                stats["errors"] += 1
+            except RejectedWrite:
+                stats["rejected"] += 1
+
+    async def reader():
+        while not stop.is_set():
+            async with session_factory() as session:
+                await PortfolioService(session).get_portfolio_summary(random.choice(investment_ids))
+            stats["reads"] += 1
+
+    tasks = [asyncio.create_task(handler()) for _ in range(handlers)]
+    tasks += [asyncio.create_task(reader()) for _ in range(READERS)]
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    async with session_factory() as session:
+        ledger_rows = await session.scalar(select(func.count()).select_from(Transaction))
+        drift = await BalanceRepository(session).verify()
+    assert ledger_rows == stats["writes"], (ledger_rows, stats["writes"])
+    assert not drift, drift[:5]
+
+    latencies.sort()
+    return {
+        "writes_per_s": stats["writes"] / elapsed,
+        "reads_per_s": stats["reads"] / elapsed,
+        "errors": stats["errors"],
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }
+
+
+def print_line(label: str, result: dict, queue: WriteQueue = None):
+    line = (
+        f"  {label:<14} writes={result['writes_per_s']:7.0f}/s  "
+        f"lock errors={result['errors']:<5} p50={result['p50_ms']:7.1f} ms  "
+        f"p95={result['p95_ms']:7.1f} ms  reads={result['reads_per_s']:6.0f}/s"
+    )
+    if queue is not None:
+        metrics = queue.metrics()
+        line += (
+            f"  mean batch={metrics['batch_size']['mean']:.1f}"
+            f"  retried batches={metrics['retried_batches']}"
+        )
+    print(line)
+
+
+async def main(handlers: int, seconds: float):
+    print(f"\n✍️  Write queue load test ({handlers} writers + {READERS} readers, {seconds:g} s per run)")
+
+    for label, queued in (("direct", False), ("write queue", True)):
+        async with bench_database():
+            engine = create_engine(BENCH_DATABASE_URL, pool_size=handlers + READERS + 1)
+            session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            queue = WriteQueue(session_factory)
+            if queued:
+                queue.start()
+            try:
+                result = await run_load(session_factory, queue, handlers, seconds)
+            finally:
+                await queue.stop()
+                await engine.dispose()
+            print_line(label, result, queue if queued else None)
+
+
+if __name__ == "__main__":
+    handler_count = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    asyncio.run(main(handler_count, duration))
@@ -0,0 +1,118 @@
+"""Shared helpers for the benchmark scripts.
+
+Every benchmark runs against its own throw-away database (SQLite by default)
+so it never touches ``pishro_bot.db`` or the configured production database.
+Set ``BENCH_DATABASE_URL`` to benchmark against another backend.
+"""
+
+import os
+import sys
+import time
+import statistics
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database.session import Base
+from app.models.models import (
+    User, Investment, Transaction, UserRole, ContractType, TransactionType
+)
+
+BENCH_DB_PATH = ROOT_DIR / "bench.db"
+BENCH_DATABASE_URL = os.environ.get(
+    "BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{BENCH_DB_PATH}"
+)
+
+
+@asynccontextmanager
+async def bench_database(url: str = BENCH_DATABASE_URL):
+    """Yield a session factory bound to a freshly created schema."""
+    if url.startswith("sqlite") and BENCH_DB_PATH.exists():
+        BENCH_DB_PATH.unlink()
+    
+    engine = create_async_engine(url, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    
+    try:
+        yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+        if url.startswith("sqlite") and BENCH_DB_PATH.exists():
+            BENCH_DB_PATH.unlink()
+
+
+async def seed_investment(session: AsyncSession, transaction_count: int,
+                          batch_size: int = 10_000) -> Investment:
+    """Create one investor with one investment and ``transaction_count`` ledger rows."""
+    user = User(
+        telegram_id=1_000_001,
+        phone_number="09120000001",
+        name="سرمایه‌گذار بنچمارک",
+        role=UserRole.INVESTOR,
+        is_verified=True,
+    )
+    session.add(user)
+    await session.flush()
+    
+    investment = Investment(
+        user_id=user.id,
+        contract_type=ContractType.VARIABLE_HOLDING,
+        initial_amount=1_000_000_000,
+        start_date=date(2020, 1, 1),
+    )
+    session.add(investment)
+    await session.flush()
+    
+    types = [TransactionType.DEPOSIT, TransactionType.WITHDRAWAL, TransactionType.DIVIDEND]
+    rows = []
+    for i in range(transaction_count):
+        txn_type = types[i % len(types)]
+        amount = 1_000_000 + i
+        rows.append({
+            "investment_id": investment.id,
+            "type": txn_type,
+            "amount": -amount if txn_type == TransactionType.WITHDRAWAL else amount,
+            "transaction_date": date(2020, 1, 1) + timedelta(days=i % 2000),
+            "recorded_by": user.id,
+        })
+        if len(rows) >= batch_size:
+            await session.execute(insert(Transaction), rows)
+            rows = []
+    if rows:
+        await session.execute(insert(Transaction), rows)
+    
+    await session.commit()
+    return investment
+
+
+async def measure(func, repeat: int = 20) -> dict:
+    """Await ``func()`` ``repeat`` times and return latency statistics in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def print_result(label: str, stats: dict):
+    """Print one benchmark line."""
+    print(
+        f"  {label:<32} mean={stats['mean_ms']:9.2f} ms  "
+        f"p50={stats['p50_ms']:9.2f} ms  p95={stats['p95_ms']:9.2f} ms"
+    )
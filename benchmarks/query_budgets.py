@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Query-count regression check for the bot handlers.
+
+Runs the real handlers against a seeded throw-away database and fails when a
+handler issues more SQL statements or fetches more ORM rows than its budget.
+Budgets are fixed and independent of the ledger size, so a reintroduced N+1
+or joinedload row explosion shows up immediately.
+
+Handlers run behind `AuthMiddleware` exactly as the dispatcher calls them.
+Budgets are for a warm user cache; the cold lookup is measured separately.
+Also checks that a demotion written behind the cache's back (as by another
+process) takes effect on the admin's next update.
+
+Usage:
+    python benchmarks/query_budgets.py [transaction_count]
+"""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from common import bench_database, seed_investment
+
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import insert, update
+
+from app.models.models import User, Valuation, UserRole
+from app.services.repositories import BalanceRepository
+from app.handlers import investor, accountant, admin
+from app.middleware import AuthMiddleware
+from app.services.user_cache import user_cache
+from app.services.analytics_cache import report_cache
+from app.states.forms import ValuationFSM, BulkValuationFSM
+from app.utils.query_counter import QueryCounter
+
+INVESTOR_TELEGRAM_ID = 1_000_001
+ADMIN_TELEGRAM_ID = 1_000_002
+VALUATION_COUNT = 50
+
+# handler name -> (max statements, max ORM rows)
+BUDGETS = {
+    "auth_middleware_cold": (1, 1),
+    "investor_portfolio_status": (2, 2),
+    "investor_transaction_history": (3, 13),
+    "investor_transaction_history_page": (3, 13),
+    # Staff updates include the role re-check (one statement, one row)
+    "accountant_select_investor": (4, 4),
+    "admin_select_investor_for_valuation": (4, 4),
+    "back_to_menu": (0, 0),
+    "admin_save_bulk_valuation": (7, 3),
+    "admin_reports": (1, 1),
+}
+
+
+class FakeMessage:
+    """Just enough of `types.Message` for callback handlers."""
+
+    def __init__(self):
+        self.texts = []
+
+    async def edit_text(self, text, **kwargs):
+        self.texts.append(text)
+
+    async def answer(self, text, **kwargs):
+        self.texts.append(text)
+
+
+class FakeCallback:
+    """Just enough of `types.CallbackQuery` for the handlers under test."""
+
+    def __init__(self, telegram_id: int, data: str):
+        self.from_user = SimpleNamespace(id=telegram_id)
+        self.data = data
+        self.message = FakeMessage()
+        self.alerts = []
+
+    async def answer(self, text=None, show_alert=False, **kwargs):
+        if text:
+            self.alerts.append(text)
+
+
+def make_state(storage: MemoryStorage, telegram_id: int) -> FSMContext:
+    """Create an FSM context for a private chat with ``telegram_id``."""
+    key = StorageKey(bot_id=0, chat_id=telegram_id, user_id=telegram_id)
+    return FSMContext(storage=storage, key=key)
+
+
+async def seed(session, transaction_count: int) -> int:
+    """Seed one investor with a ledger and valuation history, plus an admin."""
+    investment = await seed_investment(session, transaction_count)
+
+    session.add(User(
+        telegram_id=ADMIN_TELEGRAM_ID,
+        phone_number="09120000002",
+        name="ادمین بنچمارک",
+        role=UserRole.ADMIN,
+        is_verified=True,
+    ))
+    await session.flush()
+
+    await session.execute(insert(Valuation), [
+        {
+            "investment_id": investment.id,
+            "old_value": 1_000_000_000 + i * 1_000_000,
+            "new_value": 1_000_000_000 + (i + 1) * 1_000_000,
+            "valuation_date": date(2020, 1, 1) + timedelta(days=30 * i),
+            "updated_by": investment.user_id,
+        }
+        for i in range(VALUATION_COUNT)
+    ])
+    await BalanceRepository(session).rebuild()
+    await session.commit()
+    return investment.user_id
+
+
+async def noop(*args, **kwargs):
+    pass
+
+
+async def run(session_factory, handler, callback: FakeCallback,
+              state: FSMContext = None) -> tuple:
+    """Run one handler behind `AuthMiddleware` in a fresh session.
+    
+    Returns:
+        (statements, rows) issued by the middleware and the handler
+    """
+    handler_object = CallableObject(handler)
+    async with session_factory() as session:
+        data = {"session": session, "event_from_user": callback.from_user, "state": state}
+        with QueryCounter(session) as counter:
+            await AuthMiddleware()(
+                lambda event, data: handler_object.call(event, **data), callback, data
+            )
+    return counter.statements, counter.rows
+
+
+async def main(transaction_count: int) -> int:
+    print(f"\n🧮 Handler query budgets ({transaction_count:,} transactions, "
+          f"{VALUATION_COUNT} valuations)")
+
+    async with bench_database() as session_factory:
+        async with session_factory() as session:
+            investor_id = await seed(session, transaction_count)
+
+        storage = MemoryStorage()
+        investor_state = make_state(storage, INVESTOR_TELEGRAM_ID)
+        admin_state = make_state(storage, ADMIN_TELEGRAM_ID)
+        await admin_state.set_state(ValuationFSM.waiting_investor_selection)
+
+        user_cache.clear()
+        results = {
+            "auth_middleware_cold": await run(
+                session_factory, noop, FakeCallback(INVESTOR_TELEGRAM_ID, "noop"),
+            ),
+        }
+        # Everything below runs with a warm cache
+        await run(session_factory, noop, FakeCallback(ADMIN_TELEGRAM_ID, "noop"))
+        
+        results.update({
+            "investor_portfolio_status": await run(
+                session_factory, investor.investor_portfolio_status,
+                FakeCallback(INVESTOR_TELEGRAM_ID, "investor_portfolio_status"),
+            ),
+            "investor_transaction_history": await run(
+                session_factory, investor.investor_transaction_history,
+                FakeCallback(INVESTOR_TELEGRAM_ID, "investor_transaction_history"), investor_state,
+            ),
+            "investor_transaction_history_page": await run(
+                session_factory, investor.investor_transaction_history_page,
+                FakeCallback(INVESTOR_TELEGRAM_ID, "txn_history_2"), investor_state,
+            ),
+            "accountant_select_investor": await run(
+                session_factory, accountant.select_investor,
+                FakeCallback(ADMIN_TELEGRAM_ID, f"select_investor_{investor_id}"), admin_state,
+            ),
+            "admin_select_investor_for_valuation": await run(
+                session_factory, admin.select_investor_for_valuation,
+                FakeCallback(ADMIN_TELEGRAM_ID, f"select_investor_{investor_id}"), admin_state,
+            ),
+            "back_to_menu": await run(
+                session_factory, investor.back_to_menu,
+                FakeCallback(INVESTOR_TELEGRAM_ID, "back_to_menu"),
+            ),
+        })
+        
+        await admin_state.set_state(BulkValuationFSM.waiting_confirmation)
+        await admin_state.set_data({"update_mode": "percentage", "percentage": 1.5})
+        results["admin_save_bulk_valuation"] = await run(
+            session_factory, admin.save_bulk_valuation,
+            FakeCallback(ADMIN_TELEGRAM_ID, "confirm_bulk_valuation"), admin_state,
+        )
+        
+        # Served from the report cache, which the bot refreshes in the background
+        report_cache.session_factory = session_factory
+        await report_cache.refresh()
+        results["admin_reports"] = await run(
+            session_factory, admin.admin_reports, FakeCallback(ADMIN_TELEGRAM_ID, "admin_reports"),
+        )
+
+        # Another process demotes the admin: this process's cache is not told
+        seen = []
+
+        async def capture(event, user=None, **kwargs):
+            seen.append(user)
+
+        async with session_factory() as session:
+            await session.execute(
+                update(User).where(User.telegram_id == ADMIN_TELEGRAM_ID).values(role=UserRole.INVESTOR)
+            )
+            await session.commit()
+        await run(session_factory, capture, FakeCallback(ADMIN_TELEGRAM_ID, "noop"))
+        demoted = seen[-1] is not None and seen[-1].role == UserRole.INVESTOR
+
+    failures = 0
+    for name, (statements, rows) in results.items():
+        max_statements, max_rows = BUDGETS[name]
+        ok = statements <= max_statements and rows <= max_rows
+        failures += not ok
+        print(
+            f"  {'✅' if ok else '❌'} {name:<38} statements={statements:>3}/{max_statements:<3} "
+            f"rows={rows:>5}/{max_rows}"
+        )
+
+    failures += not demoted
+    print(f"  {'✅' if demoted else '❌'} admin demoted by another process loses admin rights on the next update")
+
+    stats = user_cache.stats()
+    print(
+        f"  user cache: hit ratio {stats['hit_ratio']:.0%}, "
+        f"{stats['queries_saved']} lookups saved over {stats['updates']} updates "
+        f"({stats['queries_saved_per_update']:.2f}/update)"
+    )
+    
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    sys.exit(asyncio.run(main(count)))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Read-replica routing check for `RoutingSession`.
+
+Seeds the same investor into a primary and a "replica" database, then makes
+the replica visibly stale (a different investor name, and it never receives
+the writes made during the check). Statements are counted per database.
+Checks:
+
+- marked repository reads (``get_by_*``, history) go to the replica
+- unmarked reads and all writes go to the primary
+- after a write the session reads its own writes from the primary
+- the writer's next sessions stay on the primary for ``pin_seconds``, other
+  users keep reading the replica
+- read-modify-write repository methods and `WriteQueue.run` pin up front
+- without replicas everything goes to the primary
+
+Defaults to two SQLite files; set ``BENCH_DATABASE_URL`` and
+``BENCH_REPLICA_URL`` to use two PostgreSQL databases instead.
+
+Usage:
+    python benchmarks/replica_routing.py
+"""
+
+import asyncio
+import os
+import sys
+from collections import Counter
+from datetime import date
+
+from common import BENCH_DATABASE_URL, ROOT_DIR, bench_database
+
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.engine import create_engine
+from app.database.routing import RoutingSession, set_actor
+from app.database.session import Base
+from app.models.models import User, UserRole, ContractType, TransactionType
+from app.services.portfolio_service import PortfolioService
+from app.services.repositories import (
+    InvestmentRepository, TransactionRepository, UserRepository
+)
+from app.services.write_queue import WriteQueue
+
+REPLICA_DB_PATH = ROOT_DIR / "bench_replica.db"
+BENCH_REPLICA_URL = os.environ.get("BENCH_REPLICA_URL", f"sqlite+aiosqlite:///{REPLICA_DB_PATH}")
+
+PIN_SECONDS = 0.5
+INVESTOR_PHONE = "09120000001"
+ACCOUNTANT_TELEGRAM_ID = 3_000_000
+
+
+async def seed(session_factory):
+    """Identical rows (and IDs) in both databases."""
+    async with session_factory() as session:
+        accountant = User(
+            telegram_id=ACCOUNTANT_TELEGRAM_ID, phone_number="09120000000", name="حسابدار",
+            role=UserRole.ACCOUNTANT, is_verified=True,
+        )
+        investor = User(
+            telegram_id=3_000_001, phone_number=INVESTOR_PHONE, name="سرمایه‌گذار",
+            role=UserRole.INVESTOR, is_verified=False,
+        )
+        session.add_all([accountant, investor])
+        await session.flush()
+        await InvestmentRepository(session).create(
+            investor.id, ContractType.VARIABLE_HOLDING, 1_000_000_000, date(2024, 1, 1)
+        )
+        await session.commit()
+
+
+class Routing:
+    """Statements executed per database."""
+
+    def __init__(self, primary, replica):
+        self.counts = Counter()
+        for name, engine in (("primary", primary), ("replica", replica)):
+            event.listen(engine.sync_engine, "before_cursor_execute", self._counter(name))
+
+    def _counter(self, name: str):
+        def count(*args):
+            self.counts[name] += 1
+        return count
+
+    async def served_by(self, coro) -> tuple:
+        """Run ``coro``; returns (its result, the database(s) that executed SQL)."""
+        before = self.counts.copy()
+        result = await coro
+        used = sorted(name for name in ("primary", "replica") if self.counts[name] > before[name])
+        return result, "+".join(used) or "none"
+
+
+async def main() -> int:
+    failures = 0
+
+    def check(label: str, served: str, expected: str):
+        nonlocal failures
+        ok = served == expected
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {label:<52} {served} (expected {expected})")
+
+    print("\n🪞 Read-replica routing check")
+    if BENCH_REPLICA_URL.startswith("sqlite") and REPLICA_DB_PATH.exists():
+        REPLICA_DB_PATH.unlink()
+
+    async with bench_database() as plain_factory:
+        primary = create_engine(BENCH_DATABASE_URL)
+        replica = create_engine(BENCH_REPLICA_URL)
+        try:
+            async with replica.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+            await seed(plain_factory)
+            await seed(async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False))
+            async with replica.begin() as conn:
+                await conn.execute(update(User).where(User.phone_number == INVESTOR_PHONE).values(name="stale"))
+
+            routing = Routing(primary, replica)
+            session_factory = async_sessionmaker(
+                primary, class_=AsyncSession, sync_session_class=RoutingSession,
+                replicas=[replica.sync_engine], pin_seconds=PIN_SECONDS, expire_on_commit=False,
+            )
+
+            async with session_factory() as session:
+                users = UserRepository(session)
+                investor, served = await routing.served_by(users.get_by_phone(INVESTOR_PHONE))
+                check("get_by_phone", served, "replica")
+                check("  ... returned the replica's row", investor.name, "stale")
+                _, served = await routing.served_by(users.list_by_role(UserRole.INVESTOR))
+                check("list_by_role", served, "replica")
+                _, served = await routing.served_by(users.search_by_name_or_phone("0912"))
+                check("search_by_name_or_phone", served, "replica")
+                investment, served = await routing.served_by(
+                    InvestmentRepository(session).get_first_by_user(investor.id)
+                )
+                check("get_first_by_user", served, "replica")
+                _, served = await routing.served_by(InvestmentRepository(session).count_active())
+                check("unmarked read (count_active)", served, "primary")
+
+            async with session_factory() as session:
+                set_actor(session, ACCOUNTANT_TELEGRAM_ID)
+                transactions = TransactionRepository(session)
+                _, served = await routing.served_by(transactions.get_page(investment.id))
+                check("transaction history before writing", served, "replica")
+                _, served = await routing.served_by(PortfolioService(session).record_transaction(
+                    investment.id, TransactionType.DEPOSIT, 5_000_000, date.today(), recorded_by=1,
+                ))
+                check("record_transaction", served, "primary")
+                await session.commit()
+                (page, _), served = await routing.served_by(transactions.get_page(investment.id))
+                check("transaction history after writing", served, "primary")
+                check("  ... sees the new transaction", str(len(page)), "1")
+
+            async with session_factory() as session:
+                set_actor(session, ACCOUNTANT_TELEGRAM_ID)
+                _, served = await routing.served_by(UserRepository(session).get_by_telegram_id(ACCOUNTANT_TELEGRAM_ID))
+                check("writer's next session, within pin window", served, "primary")
+            async with session_factory() as session:
+                set_actor(session, 3_000_001)
+                _, served = await routing.served_by(UserRepository(session).get_by_id(investor.id))
+                check("another user's session", served, "replica")
+            await asyncio.sleep(PIN_SECONDS)
+            async with session_factory() as session:
+                set_actor(session, ACCOUNTANT_TELEGRAM_ID)
+                _, served = await routing.served_by(UserRepository(session).get_by_telegram_id(ACCOUNTANT_TELEGRAM_ID))
+                check("writer's next session, after pin window", served, "replica")
+
+            async with session_factory() as session:
+                user, served = await routing.served_by(UserRepository(session).verify_user(investor.id))
+                await session.commit()
+                check("verify_user (read-modify-write)", served, "primary")
+                check("  ... modified the primary's row", user.name, "سرمایه‌گذار")
+
+            queue = WriteQueue(session_factory)
+            async with session_factory() as session:
+                _, served = await routing.served_by(queue.run(
+                    session, lambda write_session: UserRepository(write_session).get_by_phone(INVESTOR_PHONE)
+                ))
+                check("WriteQueue.run unit's reads", served, "primary")
+
+            no_replicas = async_sessionmaker(
+                primary, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False,
+            )
+            async with no_replicas() as session:
+                _, served = await routing.served_by(UserRepository(session).get_by_phone(INVESTOR_PHONE))
+                check("no replicas configured", served, "primary")
+        finally:
+            await primary.dispose()
+            await replica.dispose()
+            if BENCH_REPLICA_URL.startswith("sqlite") and REPLICA_DB_PATH.exists():
+                REPLICA_DB_PATH.unlink()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -9,7 +9,9 @@ from pathlib import Path
 app_dir = Path(__file__).parent / "app"
 sys.path.insert(0, str(app_dir.parent))
 
-from app.database.session import AsyncSessionLocal, engine, Base
+from app.database.session import AsyncSessionLocal, engine, Base, close_db
+from app.database.migrations import upgrade_database
+from sqlalchemy import text
 from app.models.models import User, Investment, UserRole, ContractType, TransactionType, Transaction
 from datetime import date
 import jdatetime
@@ -20,11 +22,11 @@ async def init_database():
     print("🗑️  Dropping existing tables...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
     print("✅ Tables dropped!\n")
     
-    print("🔧 Creating new database tables...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    print("🔧 Creating new database tables (migrations)...")
+    await upgrade_database()
     print("✅ Database tables created successfully!")
     
     print("\n📝 Adding seed data (test users)...")
@@ -130,6 +132,8 @@ async def main():
     except Exception as e:
         print(f"\n❌ Error: {e}")
         sys.exit(1)
+    finally:
+        await close_db()
 
 
 if __name__ == "__main__":
@@ -4,13 +4,15 @@ import logging
 import os
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import ORJSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 # Import API routers
-from app.api import users, investments, transactions
-from app.database.session import init_db, close_db
+from app.api import users, investments, transactions, valuations, exports
+from app.api.etag import ETagMiddleware
+from app.database.session import close_db
+from app.database.migrations import check_schema_revision
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -22,8 +24,8 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
     # Startup
     logger.info("🚀 Starting API server...")
-    await init_db()
-    logger.info("✅ Database initialized")
+    revision = await check_schema_revision()
+    logger.info(f"✅ Database schema at revision {revision}")
     
     yield
     
@@ -38,7 +40,9 @@ app = FastAPI(
     title="Pishro Investment API",
     description="RESTful API for investment management system",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson encodes responses several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -50,6 +54,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETags on JSON GET responses; clients revalidate with If-None-Match
+app.add_middleware(ETagMiddleware)
+
 
 
 # Global exception handler
@@ -57,7 +64,7 @@ app.add_middleware(
 async def global_exception_handler(request: Request, exc: Exception):
     """Handle all exceptions globally."""
     logger.error(f"Exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -71,6 +78,8 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(users.router)
 app.include_router(investments.router)
 app.include_router(transactions.router)
+app.include_router(valuations.router)
+app.include_router(exports.router)
 
 
 # API info endpoint
@@ -85,7 +94,9 @@ async def api_info():
         "API endpoints": {
             "users": "/api/v1/users",
             "investments": "/api/v1/investments",
-            "transactions": "/api/v1/transactions"
+            "transactions": "/api/v1/transactions",
+            "valuations": "/api/v1/valuations",
+            "export": "/api/v1/export"
         }
     }
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Run database schema migrations (Alembic revisions in migrations/versions).
+
+Run ``upgrade`` on every deploy before starting the bot or API; they refuse
+to start on a database that is not at the head revision.
+
+Usage:
+    python migrate.py upgrade [revision]      # default: head
+    python migrate.py upgrade --sql           # print the SQL instead of running it
+    python migrate.py downgrade <revision>
+    python migrate.py current                 # revision stored in the database
+    python migrate.py check                   # exit 1 unless the database is at head
+    python migrate.py history
+    python migrate.py revision -m "add column" [--autogenerate]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add app to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from alembic import command
+
+from app.database.migrations import (
+    SchemaRevisionError, alembic_config, check_schema_revision, current_revision,
+    head_revision, run_command
+)
+from app.database.session import close_db
+
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "upgrade":
+            await run_command("upgrade", args.revision)
+            print(f"✅ Database at revision {await current_revision()}")
+        elif args.command == "downgrade":
+            await run_command("downgrade", args.revision)
+            print(f"✅ Database at revision {await current_revision() or 'base'}")
+        elif args.command == "current":
+            print(f"{await current_revision() or 'none'} (head: {head_revision()})")
+        elif args.command == "check":
+            try:
+                print(f"✅ Database at head revision {await check_schema_revision()}")
+            except SchemaRevisionError as e:
+                print(f"❌ {e}")
+                return 1
+        elif args.command == "revision":
+            await run_command("revision", message=args.message, autogenerate=args.autogenerate)
+        return 0
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = commands.add_parser("upgrade", help="Migrate up (default: to head)")
+    upgrade.add_argument("revision", nargs="?", default="head")
+    upgrade.add_argument("--sql", action="store_true", help="Print the SQL instead of running it")
+
+    downgrade = commands.add_parser("downgrade", help="Migrate down to a revision")
+    downgrade.add_argument("revision")
+    downgrade.add_argument("--sql", action="store_true", help="Print the SQL instead of running it")
+
+    commands.add_parser("current", help="Show the database revision")
+    commands.add_parser("check", help="Exit 1 unless the database is at head")
+    commands.add_parser("history", help="List revisions")
+
+    revision = commands.add_parser("revision", help="Create a new revision file")
+    revision.add_argument("-m", "--message", required=True)
+    revision.add_argument("--autogenerate", action="store_true",
+                          help="Diff the models against the database")
+
+    args = parser.parse_args()
+
+    # Offline commands need no database connection
+    if args.command == "history":
+        command.history(alembic_config())
+    elif getattr(args, "sql", False):
+        getattr(command, args.command)(alembic_config(), args.revision, sql=True)
+    else:
+        sys.exit(asyncio.run(main(args)))
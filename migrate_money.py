@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Convert ledger money columns from FLOAT to whole-Toman BIGINT.
+
+Every `Money` column (investments, transactions, valuations and the balance
+snapshots) still stored as a floating-point type is converted, rounding each
+value half away from zero. PostgreSQL alters the columns in place; SQLite,
+which cannot change a column type, rebuilds each table. Everything runs in
+one transaction:
+
+1. per column: row count, float total and the total of the rounded values
+2. convert the columns
+3. check every converted column holds exactly the rounded total
+4. rebuild the balance snapshots from the converted ledger (summing rounded
+   amounts can differ from rounding the old float sums) and verify them
+
+Any mismatch rolls the whole migration back.
+
+Usage:
+    python migrate_money.py            # convert, verify, commit
+    python migrate_money.py --check    # only report columns still stored as FLOAT
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Add app to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import Integer, Numeric, BigInteger, cast, func, inspect, select, table, column
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.database.session import Base, engine, close_db
+from app.services.repositories import BalanceRepository
+from app.utils.money import Money
+
+import app.models.models  # noqa: F401  (registers the tables on Base.metadata)
+
+
+def money_columns() -> Dict[str, List[str]]:
+    """Model tables and their `Money` columns."""
+    return {
+        model_table.name: [c.name for c in model_table.columns if isinstance(c.type, Money)]
+        for model_table in Base.metadata.sorted_tables
+        if any(isinstance(c.type, Money) for c in model_table.columns)
+    }
+
+
+async def pending_columns(conn: AsyncConnection) -> Dict[str, List[str]]:
+    """Money columns whose database type is not an integer yet."""
+    def inspect_columns(sync_conn):
+        inspector = inspect(sync_conn)
+        existing = set(inspector.get_table_names())
+        pending = {}
+        for table_name, names in money_columns().items():
+            if table_name not in existing:
+                continue
+            types = {c["name"]: c["type"] for c in inspector.get_columns(table_name)}
+            floats = [name for name in names if name in types and not isinstance(types[name], Integer)]
+            if floats:
+                pending[table_name] = floats
+        return pending
+    
+    return await conn.run_sync(inspect_columns)
+
+
+def rounded(col):
+    """Round half away from zero on every backend (PostgreSQL rounds DOUBLE half-even)."""
+    return cast(func.round(cast(col, Numeric)), BigInteger)
+
+
+async def column_stats(conn: AsyncConnection, table_name: str, names: List[str]) -> Dict[str, Dict]:
+    """Row count, total, rounded total and fractional rows per column."""
+    stats = {}
+    source = table(table_name, *[column(name) for name in names])
+    for name in names:
+        col = source.c[name]
+        row = (await conn.execute(select(
+            func.count(col),
+            func.coalesce(func.sum(col), 0),
+            func.coalesce(func.sum(rounded(col)), 0),
+            func.count(col).filter(col != rounded(col)),
+        ))).one()
+        stats[name] = {
+            "rows": row[0], "total": row[1], "rounded_total": int(row[2]), "fractional": row[3]
+        }
+    return stats
+
+
+async def convert_postgresql(conn: AsyncConnection, table_name: str, names: List[str]):
+    for name in names:
+        await conn.exec_driver_sql(
+            f'ALTER TABLE "{table_name}" ALTER COLUMN "{name}" TYPE BIGINT '
+            f'USING round("{name}"::numeric)::bigint'
+        )
+
+
+async def convert_sqlite(conn: AsyncConnection, table_name: str, names: List[str]):
+    """Rebuild one table with the model's DDL, copying rows with rounded amounts."""
+    model_table = Base.metadata.tables[table_name]
+    temp_name = f"_money_{table_name}"
+    
+    ddl = str(CreateTable(model_table).compile(dialect=conn.dialect))
+    await conn.exec_driver_sql(ddl.replace(f"TABLE {table_name} ", f"TABLE {temp_name} ", 1))
+    
+    existing = await conn.run_sync(lambda sync_conn: {
+        c["name"] for c in inspect(sync_conn).get_columns(table_name)
+    })
+    copied = [c.name for c in model_table.columns if c.name in existing]
+    select_list = ", ".join(
+        f"CAST(ROUND({name}) AS INTEGER)" if name in names else name for name in copied
+    )
+    await conn.exec_driver_sql(
+        f"INSERT INTO {temp_name} ({', '.join(copied)}) SELECT {select_list} FROM {table_name}"
+    )
+    await conn.exec_driver_sql(f"DROP TABLE {table_name}")
+    await conn.exec_driver_sql(f"ALTER TABLE {temp_name} RENAME TO {table_name}")
+    for index in model_table.indexes:
+        await conn.execute(CreateIndex(index))
+
+
+async def migrate(conn: AsyncConnection, pending: Dict[str, List[str]]) -> bool:
+    """Convert, check and rebuild snapshots; False if anything does not add up."""
+    before = {
+        table_name: await column_stats(conn, table_name, names)
+        for table_name, names in pending.items()
+    }
+    
+    for table_name, names in pending.items():
+        print(f"🔧 Converting {table_name}: {', '.join(names)}")
+        if conn.dialect.name == "sqlite":
+            await convert_sqlite(conn, table_name, names)
+        else:
+            await convert_postgresql(conn, table_name, names)
+    
+    ok = True
+    for table_name, columns in before.items():
+        after = await column_stats(conn, table_name, list(columns))
+        for name, stats in columns.items():
+            converted = after[name]
+            matches = (
+                converted["rows"] == stats["rows"]
+                and converted["total"] == stats["rounded_total"]
+                and converted["fractional"] == 0
+            )
+            ok = ok and matches
+            print(
+                f"   {'✅' if matches else '❌'} {table_name}.{name}: {stats['rows']:,} rows, "
+                f"{stats['fractional']:,} rounded, total {stats['total']:,.2f} → {converted['total']:,}"
+            )
+    
+    session = AsyncSession(bind=conn)
+    balance_repo = BalanceRepository(session)
+    print("🔧 Rebuilding investment balances from the converted ledger...")
+    rebuilt = await balance_repo.rebuild()
+    drift = await balance_repo.verify()
+    print(f"   {'✅' if not drift else '❌'} {rebuilt} snapshot row(s), {len(drift)} drifted field(s)")
+    return ok and not drift
+
+
+async def main(check_only: bool) -> int:
+    try:
+        async with engine.connect() as conn:
+            pending = await pending_columns(conn)
+            if not pending:
+                print("✅ All money columns are already whole-Toman integers")
+                return 0
+            
+            for table_name, names in pending.items():
+                print(f"⚠️  {table_name}: {', '.join(names)} stored as floating point")
+            if check_only:
+                return 1
+            await conn.rollback()
+            
+            sqlite = conn.dialect.name == "sqlite"
+            if sqlite:
+                # Table rebuilds need foreign keys off and an explicit transaction
+                # (pysqlite would otherwise commit around the DDL)
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+                await conn.exec_driver_sql("BEGIN")
+            
+            ok = False
+            try:
+                ok = await migrate(conn, pending)
+            finally:
+                if sqlite:
+                    await conn.exec_driver_sql("COMMIT" if ok else "ROLLBACK")
+                elif ok:
+                    await conn.commit()
+                else:
+                    await conn.rollback()
+            
+            print("✅ Money columns converted" if ok else "❌ Totals did not match; rolled back")
+            return 0 if ok else 1
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="Only report unconverted columns")
+    args = parser.parse_args()
+    
+    sys.exit(asyncio.run(main(args.check)))
@@ -0,0 +1,89 @@
+"""Alembic environment for the Pishro schema.
+
+The URL comes from ``settings.DATABASE_URL``. When `app.database.migrations`
+runs a command programmatically it passes its own (sync-wrapped) connection
+in ``config.attributes["connection"]``; otherwise a short-lived async engine
+is created here.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from app.config import settings
+from app.database.session import Base
+from app.utils.money import Money
+import app.models.models  # noqa: F401  (registers the tables on Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def render_item(type_, obj, autogen_context):
+    """Render app column types as plain SQLAlchemy types in revisions."""
+    if type_ == "type" and isinstance(obj, Money):
+        return "sa.BigInteger()"
+    return False
+
+
+def configure(dialect_name: str, **kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        render_item=render_item,
+        # SQLite cannot ALTER most things; autogenerate copy-and-move batches
+        render_as_batch=dialect_name == "sqlite",
+        compare_type=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (``migrate.py upgrade --sql``)."""
+    url = database_url()
+    configure(
+        make_url(url).get_backend_name(),
+        url=url, literal_binds=True, dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    configure(connection.dialect.name, connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(database_url(), poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+        await connection.commit()
+    await engine.dispose()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
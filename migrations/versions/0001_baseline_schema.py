@@ -0,0 +1,207 @@
+"""baseline schema
+
+Every table as of the switch from ``create_all`` to migrations. Databases
+created by ``create_all`` before that are adopted rather than rebuilt:
+existing tables are left alone and only missing tables and indexes are
+created. Such databases may still hold FLOAT money columns; convert them
+with ``migrate_money.py``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 14:44:39.214647
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENUMS = {
+    'userrole': ('INVESTOR', 'ACCOUNTANT', 'ADMIN'),
+    'contracttype': ('FIXED_RATE', 'VARIABLE_HOLDING'),
+    'investmentstatus': ('ACTIVE', 'CANCELLED', 'SUSPENDED'),
+    'transactiontype': ('DEPOSIT', 'WITHDRAWAL', 'DIVIDEND', 'CANCELLATION'),
+    'outboxstatus': ('PENDING', 'SENDING', 'SENT', 'FAILED'),
+}
+
+
+def enum(name: str) -> sa.Enum:
+    return sa.Enum(*ENUMS[name], name=name)
+
+
+def create_table(name: str, *columns, indexes=()) -> None:
+    """Create ``name`` with its indexes, or only the indexes it is missing."""
+    existing = set()
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+    if inspector is None or not inspector.has_table(name):
+        op.create_table(name, *columns)
+    else:
+        existing = {index['name'] for index in inspector.get_indexes(name)}
+    for index_name, index_columns, unique in indexes:
+        if index_name not in existing:
+            op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('telegram_id', sa.Integer(), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('role', enum('userrole'), nullable=False),
+        sa.Column('is_verified', sa.Boolean(), nullable=False),
+        sa.Column('verified_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_users_id', ['id'], False),
+            ('ix_users_telegram_id', ['telegram_id'], True),
+            ('ix_users_phone_number', ['phone_number'], True),
+            ('idx_telegram_id', ['telegram_id'], False),
+            ('idx_phone_number', ['phone_number'], False),
+            ('idx_role', ['role'], False),
+        ],
+    )
+
+    create_table(
+        'investments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('contract_type', enum('contracttype'), nullable=False),
+        sa.Column('initial_amount', sa.BigInteger(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('dividend_rate', sa.Float(), nullable=True),
+        sa.Column('holding_period_months', sa.Integer(), nullable=True),
+        sa.Column('status', enum('investmentstatus'), nullable=False),
+        sa.Column('cancelled_date', sa.Date(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_investments_id', ['id'], False),
+            ('idx_user_id', ['user_id'], False),
+            ('idx_status', ['status'], False),
+        ],
+    )
+
+    create_table(
+        'transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('investment_id', sa.Integer(), nullable=False),
+        sa.Column('type', enum('transactiontype'), nullable=False),
+        sa.Column('amount', sa.BigInteger(), nullable=False),
+        sa.Column('transaction_date', sa.Date(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('recorded_by', sa.Integer(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['investment_id'], ['investments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['recorded_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_transactions_id', ['id'], False),
+            ('idx_investment_id', ['investment_id'], False),
+            ('idx_transaction_date', ['transaction_date'], False),
+            ('idx_type', ['type'], False),
+            ('idx_transaction_investment_date_id', ['investment_id', 'transaction_date', 'id'], False),
+        ],
+    )
+
+    create_table(
+        'valuations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('investment_id', sa.Integer(), nullable=False),
+        sa.Column('old_value', sa.BigInteger(), nullable=True),
+        sa.Column('new_value', sa.BigInteger(), nullable=False),
+        sa.Column('profit_percentage', sa.Float(), nullable=True),
+        sa.Column('valuation_date', sa.Date(), nullable=False),
+        sa.Column('reason', sa.Text(), nullable=True),
+        sa.Column('updated_by', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['investment_id'], ['investments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['updated_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_valuations_id', ['id'], False),
+            ('idx_valuation_investment_id', ['investment_id'], False),
+            ('idx_valuation_date', ['valuation_date'], False),
+        ],
+    )
+
+    create_table(
+        'investment_balances',
+        sa.Column('investment_id', sa.Integer(), nullable=False),
+        sa.Column('total_deposits', sa.BigInteger(), nullable=False),
+        sa.Column('total_withdrawals', sa.BigInteger(), nullable=False),
+        sa.Column('total_dividends', sa.BigInteger(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('last_transaction_date', sa.Date(), nullable=True),
+        sa.Column('latest_valuation_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['investment_id'], ['investments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['latest_valuation_id'], ['valuations.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('investment_id'),
+    )
+
+    create_table(
+        'investment_daily_balances',
+        sa.Column('investment_id', sa.Integer(), nullable=False),
+        sa.Column('balance_date', sa.Date(), nullable=False),
+        sa.Column('net_amount', sa.BigInteger(), nullable=False),
+        sa.Column('cumulative_amount', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['investment_id'], ['investments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('investment_id', 'balance_date'),
+    )
+
+    create_table(
+        'fsm_states',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('state', sa.String(length=255), nullable=True),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+        indexes=[
+            ('idx_fsm_state_expires_at', ['expires_at'], False),
+        ],
+    )
+
+    create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(length=16), nullable=True),
+        sa.Column('dedup_key', sa.String(length=255), nullable=True),
+        sa.Column('status', enum('outboxstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dedup_key'),
+        indexes=[
+            ('idx_outbox_status_next_attempt', ['status', 'next_attempt_at'], False),
+        ],
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        'notification_outbox', 'fsm_states', 'investment_daily_balances', 'investment_balances',
+        'valuations', 'transactions', 'investments', 'users',
+    ):
+        op.drop_table(name)
+    if context.get_context().dialect.name == 'postgresql':
+        for name in ENUMS:
+            op.execute(f'DROP TYPE IF EXISTS {name}')
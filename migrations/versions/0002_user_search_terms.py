@@ -0,0 +1,64 @@
+"""user search terms
+
+Normalized name words for indexed investor search (`UserSearchTerm`),
+backfilled from the existing users. The tables are analyzed afterwards:
+without statistics SQLite serves the role-filtered search from
+``idx_role`` (a scan of every investor) instead of the term and phone
+indexes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:20:11.508193
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.utils.persian import MAX_TERM_LENGTH, search_terms
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def upgrade() -> None:
+    search_terms_table = op.create_table(
+        'user_search_terms',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'term',
+            sa.String(length=MAX_TERM_LENGTH).with_variant(
+                sa.String(length=MAX_TERM_LENGTH, collation='C'), 'postgresql'
+            ),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'term'),
+    )
+    op.create_index('idx_search_term', 'user_search_terms', ['term', 'user_id'], unique=False)
+
+    if context.is_offline_mode():
+        return
+    users = op.get_bind().execute(sa.text('SELECT id, name FROM users')).all()
+    rows = []
+    for user_id, name in users:
+        rows.extend({'user_id': user_id, 'term': term} for term in search_terms(name))
+        if len(rows) >= BACKFILL_BATCH_SIZE:
+            op.bulk_insert(search_terms_table, rows)
+            rows = []
+    if rows:
+        op.bulk_insert(search_terms_table, rows)
+    op.execute('ANALYZE users')
+    op.execute('ANALYZE user_search_terms')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_search_term', table_name='user_search_terms')
+    op.drop_table('user_search_terms')
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Rebuild or verify the investment_balances snapshot from the ledger.
+
+Usage:
+    python rebuild_balances.py               # report drift, then rebuild everything
+    python rebuild_balances.py --verify      # only report drift (exit code 1 if any)
+    python rebuild_balances.py --investment 42
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add app to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database.session import AsyncSessionLocal, close_db
+from app.services.repositories import BalanceRepository
+
+
+def print_drift(drift: list):
+    """Print drift report."""
+    if not drift:
+        print("✅ Snapshot matches the ledger")
+        return
+    
+    print(f"⚠️  {len(drift)} drifted field(s):")
+    for entry in drift:
+        print(
+            f"   • investment {entry['investment_id']}: {entry['field']} "
+            f"stored={entry['stored']} expected={entry['expected']}"
+        )
+
+
+async def main(verify_only: bool, investment_id: int = None) -> int:
+    """Verify and optionally rebuild balance snapshots."""
+    try:
+        async with AsyncSessionLocal() as session:
+            balance_repo = BalanceRepository(session)
+            
+            print("🔍 Verifying investment balances against the ledger...")
+            drift = await balance_repo.verify()
+            if investment_id is not None:
+                drift = [d for d in drift if d["investment_id"] == investment_id]
+            print_drift(drift)
+            
+            if verify_only:
+                return 1 if drift else 0
+            
+            print("🔧 Rebuilding investment balances...")
+            rebuilt = await balance_repo.rebuild(investment_id)
+            await session.commit()
+            print(f"✅ Rebuilt {rebuilt} snapshot row(s)")
+            return 0
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verify", action="store_true", help="Only report drift")
+    parser.add_argument("--investment", type=int, default=None, help="Limit to one investment")
+    args = parser.parse_args()
+    
+    sys.exit(asyncio.run(main(args.verify, args.investment)))
@@ -13,7 +13,11 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select, delete
 
-from app.models.models import User, Investment, Transaction, UserRole, ContractType, TransactionType, InvestmentStatus
+from app.models.models import (
+    User, Investment, Transaction, InvestmentBalance,
+    UserRole, ContractType, TransactionType, InvestmentStatus
+)
+from app.services.repositories import BalanceRepository
 from app.config import settings
 
 import logging
@@ -38,6 +42,7 @@ async def seed_data():
         try:
             # Clear existing data
             logger.info("🗑️  Clearing existing data...")
+            await session.execute(delete(InvestmentBalance))
             await session.execute(delete(Transaction))
             await session.execute(delete(Investment))
             await session.execute(delete(User))
@@ -161,6 +166,10 @@ async def seed_data():
                 await session.commit()
                 logger.info(f"✅ Created {len(transactions)} transactions")
             
+            # Seeded rows bypass the repositories: derive balance snapshots
+            await BalanceRepository(session).rebuild()
+            await session.commit()
+            
             # Print summary
             print("\n" + "="*70)
             print("📊 خلاصهٔ دادهٔ تستی:")
@@ -19,6 +19,9 @@ mkdir -p logs
 pkill -f "run_bot.py" || true
 sleep 2
 
+# اعمال مایگریشن‌های دیتابیس
+python3 migrate.py upgrade
+
 # اجرای بات
 echo ""
 echo "🚀 شروع بات سرمایه‌گذاری پیشرو..."
@@ -12,7 +12,8 @@ from pathlib import Path
 app_dir = Path(__file__).parent / "app"
 sys.path.insert(0, str(app_dir.parent))
 
-from app.database.session import AsyncSessionLocal, init_db
+from app.database.session import AsyncSessionLocal, close_db
+from app.database.migrations import upgrade_database
 from app.models.models import (
     User, UserRole, Investment, Transaction, 
     TransactionType, InvestmentStatus
@@ -35,7 +36,7 @@ async def test_suite():
     # Initialize database
     print("\n✓ مرحله 1: مقدار‌دهی دیتابیس...")
     try:
-        await init_db()
+        await upgrade_database()
         print("  ✅ دیتابیس آماده شد")
     except Exception as e:
         print(f"  ❌ خطا: {e}")
@@ -128,5 +129,13 @@ async def test_suite():
     print("\n")
 
 
+async def main():
+    try:
+        await test_suite()
+    finally:
+        # Pooled connections keep the process alive until closed
+        await close_db()
+
+
 if __name__ == "__main__":
-    asyncio.run(test_suite())
+    asyncio.run(main())
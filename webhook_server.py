@@ -4,8 +4,9 @@ Webhook Server for Pishro Bot
 """
 
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 import asyncio
 from pathlib import Path
 from datetime import datetime
@@ -18,7 +19,32 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Pishro Bot Webhook Server")
+# Bot instance served by /webhook/telegram when BOT_MODE=webhook
+pishro_bot = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Host the bot's webhook queue when running in webhook mode."""
+    global pishro_bot
+    from app.config import settings
+    
+    if settings.BOT_MODE == "webhook":
+        from app.bot import PishroBot
+        
+        pishro_bot = PishroBot()
+        webhook_url = settings.WEBHOOK_URL or "http://localhost:8000/webhook/telegram"
+        await pishro_bot.startup_webhook(webhook_url)
+        logger.info("Bot webhook queue started")
+    
+    yield
+    
+    if pishro_bot is not None:
+        await pishro_bot.shutdown_webhook()
+        pishro_bot = None
+
+
+app = FastAPI(title="Pishro Bot Webhook Server", lifespan=lifespan)
 
 # Store logs in memory
 logs_buffer: List[Dict] = []
@@ -560,7 +586,6 @@ async def download_logs():
     logs = log_manager.read_logs(1000)
     content = "".join(logs)
     
-    from fastapi.responses import Response
     return Response(
         content=content,
         media_type="text/plain; charset=utf-8",
@@ -603,18 +628,31 @@ async def stop_bot():
 
 @app.post("/webhook/telegram")
 async def telegram_webhook(request: Request):
-    """Telegram webhook endpoint."""
+    """Telegram webhook endpoint: queue the update and acknowledge immediately."""
+    if pishro_bot is None:
+        raise HTTPException(status_code=503, detail="Bot is not running in webhook mode")
+    
     try:
         data = await request.json()
-        logger.info(f"Received update: {data}")
-        
-        # Process update here
-        # This would be handled by the main bot
-        
-        return {"ok": True}
     except Exception as e:
         logger.error(f"Webhook error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    
+    from app.bot import SECRET_TOKEN_HEADER
+    status = await pishro_bot.enqueue_webhook_update(
+        data, request.headers.get(SECRET_TOKEN_HEADER)
+    )
+    if status != 200:
+        return Response(status_code=status)
+    return {"ok": True}
+
+
+@app.get("/metrics")
+async def webhook_metrics():
+    """Update queue and outbox counters and latency percentiles."""
+    if pishro_bot is None or pishro_bot.update_queue is None:
+        raise HTTPException(status_code=503, detail="Bot is not running in webhook mode")
+    return pishro_bot.metrics()
 
 
 @app.get("/health")